@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Startup import-time budget check for WHOIS JULIUS
+
+Starts core/main.py under ``python -X importtime``, exits right away and
+compares the cumulative import time of the app's own modules against a
+budget. Exits with status 1 when a budget is exceeded.
+
+    python3 bench/importtime.py [--runs N]
+"""
+
+import os
+import subprocess
+import sys
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(BASE_PATH, "core", "main.py")
+
+# Cumulative microseconds allowed per top-level import of main.py
+BUDGETS = {
+    "commands": 25000,
+    "utils": 10000,
+    "cache": 3000,
+}
+# Modules that must not be imported before the first prompt
+LAZY = ("argparse", "json", "random", "ascii", "cast", "quotes", "snake", "matrix")
+
+def measure():
+    """Map each module imported at startup to its cumulative import time in us"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", MAIN],
+        input=b"exit\n", capture_output=True, cwd=BASE_PATH)
+    modules = {}
+    for line in result.stderr.decode(errors="replace").splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+def main():
+    runs = int(sys.argv[sys.argv.index("--runs") + 1]) if "--runs" in sys.argv else 5
+    samples = [measure() for _ in range(runs)]
+    failed = False
+
+    print(f"{'module':<12} {'best us':>9} {'budget':>9}")
+    for name, budget in BUDGETS.items():
+        times = [s[name] for s in samples if name in s]
+        best = min(times) if times else 0
+        status = "ok" if best <= budget else "OVER"
+        failed |= best > budget
+        print(f"{name:<12} {best:>9} {budget:>9}  {status}")
+
+    eager = sorted({name for s in samples for name in s if name in LAZY})
+    if eager:
+        failed = True
+        print(f"imported at startup but should be lazy: {', '.join(eager)}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
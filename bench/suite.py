@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""Headless benchmark suite for WHOIS JULIUS
+
+Runs the renderers and the dispatcher against a fake terminal (a byte
+sink with a fixed size) and reports ops/sec, bytes emitted per op and
+memory allocated per op. Results can be saved as JSON and compared with a
+saved baseline; any case slower or chattier than the threshold allows
+counts as a regression and makes the run exit with status 1.
+
+    python3 bench/suite.py [--size 120x40] [--quick] [--only NAME]
+                           [--save results.json]
+                           [--baseline baseline.json] [--threshold 0.15]
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(BASE_PATH, "core"), os.path.join(BASE_PATH, "games")]
+
+class FakeTerminal(io.TextIOBase):
+    """Text stream that swallows output and counts writes and bytes
+
+    Binary writes through .buffer are counted the same way, so renderers
+    that bypass the text layer are measured too.
+    """
+
+    def __init__(self, cols=120, rows=40):
+        self.cols = cols
+        self.rows = rows
+        self.writes = 0
+        self.bytes = 0
+        self.buffer = FakeTerminal.Binary(self)
+
+    class Binary(io.RawIOBase):
+        def __init__(self, owner):
+            self.owner = owner
+
+        def writable(self):
+            return True
+
+        def write(self, data):
+            self.owner.writes += 1
+            self.owner.bytes += len(data)
+            return len(data)
+
+    def writable(self):
+        return True
+
+    def isatty(self):
+        return False
+
+    def write(self, text):
+        self.writes += 1
+        self.bytes += len(text.encode('utf-8'))
+        return len(text)
+
+    def reset(self):
+        """Zero the counters"""
+        self.writes = 0
+        self.bytes = 0
+
+class FakeWindow:
+    """Stand-in for a curses window that counts drawing calls as writes
+
+    Each call is charged roughly what curses would send for one cell: a
+    cursor move, an attribute change and the character.
+    """
+
+    CELL_BYTES = 12
+
+    def __init__(self, terminal):
+        self.terminal = terminal
+
+    def getmaxyx(self):
+        return self.terminal.rows, self.terminal.cols
+
+    def addch(self, y, x, ch, attr=0):
+        self.terminal.writes += 1
+        self.terminal.bytes += self.CELL_BYTES
+
+    def chgat(self, y, x, num, attr):
+        self.terminal.writes += 1
+        self.terminal.bytes += self.CELL_BYTES
+
+class Redirect:
+    """Point sys.stdout at a fake terminal while a case runs"""
+
+    def __init__(self, terminal):
+        self.terminal = terminal
+
+    def __enter__(self):
+        self.saved = sys.stdout
+        sys.stdout = self.terminal
+        return self.terminal
+
+    def __exit__(self, *exc):
+        sys.stdout = self.saved
+
+def measure(op, terminal, duration, min_ops=20):
+    """Run op() repeatedly, returns ops/sec, bytes and writes per op, allocations per op"""
+    op()  # warm up caches and first-frame paths
+    terminal.reset()
+    ops = 0
+    start = time.perf_counter()
+    deadline = start + duration
+    while ops < min_ops or time.perf_counter() < deadline:
+        op()
+        ops += 1
+    elapsed = time.perf_counter() - start
+    bytes_per_op = terminal.bytes / ops
+    writes_per_op = terminal.writes / ops
+
+    # Separate pass so tracing overhead doesn't skew the timing
+    sample = max(1, min(ops, 200))
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(sample):
+        op()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    allocated = sum(stat.size_diff for stat in stats if stat.size_diff > 0)
+    blocks = sum(stat.count_diff for stat in stats if stat.count_diff > 0)
+
+    return {
+        "ops": ops,
+        "ops_per_sec": ops / elapsed,
+        "us_per_op": elapsed / ops * 1e6,
+        "bytes_per_op": bytes_per_op,
+        "writes_per_op": writes_per_op,
+        "alloc_bytes_per_op": allocated / sample,
+        "alloc_blocks_per_op": blocks / sample,
+    }
+
+def steer(game):
+    """Pick a direction that keeps the snake alive for another tick"""
+    moves = {'UP': (0, -1), 'DOWN': (0, 1), 'LEFT': (-1, 0), 'RIGHT': (1, 0)}
+    x, y = game.board.unpack(game.snake[0])
+    order = [game.direction] + [d for d in moves if d != game.direction]
+    for direction in order:
+        dx, dy = moves[direction]
+        nx, ny = x + dx, y + dy
+        if (0 <= nx < game.width and 0 <= ny < game.height
+                and not game.board.occupied[game.board.pack(nx, ny)]):
+            game.next_direction = direction
+            return
+
+def snake_cases(terminal):
+    """SnakeGame.draw_game: full repaint and per-tick diff frames"""
+    import snake
+
+    game = snake.SnakeGame()
+    game.player_name = "bench"
+    game.reset_game()
+
+    def full_frame():
+        game.reset_frame()
+        game.draw_game()
+
+    def tick():
+        steer(game)
+        if not game.move_snake():
+            game.reset_game()
+            game.reset_frame()
+        game.draw_game()
+
+    # Headless engine ticks, circling a box so the snake stays alive
+    engine = snake.SnakeEngine(game.width, game.height, seed=1)
+    turns = ['DOWN', 'LEFT', 'UP', 'RIGHT']
+
+    def engine_tick():
+        if engine.tick % 5 == 4:
+            engine.turn(turns[engine.tick // 5 % 4])
+        engine.step()
+        if not engine.alive:
+            engine.reset(seed=1)
+
+    # Autopilot decisions on a huge board, the synthetic player's per-tick cost
+    from _autopilot import Autopilot
+    big = snake.SnakeEngine(500, 500, seed=1)
+    pilot = Autopilot(big)
+
+    def autopilot_tick():
+        nonlocal pilot
+        big.turn(pilot.choose())
+        big.step()
+        if not big.alive:
+            big.reset(seed=1)
+            pilot = Autopilot(big)
+
+    return {"snake.full_frame": full_frame, "snake.tick": tick,
+            "snake.engine_tick": engine_tick, "snake.autopilot_500": autopilot_tick}
+
+def matrix_cases(terminal):
+    """MatrixRain frame construction"""
+    import matrix
+
+    rain = matrix.MatrixRain()
+    framebuffer = matrix.MatrixFramebuffer(terminal.cols, terminal.rows, rain.chars,
+                                           rain.bright_green, rain.green)
+    out = terminal.buffer
+
+    def ansi_frame():
+        out.write(framebuffer.render())
+        framebuffer.step()
+
+    # The same frames sent the way they were before the ScreenEncoder: every
+    # cell repainted, every colored cell wrapped in its color and a reset
+    from ansi import DEFAULT, transition
+    naive_source = matrix.MatrixFramebuffer(terminal.cols, terminal.rows, rain.chars,
+                                            rain.bright_green, rain.green)
+    codes = {}
+
+    def naive_cell(cell):
+        state, char = cell
+        if state == DEFAULT:
+            return char.encode()
+        return (transition(DEFAULT, state) + char + rain.reset).encode()
+
+    def naive_frame():
+        parts = [b"\033[H"]
+        for row in naive_source.cells:
+            parts.append(b"".join([codes[cell] if cell in codes else codes.setdefault(cell, naive_cell(cell))
+                                   for cell in row]))
+            parts.append(b"\r\n")
+        out.write(b"".join(parts))
+        naive_source.step()
+
+    def ansi_full_frame():
+        framebuffer.encoder.invalidate()
+        out.write(framebuffer.render())
+        framebuffer.step()
+
+    # ansi_frame while the session is recorded to an asciicast file
+    from cast import CastWriter
+    recorder = CastWriter(os.devnull)
+
+    def recorded_frame():
+        frame = framebuffer.render()
+        out.write(frame)
+        recorder.output(frame)
+        framebuffer.step()
+
+    window = FakeWindow(terminal)
+    rain_curses = matrix.CursesRain(window, rain.chars, 1, 2, 3)
+
+    def curses_frame():
+        rain_curses.step()
+
+    return {"matrix.ansi_frame": ansi_frame, "matrix.ansi_full_frame": ansi_full_frame,
+            "matrix.naive_frame": naive_frame, "matrix.curses_frame": curses_frame,
+            "matrix.recorded_frame": recorded_frame}
+
+def dispatcher_cases(terminal):
+    """CommandDispatcher.execute latency per command"""
+    from commands import CommandDispatcher
+
+    dispatcher = CommandDispatcher(out=terminal, interactive=False)
+    cases = {}
+    for command in ("help", "cv", "projects", "contact", "quote", "asciiart", "unknown"):
+        cases[f"dispatch.{command}"] = (lambda c=command: dispatcher.execute(c))
+    return cases
+
+def startup_case(runs):
+    """Wall time from launching core/main.py to exiting at the first prompt"""
+    main = os.path.join(BASE_PATH, "core", "main.py")
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, main], input=b"exit\n",
+                       capture_output=True, cwd=BASE_PATH)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    best = times[0]
+    return {
+        "ops": runs,
+        "ops_per_sec": 1 / best,
+        "us_per_op": best * 1e6,
+        "median_us": times[len(times) // 2] * 1e6,
+    }
+
+def run_suite(cols, rows, duration, startup_runs, only=None):
+    """Run every case, returns {name: metrics}"""
+    terminal = FakeTerminal(cols, rows)
+    results = {}
+    with Redirect(terminal):
+        cases = {}
+        for collect in (snake_cases, matrix_cases, dispatcher_cases):
+            cases.update(collect(terminal))
+        for name, op in cases.items():
+            if only and only not in name:
+                continue
+            results[name] = measure(op, terminal, duration)
+    if not only or only in "startup":
+        results["startup"] = startup_case(startup_runs)
+    return results
+
+def compare(results, baseline, threshold):
+    """Regressions against a baseline, as printable strings"""
+    regressions = []
+    for name, now in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if now["ops_per_sec"] < before["ops_per_sec"] * (1 - threshold):
+            regressions.append(
+                f"{name}: {now['ops_per_sec']:.0f} ops/s, baseline {before['ops_per_sec']:.0f}")
+        if "bytes_per_op" in now and "bytes_per_op" in before:
+            if now["bytes_per_op"] > before["bytes_per_op"] * (1 + threshold) + 1:
+                regressions.append(
+                    f"{name}: {now['bytes_per_op']:.0f} bytes/op, baseline {before['bytes_per_op']:.0f}")
+    return regressions
+
+def report(results, baseline=None):
+    """Print the results table"""
+    print(f"{'case':<22} {'ops/s':>10} {'us/op':>10} {'bytes/op':>10} {'writes':>7} {'alloc B':>9} {'vs base':>8}")
+    for name, r in results.items():
+        change = ""
+        if baseline and name in baseline:
+            change = f"{r['ops_per_sec'] / baseline[name]['ops_per_sec'] - 1:+.0%}"
+        print(f"{name:<22} {r['ops_per_sec']:>10.0f} {r['us_per_op']:>10.1f} "
+              f"{r.get('bytes_per_op', 0):>10.0f} {r.get('writes_per_op', 0):>7.1f} "
+              f"{r.get('alloc_bytes_per_op', 0):>9.0f} {change:>8}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless WHOIS JULIUS benchmarks")
+    parser.add_argument("--size", default="120x40", help="fake terminal COLSxROWS")
+    parser.add_argument("--quick", action="store_true", help="short runs for a smoke test")
+    parser.add_argument("--only", help="run only cases whose name contains this")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="allowed relative slowdown or byte growth")
+    args = parser.parse_args()
+
+    cols, rows = (int(v) for v in args.size.lower().split("x"))
+    duration = 0.2 if args.quick else 1.0
+    startup_runs = 3 if args.quick else 10
+
+    results = run_suite(cols, rows, duration, startup_runs, args.only)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    report(results, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "size": [cols, rows],
+                "results": results,
+            }, f, indent=2)
+
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
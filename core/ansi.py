@@ -0,0 +1,306 @@
+"""Minimal ANSI output
+
+Two encoders that send only what the terminal doesn't already show:
+
+* ``SgrCompactor`` / ``compact_sgr`` rewrite text containing SGR color
+  escapes so it only changes attributes when the next visible character
+  needs it, e.g. ``GREEN a RESET GREEN b RESET`` becomes
+  ``GREEN ab RESET``.
+* ``ScreenEncoder`` keeps a copy of a cell grid as last sent and turns the
+  next grid into cursor jumps, attribute transitions and the changed
+  characters only. Runs of blanks are erased with ECH or EL instead of
+  spaces.
+
+Attribute state is tracked per field (intensity, underline, colors, ...),
+so a transition uses the shortest of the individual off/on codes and a
+full reset.
+"""
+
+# State fields in a fixed order, see parse_sgr()
+FIELDS = ('intensity', 'italic', 'underline', 'blink', 'reverse', 'strike', 'fg', 'bg')
+DEFAULT = (0, 0, 0, 0, 0, 0, None, None)
+INTENSITY, ITALIC, UNDERLINE, BLINK, REVERSE, STRIKE, FG, BG = range(len(FIELDS))
+
+# code -> (field, value) for the simple on/off attributes
+FLAGS = {
+    '1': (INTENSITY, 1), '2': (INTENSITY, 2), '22': (INTENSITY, 0),
+    '3': (ITALIC, 1), '23': (ITALIC, 0),
+    '4': (UNDERLINE, 1), '24': (UNDERLINE, 0),
+    '5': (BLINK, 1), '25': (BLINK, 0),
+    '7': (REVERSE, 1), '27': (REVERSE, 0),
+    '9': (STRIKE, 1), '29': (STRIKE, 0),
+}
+ON_CODES = {(field, value): code for code, (field, value) in FLAGS.items() if value}
+OFF_CODES = {INTENSITY: '22', ITALIC: '23', UNDERLINE: '24', BLINK: '25',
+             REVERSE: '27', STRIKE: '29', FG: '39', BG: '49'}
+
+def parse_sgr(params, state=DEFAULT):
+    """State after applying the parameters of one SGR sequence"""
+    state = list(state)
+    codes = params.split(';') if params else ['0']
+    i = 0
+    while i < len(codes):
+        code = codes[i] or '0'
+        if code == '0':
+            state = list(DEFAULT)
+        elif code in FLAGS:
+            field, value = FLAGS[code]
+            state[field] = value
+        elif code in ('38', '48'):
+            # Extended colors: 38;5;n or 38;2;r;g;b
+            size = 3 if codes[i + 1:i + 2] == ['5'] else 5
+            state[FG if code == '38' else BG] = ';'.join(codes[i:i + size])
+            i += size - 1
+        elif code == '39':
+            state[FG] = None
+        elif code == '49':
+            state[BG] = None
+        elif code.isdigit():
+            number = int(code)
+            if 30 <= number <= 37 or 90 <= number <= 97:
+                state[FG] = code
+            elif 40 <= number <= 47 or 100 <= number <= 107:
+                state[BG] = code
+        i += 1
+    return tuple(state)
+
+_transitions = {}
+
+def transition(old, new):
+    """Shortest SGR sequence that turns state old into state new, '' if equal"""
+    if old == new:
+        return ''
+    key = (old, new)
+    sequence = _transitions.get(key)
+    if sequence is None:
+        delta = []
+        for field in range(len(FIELDS)):
+            if old[field] != new[field]:
+                if not new[field]:
+                    delta.append(OFF_CODES[field])
+                elif field >= FG:
+                    delta.append(new[field])
+                else:
+                    if old[field]:
+                        delta.append(OFF_CODES[field])  # bold to dim needs 22 first
+                    delta.append(ON_CODES[(field, new[field])])
+        reset = ['0'] + [new[field] if field >= FG else ON_CODES[(field, new[field])]
+                         for field in range(len(FIELDS)) if new[field]]
+        if new == DEFAULT:
+            reset = ['']
+        params = min(delta, reset, key=lambda codes: len(';'.join(codes)))
+        sequence = _transitions[key] = f"\033[{';'.join(params)}m"
+    return sequence
+
+def blank_safe(state):
+    """True if a space looks the same under state as with no attributes"""
+    return not (state[UNDERLINE] or state[REVERSE] or state[STRIKE] or state[BG])
+
+def scan_csi(text, start):
+    """(params, final byte, end) of the CSI sequence at start, None if incomplete"""
+    end = start + 2
+    length = len(text)
+    while end < length and text[end] in '0123456789;?':
+        end += 1
+    if end < length and '@' <= text[end] <= '~':
+        return text[start + 2:end], text[end], end + 1
+    return None
+
+class SgrCompactor:
+    """Removes redundant SGR sequences from a stream of text fragments
+
+    Attribute changes are held back until a character that shows them is
+    written, so resets between fragments of the same color vanish. Spaces
+    and line breaks don't force a change unless the state has a
+    background, underline, reverse or strike. The state carries over from
+    one feed() to the next; sync() catches the terminal up with it.
+    """
+
+    def __init__(self):
+        self.emitted = DEFAULT  # what the terminal is set to
+        self.wanted = DEFAULT   # what the text asked for so far
+
+    def feed(self, text):
+        """Compacted text, possibly leaving an attribute change pending"""
+        if '\033[' not in text:
+            if not text or self.emitted == self.wanted:
+                return text
+            out = []
+            self.put(out, text)
+            return ''.join(out)
+        out = []
+        pos = 0
+        while True:
+            esc = text.find('\033[', pos)
+            if esc < 0:
+                break
+            sequence = scan_csi(text, esc)
+            if sequence is None:
+                break
+            params, final, end = sequence
+            if esc > pos:
+                self.put(out, text[pos:esc])
+            if final == 'm':
+                self.wanted = parse_sgr(params, self.wanted)
+            else:
+                if final in 'JKX' and self.emitted[BG] != self.wanted[BG]:
+                    out.append(self.sync())  # erasing fills with the current background
+                out.append(text[esc:end])
+            pos = end
+        if pos < len(text):
+            self.put(out, text[pos:])
+        return ''.join(out)
+
+    def put(self, out, chunk):
+        """Append chunk, switching attributes before its first visible character"""
+        emitted, wanted = self.emitted, self.wanted
+        if emitted != wanted:
+            if blank_safe(emitted) and blank_safe(wanted):
+                visible = len(chunk) - len(chunk.lstrip(' \r\n'))
+                if visible == len(chunk):
+                    out.append(chunk)
+                    return
+                out.append(chunk[:visible])
+                chunk = chunk[visible:]
+            out.append(transition(emitted, wanted))
+            self.emitted = wanted
+        out.append(chunk)
+
+    def sync(self):
+        """Escape that applies a pending attribute change, '' if none is pending"""
+        sequence = transition(self.emitted, self.wanted)
+        self.emitted = self.wanted
+        return sequence
+
+    def reset(self):
+        """Assume the terminal is back to default attributes"""
+        self.emitted = self.wanted = DEFAULT
+
+def compact_sgr(text):
+    """text with redundant SGR sequences removed, looking the same on screen"""
+    if '\033[' not in text:
+        return text
+    compactor = SgrCompactor()
+    return compactor.feed(text) + compactor.sync()
+
+def style(sgr):
+    """Attribute state for an SGR escape like '\\033[1;32m' or its bare parameters"""
+    if sgr.startswith('\033['):
+        sgr = sgr[2:-1]
+    return parse_sgr(sgr)
+
+class ScreenEncoder:
+    """Diffs cell grids against what was last sent to the terminal
+
+    A cell is a (state, char) tuple, state as returned by style(). Blank
+    cells must use the same (DEFAULT, ' ') value as ``BLANK`` to be
+    recognised as blanks. Grids are lists of rows of cells, drawn with
+    their top left corner at (left, top), both 1-based.
+    """
+
+    BLANK = (DEFAULT, ' ')
+    MIN_ERASE = 8  # shorter blank runs are cheaper as spaces
+
+    def __init__(self, cols, rows, top=1, left=1):
+        self.cols = cols
+        self.rows = rows
+        self.top = top
+        self.left = left
+        self.front = None
+
+    def invalidate(self, cols=None, rows=None):
+        """Forget the screen contents, the next frame clears and repaints"""
+        self.cols = cols or self.cols
+        self.rows = rows or self.rows
+        self.front = None
+
+    def encode(self, grid, positions=None):
+        """Escape sequences that turn the screen into grid
+
+        positions optionally lists the packed cells (y * cols + x) that may
+        have changed, in any order; without it every row is compared.
+        """
+        out = []
+        blank = self.BLANK
+        cols = self.cols
+        if self.front is None:
+            out.append("\033[H\033[2J")
+            self.front = [[blank] * cols for _ in range(self.rows)]
+            positions = None
+        front = self.front
+
+        if positions is None:
+            changed = []
+            for y, row in enumerate(grid):
+                old = front[y]
+                if row != old:
+                    changed.extend(y * cols + x for x in range(cols) if row[x] != old[x])
+        else:
+            changed = []
+            for p in sorted(set(positions)):
+                y, x = divmod(p, cols)
+                if grid[y][x] != front[y][x]:
+                    changed.append(p)
+
+        state = DEFAULT
+        cx = cy = -1  # cursor position unknown
+        i = 0
+        count = len(changed)
+        while i < count:
+            y, x = divmod(changed[i], cols)
+            cell = grid[y][x]
+
+            # Run of changed blanks: erase it in one go if that is shorter
+            if cell is blank or cell == blank:
+                j = i + 1
+                while (j < count and changed[j] == changed[j - 1] + 1 and changed[j] // cols == y
+                       and grid[y][changed[j] % cols] == blank):
+                    j += 1
+                run = j - i
+                if run >= self.MIN_ERASE:
+                    out.append(self.move(cx, cy, x, y, state))
+                    if not blank_safe(state):
+                        out.append(transition(state, DEFAULT))
+                        state = DEFAULT
+                    row_end = x + run == cols or all(c == blank for c in grid[y][x + run:])
+                    out.append("\033[K" if row_end else f"\033[{run}X")
+                    for k in range(x, x + run):
+                        front[y][k] = blank
+                    if row_end:
+                        for k in range(x + run, cols):
+                            front[y][k] = blank
+                        while j < count and changed[j] // cols == y:
+                            j += 1
+                    cx, cy = x, y  # erasing doesn't move the cursor
+                    i = j
+                    continue
+
+            if cx != x or cy != y:
+                out.append(self.move(cx, cy, x, y, state))
+            cell_state, char = cell
+            if cell_state != state and not (char == ' ' and blank_safe(state) and blank_safe(cell_state)):
+                out.append(transition(state, cell_state))
+                state = cell_state
+            out.append(char)
+            front[y][x] = cell
+            cx, cy = x + 1, y
+            i += 1
+
+        out.append(transition(state, DEFAULT))
+        return ''.join(out)
+
+    def move(self, cx, cy, x, y, state):
+        """Cheapest way from the cursor at (cx, cy) to (x, y)"""
+        if cy == y and 0 < x - cx:
+            gap = x - cx
+            if gap < 4:
+                # Rewriting what the screen already shows is shorter than a jump
+                cells = self.front[y][cx:x]
+                safe = blank_safe(state)
+                for c in cells:
+                    if c[0] != state and not (c[1] == ' ' and safe and blank_safe(c[0])):
+                        break
+                else:
+                    return ''.join([c[1] for c in cells])
+            return f"\033[{gap}C"
+        return f"\033[{y + self.top};{x + self.left}H"
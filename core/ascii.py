@@ -1,14 +1,13 @@
 """ASCII art for WHOIS JULIUS"""
 
+import io
 from utils import print_colored, Colors
-import random
+from ansi import compact_sgr
 
-def show_ascii_art():
-    """Display random ASCII art"""
-    arts = [
-        {
-            "name": "Code",
-            "art": """
+ARTS = [
+    {
+        "name": "Code",
+        "art": """
     < / >
    /     \\
   / () () \\
@@ -16,11 +15,11 @@ def show_ascii_art():
    |  o  |
    \\___/
             """,
-            "color": Colors.GREEN
-        },
-        {
-            "name": "Terminal",
-            "art": """
+        "color": Colors.GREEN
+    },
+    {
+        "name": "Terminal",
+        "art": """
  ╔════════════════════╗
  ║ ▓▓▓▓▓▓▓▓▓▓▓▓▓▓▓▓▓▓ ║
  ║ ░░░░░░░░░░░░░░░░░░ ║
@@ -28,21 +27,33 @@ def show_ascii_art():
  ║ $ _                ║
  ╚════════════════════╝
             """,
-            "color": Colors.CYAN
-        },
-        {
-            "name": "Binary",
-            "art": """
+        "color": Colors.CYAN
+    },
+    {
+        "name": "Binary",
+        "art": """
  01001010 01010101 01001100
  01001001 01010101 01010011
  
  01000100 01010101 01000100
  01000101 01001110
             """,
-            "color": Colors.BLUE
-        }
-    ]
-    
-    selected = random.choice(arts)
-    print_colored(f"\n=== {selected['name']} ===", Colors.YELLOW)
-    print_colored(selected['art'], selected['color'])
+        "color": Colors.BLUE
+    }
+]
+
+_rendered = None
+
+def render_art(art):
+    """One art piece with its header, as the escape sequences to print"""
+    buffer = io.StringIO()
+    print_colored(f"\n=== {art['name']} ===", Colors.YELLOW, file=buffer)
+    print_colored(art['art'], art['color'], file=buffer)
+    return compact_sgr(buffer.getvalue())
+
+def render_arts():
+    """Every art piece rendered, built once per process"""
+    global _rendered
+    if _rendered is None:
+        _rendered = [render_art(art) for art in ARTS]
+    return _rendered
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Precompiled content bundle
+
+All of data/ plus the ASCII art, parsed and pre-rendered into one file
+(``data/content.bundle``) that the app maps into memory:
+
+    header   magic, format version, record count
+    index    per record: kind, offset, length and the (mtime, size) of the
+             source file it was built from, followed by its name and variant
+    payload  UTF-8 record bodies
+
+Records are only decoded when asked for, straight from the mapping, and
+every process that maps the file shares the same page cache pages. A
+record whose source file changed since the build is ignored and the
+caller falls back to the loose file, so a stale bundle is never wrong,
+only slower. Rebuild with:
+
+    python3 core/bundle.py [--if-stale]
+"""
+
+import os
+import struct
+import sys
+
+MAGIC = b"WJBUNDLE"
+VERSION = 1
+HEADER = struct.Struct("<8sII")  # magic, version, record count
+ENTRY = struct.Struct("<BHHQQqQ")  # kind, name len, variant len, offset, length, mtime_ns, size
+
+# Record kinds
+TEXT = 0   # a str
+LINES = 1  # a list of str, stored NUL-separated
+
+BUNDLE_NAME = "content.bundle"
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PATH = os.path.join(BASE_PATH, "data", BUNDLE_NAME)
+
+class ContentBundle:
+    """Read-only view of a bundle file, mapped on first use"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.map = None
+        self.index = None  # (name, variant) -> (kind, offset, length, signature)
+
+    def open(self):
+        """Map the file and read its index, False if it is missing or unusable"""
+        if self.index is not None:
+            return bool(self.index)
+        self.index = {}
+        try:
+            import mmap
+            with open(self.path, 'rb') as f:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return False
+        try:
+            self.index = self.read_index(memoryview(self.map))
+        except (struct.error, UnicodeDecodeError, ValueError):
+            self.index = {}
+        return bool(self.index)
+
+    @staticmethod
+    def read_index(view):
+        """Parse the header and index of a bundle"""
+        magic, version, count = HEADER.unpack_from(view, 0)
+        if magic != MAGIC or version != VERSION:
+            return {}
+        index = {}
+        pos = HEADER.size
+        for _ in range(count):
+            kind, name_len, variant_len, offset, length, mtime_ns, size = ENTRY.unpack_from(view, pos)
+            pos += ENTRY.size
+            name = bytes(view[pos:pos + name_len]).decode('utf-8')
+            pos += name_len
+            variant = bytes(view[pos:pos + variant_len]).decode('utf-8') or None
+            pos += variant_len
+            if offset + length > len(view):
+                raise ValueError("truncated bundle")
+            index[(name, variant)] = (kind, offset, length, (mtime_ns, size))
+        return index
+
+    def view(self, name, variant=None, signature=None):
+        """Zero-copy bytes of a record, None if missing or built from another source version"""
+        if not self.open():
+            return None
+        entry = self.index.get((name, variant))
+        if entry is None or (signature is not None and entry[3] != signature):
+            return None
+        _kind, offset, length, _signature = entry
+        return memoryview(self.map)[offset:offset + length]
+
+    def get(self, name, variant=None, signature=None):
+        """Decoded record value, None if it can't be used"""
+        data = self.view(name, variant, signature)
+        if data is None:
+            return None
+        text = str(data, 'utf-8')
+        if self.index[(name, variant)][0] == LINES:
+            return text.split('\0') if text else []
+        return text
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+        self.map = None
+        self.index = None
+
+_shared = {}
+
+def shared_bundle(path=DEFAULT_PATH):
+    """The process-wide bundle for a path, mapped lazily"""
+    if path not in _shared:
+        _shared[path] = ContentBundle(path)
+    return _shared[path]
+
+def signature_of(path):
+    """(mtime_ns, size) of a source file, as stored in the index"""
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+def records():
+    """(name, variant, source path, loader) for everything bundled"""
+    core_path = os.path.join(BASE_PATH, "core")
+    if core_path not in sys.path:
+        sys.path.insert(0, core_path)
+    from commands import CommandDispatcher
+    return CommandDispatcher(interactive=False).bundled()
+
+def build(path=DEFAULT_PATH):
+    """Compile every record into a new bundle file, returns the record count"""
+    entries = []
+    payload = bytearray()
+    for name, variant, source, loader in records():
+        if not os.path.exists(source):
+            continue
+        signature = signature_of(source)
+        value = loader(source)
+        if isinstance(value, list):
+            kind, body = LINES, '\0'.join(value).encode('utf-8')
+        else:
+            kind, body = TEXT, value.encode('utf-8')
+        entries.append((kind, name.encode('utf-8'), (variant or "").encode('utf-8'),
+                        len(payload), len(body), signature))
+        payload += body
+
+    index_size = HEADER.size + sum(ENTRY.size + len(n) + len(v) for _, n, v, *_ in entries)
+    out = bytearray(HEADER.pack(MAGIC, VERSION, len(entries)))
+    for kind, name, variant, offset, length, (mtime_ns, size) in entries:
+        out += ENTRY.pack(kind, len(name), len(variant), index_size + offset, length, mtime_ns, size)
+        out += name + variant
+    out += payload
+
+    # Readers may have the old file mapped, so replace it instead of rewriting it
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(out)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(entries)
+
+def is_stale(path=DEFAULT_PATH):
+    """True if the bundle is missing or any source changed since it was built"""
+    bundle = ContentBundle(path)
+    try:
+        if not bundle.open():
+            return True
+        sources = {}
+        for name, variant, source, _loader in records():
+            if os.path.exists(source):
+                sources[(name, variant)] = signature_of(source)
+        return sources != {key: entry[3] for key, entry in bundle.index.items()}
+    finally:
+        bundle.close()
+
+def main():
+    if "--if-stale" in sys.argv and not is_stale():
+        return
+    count = build()
+    if "--quiet" not in sys.argv:
+        print(f"wrote {count} records to {os.path.relpath(DEFAULT_PATH)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Content cache for the files in data/"""
+
+import os
+import time
+from bundle import shared_bundle, BUNDLE_NAME
+
+class ContentCache:
+    """Parsed and pre-rendered data files, validated by mtime and size
+
+    Each entry remembers the (mtime, size) of the file it was built from.
+    A lookup stats the file at most once per check_interval seconds and
+    only re-runs the loader when the file actually changed, so repeat
+    commands cost no file I/O and no parsing. Before running the loader
+    it asks the content bundle, if any, for a record built from the same
+    file version.
+    """
+
+    def __init__(self, data_path, check_interval=1.0, bundle=None):
+        self.data_path = data_path
+        self.check_interval = check_interval
+        self.bundle = bundle
+        self.entries = {}  # key -> [signature, checked_at, value]
+        self.hits = 0
+        self.misses = 0
+        self.bundled = 0
+
+    def get(self, name, loader, variant=None, path=None):
+        """Value built by loader(path) for data file name, None if it is missing
+
+        variant separates several cached views of the same file, e.g. the
+        parsed data and its rendered output. path overrides the location
+        for content that doesn't live in data/.
+        """
+        key = (name, variant)
+        entry = self.entries.get(key)
+        now = time.monotonic()
+        if entry is not None and now - entry[1] < self.check_interval:
+            self.hits += 1
+            return entry[2]
+
+        path = path or os.path.join(self.data_path, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.entries.pop(key, None)
+            return None
+        signature = (st.st_mtime_ns, st.st_size)
+
+        if entry is not None and entry[0] == signature:
+            entry[1] = now
+            self.hits += 1
+            return entry[2]
+
+        value = None
+        if self.bundle is not None:
+            value = self.bundle.get(name, variant, signature)
+        if value is not None:
+            self.bundled += 1
+        else:
+            self.misses += 1
+            value = loader(path)
+        self.entries[key] = [signature, now, value]
+        return value
+
+    def clear(self):
+        """Drop every entry"""
+        self.entries.clear()
+
+    def stats(self):
+        """Hit and miss counters"""
+        return {"hits": self.hits, "misses": self.misses, "bundled": self.bundled,
+                "entries": len(self.entries)}
+
+_shared = {}
+
+def shared_cache(data_path):
+    """The process-wide cache for a data directory, backed by its content bundle"""
+    if data_path not in _shared:
+        bundle = shared_bundle(os.path.join(data_path, BUNDLE_NAME))
+        _shared[data_path] = ContentCache(data_path, bundle=bundle)
+    return _shared[data_path]
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""Session recording and playback in asciicast v2 format
+
+A CastWriter taps the shared TerminalWriter: everything the shell and
+the games send to the terminal becomes an output event in an asciicast
+file that asciinema and its web player understand. Events are encoded
+into a buffer of at most BUFFER_SIZE bytes that goes to disk in one
+write whenever it fills up, so a recording costs the same memory after
+an hour as after a second.
+
+CastPlayer plays a recording back without loading it: events are read
+line by line as they become due, so even huge recordings start at once.
+While reading it remembers where the screen was cleared, and a seek
+replays only the output since the last clear before the target (at most
+SEEK_WINDOW bytes of it) in a single write. Long pauses are shortened
+to idle_limit seconds.
+
+    python3 core/cast.py FILE [--speed 2] [--idle 1]
+"""
+
+import codecs
+import json
+import os
+import sys
+import time
+from bisect import bisect_right
+from collections import deque
+
+# Platform-specific imports
+if sys.platform != 'win32':
+    import termios
+
+CLEAR = "\033[2J"
+
+def terminal_size(fd):
+    """(cols, rows) of the terminal on fd, 80x24 if there is none"""
+    try:
+        size = os.get_terminal_size(fd)
+    except (OSError, TypeError, ValueError):
+        return 80, 24
+    return size.columns, size.lines
+
+def translates_newlines(fd):
+    """True if the terminal on fd turns \\n into \\r\\n on output"""
+    if fd is None:
+        return False
+    if sys.platform == 'win32':
+        return True
+    try:
+        oflag = termios.tcgetattr(fd)[1]
+    except termios.error:
+        return False
+    return bool(oflag & termios.OPOST and oflag & termios.ONLCR)
+
+class CastWriter:
+    """Streams terminal output to an asciicast v2 file through a bounded buffer
+
+    geometry is the games' shared TerminalGeometry: its SIGWINCH handler
+    keeps the size current, so a write only compares two tuples.
+    """
+
+    BUFFER_SIZE = 64 * 1024
+
+    def __init__(self, path, fd=None, title=None, buffer_size=None, geometry=None):
+        self.path = path
+        self.fd = fd
+        self.geometry = geometry
+        self.buffer_size = buffer_size or self.BUFFER_SIZE
+        self.file = open(path, 'wb')
+        self.buffer = bytearray()
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.size = geometry.size if geometry is not None else terminal_size(fd)
+        # Read once: the games' raw mode turns it off, but they end lines with \r\n
+        self.translate = translates_newlines(fd)
+        self.start = time.monotonic()
+        self.events = 0
+        header = {
+            "version": 2,
+            "width": self.size[0],
+            "height": self.size[1],
+            "timestamp": int(time.time()),
+            "env": {"TERM": os.environ.get("TERM", ""), "SHELL": os.environ.get("SHELL", "")},
+        }
+        if title:
+            header["title"] = title
+        self.buffer += json.dumps(header).encode() + b"\n"
+
+    def output(self, data):
+        """Record bytes or text that reached the terminal"""
+        if isinstance(data, (bytes, bytearray)):
+            data = self.decoder.decode(data)
+        if not data:
+            return
+        if self.geometry is not None and self.geometry.size != self.size:
+            self.size = self.geometry.size
+            self.event("r", f"{self.size[0]}x{self.size[1]}")
+        if self.translate:
+            # Record what the terminal showed, not what was written
+            data = data.replace("\r\n", "\n").replace("\n", "\r\n")
+        self.event("o", data)
+
+    def event(self, kind, data):
+        """Append one event, writing the buffer out once it is full"""
+        line = json.dumps([round(time.monotonic() - self.start, 6), kind, data], ensure_ascii=False)
+        self.buffer += line.encode() + b"\n"
+        self.events += 1
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Write buffered events to disk"""
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+def start_recording(path, stream=None, title=None):
+    """Record everything stream (the shared TerminalWriter) sends from now on"""
+    stream = stream or sys.stdout
+    stream.flush()
+    try:
+        fd = stream.fileno()
+    except (AttributeError, OSError, ValueError):
+        fd = None
+    if fd is not None and not os.isatty(fd):
+        fd = None
+    geometry = None
+    if fd is not None:
+        from commands import load_game
+        geometry = load_game("_geometry").terminal_geometry()
+    stream.recorder = CastWriter(path, fd=fd, title=title, geometry=geometry)
+    return stream.recorder
+
+def stop_recording(stream=None):
+    """Finish the current recording, returns its CastWriter or None"""
+    stream = stream or sys.stdout
+    recorder = getattr(stream, "recorder", None)
+    if recorder is not None:
+        stream.flush()
+        stream.recorder = None
+        recorder.close()
+    return recorder
+
+class CastReader:
+    """Reads the events of an asciicast v2 file lazily, from any offset
+
+    clears lists (time, offset) of every output event seen so far that
+    clears the screen, in file order, so seeks can start there.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        first = self.file.readline()
+        try:
+            self.header = json.loads(first)
+        except ValueError:
+            self.header = None
+        if not isinstance(self.header, dict) or self.header.get("version") != 2:
+            self.file.close()
+            raise ValueError(f"{path} is not an asciicast v2 recording")
+        self.start = len(first)  # offset of the first event
+        self.clears = []
+        self.indexed = self.start  # clears before this offset are known
+
+    def events(self, offset=None):
+        """Yield (time, kind, data, offset) from offset on, the first event by default"""
+        offset = self.start if offset is None else offset
+        self.file.seek(offset)
+        for line in self.file:
+            start = offset
+            offset += len(line)
+            try:
+                t, kind, data = json.loads(line)
+            except ValueError:
+                continue  # blank or cut off, e.g. a recording still being written
+            if start >= self.indexed:
+                if kind == "o" and CLEAR in data:
+                    self.clears.append((t, start))
+                self.indexed = offset
+            yield t, kind, data, start
+
+    def clear_before(self, t):
+        """Offset of the last known screen clear at or before time t, None if there is none"""
+        i = bisect_right(self.clears, (t, float('inf')))
+        return self.clears[i - 1][1] if i else None
+
+    def close(self):
+        self.file.close()
+
+class CastPlayer:
+    """Plays a recording to a terminal, with pause, seek and speed keys"""
+
+    SEEK_WINDOW = 1024 * 1024  # bytes of output replayed at most to reach a seek target
+    SPEEDS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0)
+    KEYS_HELP = "space pause, ←/→ 5s, ↓/↑ 1min, +/- speed, q quit"
+
+    def __init__(self, path, out=None, keys=None, speed=1.0, idle_limit=None):
+        self.reader = CastReader(path)
+        self.out = out or sys.stdout
+        self.keys = keys  # KeyReader, None plays straight through
+        self.speed = speed
+        if idle_limit is None:
+            idle_limit = self.reader.header.get("idle_time_limit", 2.0)
+        self.idle_limit = idle_limit  # longest pause played, 0 keeps them all
+        self.paused = False
+        self.left = 0.0  # time to the next event when paused
+        self.position = 0.0  # recording time of the last event shown
+        self.pending = None  # event read past a seek target, shown next
+        self.stream = self.reader.events()
+
+    def next_event(self):
+        """The next event due, None at the end of the recording"""
+        if self.pending is not None:
+            event, self.pending = self.pending, None
+            return event
+        return next(self.stream, None)
+
+    def play(self):
+        """Play until the end of the recording or until quit, returns the time reached"""
+        due = time.monotonic()
+        while True:
+            event = self.next_event()
+            if event is None:
+                break
+            t, kind, data, _offset = event
+            if kind != "o":
+                continue
+            gap = max(0.0, t - self.position)
+            if self.idle_limit:
+                gap = min(gap, self.idle_limit)
+            due += gap / self.speed
+            action, due = self.wait(due)
+            if action == "quit":
+                break
+            if action is not None:
+                self.pending = event
+                self.seek(self.position + action)
+                due = time.monotonic()
+                continue
+            self.write(data)
+            self.position = t
+        return self.position
+
+    def wait(self, due):
+        """Handle keys until due, returns (action, due) with action None, "quit" or a seek offset"""
+        if self.keys is None:
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            return None, due
+        while True:
+            now = time.monotonic()
+            if not self.paused and now >= due:
+                return None, due
+            for key in self.keys.wait(0.5 if self.paused else due - now):
+                if key in ('q', 'Q', 'ESC', '\x03'):
+                    return "quit", due
+                if key == ' ':
+                    # Keep the time left until the next event across the pause
+                    if self.paused:
+                        due = time.monotonic() + self.left
+                    else:
+                        self.left = max(0.0, due - time.monotonic())
+                    self.paused = not self.paused
+                elif key in ('+', '='):
+                    self.set_speed(1)
+                elif key == '-':
+                    self.set_speed(-1)
+                elif key in ('RIGHT', 'LEFT', 'UP', 'DOWN'):
+                    self.paused = False
+                    return {'RIGHT': 5, 'LEFT': -5, 'UP': 60, 'DOWN': -60}[key], due
+
+    def set_speed(self, step):
+        """Move one step along SPEEDS"""
+        speeds = self.SPEEDS
+        i = min(range(len(speeds)), key=lambda n: abs(speeds[n] - self.speed))
+        self.speed = speeds[max(0, min(len(speeds) - 1, i + step))]
+
+    def seek(self, target):
+        """Show the screen as it was at recording time target"""
+        target = max(0.0, target)
+        backward = target < self.position
+        if backward:
+            offset = self.reader.clear_before(target)
+            self.stream = self.reader.events(offset)
+            self.pending = None
+        # Only the output since the last clear matters, and only so much of it
+        tail = deque()
+        size = 0
+        cut = backward  # the screen shows a later state, start from a blank one
+        reached = None
+        while True:
+            event = self.next_event()
+            if event is None:
+                break
+            t, kind, data, _offset = event
+            if t > target:
+                self.pending = event
+                break
+            reached = t
+            if kind != "o":
+                continue
+            if CLEAR in data:
+                tail.clear()
+                size = 0
+                cut = False
+            tail.append(data)
+            size += len(data)
+            while size > self.SEEK_WINDOW and len(tail) > 1:
+                size -= len(tail.popleft())
+                cut = True
+        self.write(("\033[0m\033[H\033[2J" if cut else "") + "".join(tail))
+        if self.pending is not None:
+            self.position = target
+        elif reached is not None:
+            self.position = reached
+
+    def write(self, data):
+        out = self.out
+        out.write(data)
+        out.flush()
+
+    def close(self):
+        self.reader.close()
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__.strip().splitlines()[-1].strip())
+        sys.exit(2)
+    speed = float(sys.argv[sys.argv.index("--speed") + 1]) if "--speed" in sys.argv else 1.0
+    idle = float(sys.argv[sys.argv.index("--idle") + 1]) if "--idle" in sys.argv else None
+    from commands import load_game
+    keys = load_game("_input").KeyReader()
+    player = CastPlayer(sys.argv[1], keys=keys, speed=speed, idle_limit=idle)
+    try:
+        with keys.raw():
+            player.play()
+    except (KeyboardInterrupt, EOFError):
+        pass
+    finally:
+        player.close()
+        sys.stdout.write("\033[0m\033[?25h\n")
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,68 @@
 """Command dispatcher for WHOIS JULIUS"""
 
-import json
-import random
+import io
 import os
-from pathlib import Path
-from utils import print_colored, Colors, typewriter_effect
-from ascii import show_ascii_art
+import sys
+import time
+from functools import partial
+from utils import print_colored, Colors, typewriter_effect, batched
+from ansi import compact_sgr
+from cache import shared_cache
+from metrics import METRICS
+
+# Heavier modules (json, random, the games) are imported on first use to
+# keep the prompt quick to appear.
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GAMES_PATH = os.path.join(BASE_PATH, "games")
+ASCII_PATH = os.path.join(BASE_PATH, "core", "ascii.py")
+
+_discovered = {}
+
+def discover_games(games_path=GAMES_PATH):
+    """Names of the game modules in games/, without importing them
+
+    Every games/<name>.py becomes the command <name>; modules starting
+    with an underscore are helpers and are skipped. Whether a module
+    defines GAME is only checked when its command runs (launch_game).
+    """
+    if games_path not in _discovered:
+        try:
+            files = os.listdir(games_path)
+        except OSError:
+            files = []
+        _discovered[games_path] = sorted(
+            name[:-3] for name in files
+            if name.endswith(".py") and not name.startswith("_"))
+    return _discovered[games_path]
+
+def load_game(name, games_path=GAMES_PATH):
+    """Import a game module on first use, later calls reuse it
+
+    games_path goes to the end of sys.path, so a game can never shadow a
+    standard library or core module of the same name.
+    """
+    import importlib
+    if games_path not in sys.path:
+        sys.path.append(games_path)
+    return importlib.import_module(name)
 
 class CommandDispatcher:
-    def __init__(self):
-        self.base_path = Path(__file__).parent.parent
-        self.data_path = self.base_path / "data"
-        
-    def execute(self, command):
-        """Execute a given command"""
+    QUOTE_MATCHES = 10  # quotes listed per search
+
+    def __init__(self, out=None, interactive=True, cache=None):
+        self.base_path = BASE_PATH
+        self.data_path = os.path.join(self.base_path, "data")
+        self.games_path = GAMES_PATH
+        # Network sessions pass their own stream and can't run the games
+        self.out = out
+        self.interactive = interactive
+        # Parsed and rendered data files, shared by every dispatcher in the process
+        self.cache = cache or shared_cache(self.data_path)
+        self.commands = self.build_registry()
+
+    def build_registry(self):
+        """Map command names to handlers, built once per dispatcher"""
         commands = {
             "help": self.show_help,
             "cv": self.show_cv,
@@ -23,13 +72,127 @@ class CommandDispatcher:
             "asciiart": self.show_ascii,
             "snake": self.play_snake,
             "matrix": self.show_matrix,
+            "stats": self.show_stats,
+            "record": self.show_record,
+            "replay": self.show_replay,
         }
+        # Commands that take the rest of the line as an argument
+        self.with_args = {"quote", "stats", "record", "replay"}
+        # Commands that draw frame by frame like the games
+        self.live = {"replay"}
+        # Plugin games dropped into games/
+        self.games = {"snake", "matrix"}
+        for name in discover_games(self.games_path):
+            commands.setdefault(name, partial(self.launch_game, name, name.capitalize()))
+            self.games.add(name)
+        return commands
+
+    def bundled(self):
+        """(name, variant, path, loader) of every cache entry worth precompiling
+
+        core/bundle.py builds data/content.bundle from this list; show_*
+        must look the entries up with the same name and variant.
+        """
+        data = self.data_path
+        return [
+            ("cv.txt", None, os.path.join(data, "cv.txt"), self.read_cv),
+            ("projects.json", "rendered", os.path.join(data, "projects.json"), self.render_projects),
+            ("contact.json", "rendered", os.path.join(data, "contact.json"), self.render_contact),
+            ("ascii.py", "rendered", ASCII_PATH, self.render_arts),
+        ]
+
+    def write(self, text):
+        """Write pre-rendered output"""
+        (self.out or sys.stdout).write(text)
+
+    @staticmethod
+    def render(draw):
+        """Capture what draw(file) prints as a string, with redundant colors removed"""
+        buffer = io.StringIO()
+        draw(buffer)
+        return compact_sgr(buffer.getvalue())
+
+    @staticmethod
+    def read_json(path):
+        """Parse a JSON file"""
+        import json
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def open_quotes(path):
+        """Indexed quote store, see core/quotes.py"""
+        from quotes import QuoteStore
+        return QuoteStore(path)
+
+    @staticmethod
+    def read_cv(path):
+        """Text of the CV file"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except UnicodeDecodeError:
+            # Fallback to latin-1 if UTF-8 fails
+            with open(path, 'r', encoding='latin-1') as f:
+                return f.read()
+
+    @staticmethod
+    def render_arts(path):
+        """Rendered ASCII art pieces"""
+        from ascii import render_arts
+        return render_arts()
+
+    def render_projects(self, path):
+        """Rendered project list"""
+        projects = self.read_json(path)
+
+        def draw(file):
+            print_colored("\n=== PORTFOLIO PROJECTS ===\n", Colors.GREEN, file=file)
+            for i, project in enumerate(projects, 1):
+                print_colored(f"[{i}] {project['title']} ({project['year']})", Colors.CYAN, file=file)
+                print_colored(f"    {project['desc']}\n", Colors.WHITE, file=file)
+        return self.render(draw)
+
+    def render_contact(self, path):
+        """Rendered contact information"""
+        contact = self.read_json(path)
+
+        def draw(file):
+            print_colored("\n=== CONTACT INFORMATION ===\n", Colors.GREEN, file=file)
+            for key, value in contact.items():
+                print_colored(f"{key.capitalize()}: ", Colors.CYAN, end="", file=file)
+                print_colored(value, Colors.WHITE, file=file)
+            print(file=file)
+        return self.render(draw)
         
-        if command in commands:
-            commands[command]()
+    def execute(self, command):
+        """Execute a given command"""
+        handler = self.commands.get(command)
+        if handler is None:
+            name, _, arg = command.partition(" ")
+            if name in self.with_args:
+                command = name
+                handler = partial(self.commands[name], arg.strip())
+        if handler is not None and (command in self.games or command in self.live):
+            # Games manage their own output, frame by frame and record frame metrics
+            handler()
+        elif not METRICS.enabled:
+            self.run_command(command, handler)
         else:
-            print_colored(f"Command not found: {command}", Colors.RED)
-            print_colored("Type 'help' for available commands", Colors.YELLOW)
+            start = time.perf_counter()
+            self.run_command(command, handler)
+            METRICS.observe("command_seconds", time.perf_counter() - start,
+                            command=command if handler is not None else "unknown")
+
+    def run_command(self, command, handler):
+        """Run a non-game command with its output batched into one write"""
+        if handler is not None:
+            with batched(self.out):
+                handler()
+        else:
+            with batched(self.out):
+                print_colored(f"Command not found: {command}", Colors.RED, file=self.out)
+                print_colored("Type 'help' for available commands", Colors.YELLOW, file=self.out)
             
     def show_help(self):
         """Display available commands"""
@@ -41,135 +204,233 @@ class CommandDispatcher:
 ║  cv        - Display my curriculum vitae                  ║
 ║  projects  - Show my portfolio projects                   ║
 ║  contact   - Get my contact information                   ║
-║  quote     - Display a random tech quote                  ║
+║  quote     - Random tech quote (WORDS | --author NAME)    ║
 ║  asciiart  - Show ASCII art                               ║
 ║  snake     - Play Snake game                              ║
 ║  matrix    - Experience the Matrix                        ║
-║  clear     - Clear the terminal                           ║
+║  stats     - Performance metrics (on|off|reset|json|prom) ║
+║  record    - Record the session (FILE | stop)             ║
+║  replay    - Play a recording (FILE [--speed N])          ║
+{plugins}║  clear     - Clear the terminal                           ║
 ║  exit      - Exit WHOIS JULIUS                            ║
 ╚═══════════════════════════════════════════════════════════╝
         """
-        print_colored(help_text, Colors.CYAN)
+        plugins = ''.join(
+            "║" + f"  {name:<10}- Play {name.capitalize()}".ljust(59) + "║\n"
+            for name in discover_games(self.games_path)
+            if name not in ("snake", "matrix"))
+        print_colored(help_text.format(plugins=plugins), Colors.CYAN, file=self.out)
         
     def show_cv(self):
         """Display CV from file"""
-        cv_file = self.data_path / "cv.txt"
-        if cv_file.exists():
-            print_colored("\n=== CURRICULUM VITAE ===\n", Colors.GREEN)
-            try:
-                with open(cv_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    typewriter_effect(content, 0.01)
-            except UnicodeDecodeError:
-                # Fallback to latin-1 if UTF-8 fails
-                with open(cv_file, 'r', encoding='latin-1') as f:
-                    content = f.read()
-                    typewriter_effect(content, 0.01)
+        content = self.cache.get("cv.txt", self.read_cv)
+        if content is not None:
+            print_colored("\n=== CURRICULUM VITAE ===\n", Colors.GREEN, file=self.out)
+            typewriter_effect(content, 0.01, file=self.out)
         else:
-            print_colored("CV file not found!", Colors.RED)
+            print_colored("CV file not found!", Colors.RED, file=self.out)
             
     def show_projects(self):
         """Display projects from JSON"""
-        projects_file = self.data_path / "projects.json"
-        if projects_file.exists():
-            with open(projects_file, 'r', encoding='utf-8') as f:
-                projects = json.load(f)
-            
-            print_colored("\n=== PORTFOLIO PROJECTS ===\n", Colors.GREEN)
-            for i, project in enumerate(projects, 1):
-                print_colored(f"[{i}] {project['title']} ({project['year']})", Colors.CYAN)
-                print_colored(f"    {project['desc']}\n", Colors.WHITE)
+        output = self.cache.get("projects.json", self.render_projects, "rendered")
+        if output is not None:
+            self.write(output)
         else:
-            print_colored("Projects file not found!", Colors.RED)
+            print_colored("Projects file not found!", Colors.RED, file=self.out)
             
     def show_contact(self):
         """Display contact information"""
-        contact_file = self.data_path / "contact.json"
-        if contact_file.exists():
-            with open(contact_file, 'r', encoding='utf-8') as f:
-                contact = json.load(f)
-            
-            print_colored("\n=== CONTACT INFORMATION ===\n", Colors.GREEN)
-            for key, value in contact.items():
-                print_colored(f"{key.capitalize()}: ", Colors.CYAN, end="")
-                print_colored(value, Colors.WHITE)
-            print()
+        output = self.cache.get("contact.json", self.render_contact, "rendered")
+        if output is not None:
+            self.write(output)
         else:
-            print_colored("Contact file not found!", Colors.RED)
+            print_colored("Contact file not found!", Colors.RED, file=self.out)
             
-    def show_quote(self):
-        """Display a random quote"""
-        quotes_file = self.data_path / "quotes.txt"
-        if quotes_file.exists():
-            with open(quotes_file, 'r', encoding='utf-8') as f:
-                quotes = [line.strip() for line in f if line.strip()]
-            
-            if quotes:
-                quote = random.choice(quotes)
-                print_colored(f"\n💡 {quote}\n", Colors.YELLOW)
+    def quote_store(self):
+        """Quote store for quotes.txt, reopened when the file changes, None if it is missing"""
+        return self.cache.get("quotes.txt", self.open_quotes, "store")
+
+    def show_quote(self, arg=""):
+        """Display a random quote, or the quotes matching words or an author"""
+        store = self.quote_store()
+        if store is None:
+            print_colored("Quotes file not found!", Colors.RED, file=self.out)
+            return
+        if not arg:
+            quote = store.random()
+            if quote is not None:
+                print_colored(f"\n💡 {quote}\n", Colors.YELLOW, file=self.out)
+            return
+
+        if arg.startswith("--author"):
+            query = arg[len("--author"):].strip()
+            found = store.by_author(query)
+        else:
+            query = arg
+            found = store.search(query)
+        if not query:
+            print_colored("Usage: quote [WORDS | --author NAME]", Colors.YELLOW, file=self.out)
+        elif not found:
+            print_colored(f"No quotes match '{query}'", Colors.YELLOW, file=self.out)
         else:
-            print_colored("Quotes file not found!", Colors.RED)
+            print(file=self.out)
+            for number in found[:self.QUOTE_MATCHES]:
+                print_colored(f"💡 {store.read(number)}", Colors.YELLOW, file=self.out)
+            if len(found) > self.QUOTE_MATCHES:
+                print_colored(f"... and {len(found) - self.QUOTE_MATCHES} more", Colors.CYAN, file=self.out)
+            print(file=self.out)
             
     def show_ascii(self):
         """Display ASCII art"""
-        show_ascii_art()
+        arts = self.cache.get("ascii.py", self.render_arts, "rendered", path=ASCII_PATH)
+        if arts:
+            import random
+            self.write(random.choice(arts))
         
+    def show_stats(self, arg=""):
+        """Display recorded performance metrics, or switch recording on and off"""
+        arg = arg.lower()
+        if arg in ("on", "off", "reset"):
+            if not self.interactive:
+                print_colored("Only the local terminal can control metrics", Colors.YELLOW, file=self.out)
+            elif arg == "reset":
+                METRICS.reset()
+                print_colored("Metrics reset", Colors.GREEN, file=self.out)
+            else:
+                METRICS.enabled = arg == "on"
+                print_colored(f"Metrics recording {arg}", Colors.GREEN, file=self.out)
+            return
+        if arg == "json":
+            self.write(METRICS.to_json() + "\n")
+            return
+        if arg in ("prom", "prometheus"):
+            self.write(METRICS.to_prometheus())
+            return
+        if arg:
+            print_colored("Usage: stats [on|off|reset|json|prom]", Colors.YELLOW, file=self.out)
+            return
+
+        state = "on" if METRICS.enabled else "off, enable with 'stats on'"
+        print_colored(f"\n=== PERFORMANCE METRICS ({state}) ===\n", Colors.GREEN, file=self.out)
+        snapshot = METRICS.snapshot()
+        if snapshot["histograms"]:
+            print_colored(f"{'timing':<34} {'count':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}",
+                          Colors.CYAN, file=self.out)
+            for h in snapshot["histograms"]:
+                label = h["name"] + "".join(f" {v}" for v in h["labels"].values())
+                print_colored(f"{label:<34} {h['count']:>7} {h['p50'] * 1e3:>8.2f} "
+                              f"{h['p99'] * 1e3:>8.2f} {h['max'] * 1e3:>8.2f}", Colors.WHITE, file=self.out)
+            print(file=self.out)
+        if snapshot["counters"]:
+            print_colored(f"{'counter':<34} {'value':>15}", Colors.CYAN, file=self.out)
+            for c in snapshot["counters"]:
+                label = c["name"] + "".join(f" {v}" for v in c["labels"].values())
+                print_colored(f"{label:<34} {c['value']:>15}", Colors.WHITE, file=self.out)
+            print(file=self.out)
+        out = self.out or sys.stdout
+        if hasattr(out, "stats"):
+            io_stats = out.stats()
+            print_colored(f"terminal: {io_stats['writes']} writes, {io_stats['bytes']} bytes",
+                          Colors.WHITE, file=self.out)
+        cache = self.cache.stats()
+        print_colored(f"content cache: {cache['hits']} hits, {cache['misses']} misses, "
+                      f"{cache['bundled']} from bundle\n",
+                      Colors.WHITE, file=self.out)
+
+    def show_record(self, arg=""):
+        """Record the session to an asciicast file, 'record stop' finishes it"""
+        out = sys.stdout
+        if not self.interactive or not hasattr(out, "echo"):
+            print_colored("Only the local terminal can be recorded", Colors.YELLOW, file=self.out)
+            return
+        from cast import start_recording, stop_recording
+        recorder = out.recorder
+        if arg == "stop":
+            recorder = stop_recording()
+            if recorder is None:
+                print_colored("Not recording", Colors.YELLOW)
+            else:
+                print_colored(f"Recording saved to {recorder.path} ({recorder.events} events)", Colors.GREEN)
+        elif recorder is not None:
+            print_colored(f"Recording to {recorder.path}, 'record stop' to finish", Colors.CYAN)
+        elif not arg:
+            print_colored("Usage: record FILE | record stop", Colors.YELLOW)
+        else:
+            try:
+                start_recording(arg, title="whois-julius")
+            except OSError as e:
+                print_colored(f"Cannot record to {arg}: {e.strerror}", Colors.RED)
+                return
+            print_colored(f"Recording to {arg}, 'record stop' to finish", Colors.GREEN)
+
+    def show_replay(self, arg=""):
+        """Play back an asciicast recording with seek and speed keys"""
+        if not self.interactive:
+            print_colored("Replays need a local terminal, try it via ./run.sh", Colors.YELLOW, file=self.out)
+            return
+        parts = arg.split()
+        try:
+            options = dict(zip(parts[1::2], map(float, parts[2::2])))
+            if (len(parts) % 2 != 1 or set(options) - {"--speed", "--idle"}
+                    or options.get("--speed", 1.0) <= 0):
+                raise ValueError
+        except ValueError:
+            print_colored("Usage: replay FILE [--speed N] [--idle SECONDS]", Colors.YELLOW)
+            return
+
+        from cast import CastPlayer
+        keys = load_game("_input", self.games_path).KeyReader()
+        try:
+            player = CastPlayer(parts[0], keys=keys, speed=options.get("--speed", 1.0),
+                                idle_limit=options.get("--idle"))
+        except (OSError, ValueError) as e:
+            print_colored(f"Cannot replay {parts[0]}: {getattr(e, 'strerror', None) or e}", Colors.RED)
+            return
+        print_colored(f"Replaying {parts[0]}: {player.KEYS_HELP}", Colors.CYAN)
+        time.sleep(1)
+
+        position = 0.0
+        try:
+            with keys.raw():
+                print("\033[2J\033[H", end="", flush=True)
+                position = player.play()
+        except (KeyboardInterrupt, EOFError):
+            position = player.position
+        finally:
+            player.close()
+            print("\033[0m\033[?25h", end="")
+        print_colored(f"\nReplay stopped at {position:.1f}s", Colors.GREEN)
+
     def play_snake(self):
         """Launch Snake game"""
-        try:
-            # Use a more robust import mechanism
-            import importlib.util
-            import sys
-            
-            # Get absolute path to snake.py
-            snake_path = os.path.join(self.base_path, "games", "snake.py")
-            
-            if not os.path.exists(snake_path):
-                print_colored(f"Snake game file not found at: {snake_path}", Colors.RED)
-                return
-                
-            # Import the module dynamically
-            spec = importlib.util.spec_from_file_location("snake", snake_path)
-            snake_module = importlib.util.module_from_spec(spec)
-            sys.modules["snake"] = snake_module
-            spec.loader.exec_module(snake_module)
-            
-            # Run the game
-            game = snake_module.SnakeGame()
-            game.run()
-        except ImportError as e:
-            print_colored(f"Import error: {str(e)}", Colors.RED)
-        except Exception as e:
-            print_colored(f"Error loading Snake game: {str(e)}", Colors.RED)
-            import traceback
-            print_colored(traceback.format_exc(), Colors.RED)
+        self.launch_game("snake", "Snake game")
 
     def show_matrix(self):
         """Launch Matrix effect"""
+        self.launch_game("matrix", "Matrix effect")
+
+    def launch_game(self, name, title):
+        """Run the GAME class of games/<name>.py, importing the module only once"""
+        if not self.interactive:
+            print_colored(f"{title} needs a local terminal, try it via ./run.sh", Colors.YELLOW, file=self.out)
+            return
         try:
-            # Use a more robust import mechanism
-            import importlib.util
-            import sys
-            
-            # Get absolute path to matrix.py
-            matrix_path = os.path.join(self.base_path, "games", "matrix.py")
-            
-            if not os.path.exists(matrix_path):
-                print_colored(f"Matrix effect file not found at: {matrix_path}", Colors.RED)
+            if name not in sys.modules:
+                game_path = os.path.join(self.games_path, f"{name}.py")
+                if not os.path.exists(game_path):
+                    print_colored(f"{title} file not found at: {game_path}", Colors.RED, file=self.out)
+                    return
+            module = load_game(name, self.games_path)
+            game_class = getattr(module, "GAME", None)
+            if game_class is None:
+                print_colored(f"{title} does not define GAME", Colors.RED, file=self.out)
                 return
-                
-            # Import the module dynamically
-            spec = importlib.util.spec_from_file_location("matrix", matrix_path)
-            matrix_module = importlib.util.module_from_spec(spec)
-            sys.modules["matrix"] = matrix_module
-            spec.loader.exec_module(matrix_module)
-            
-            # Run the matrix effect
-            matrix = matrix_module.MatrixRain()
-            matrix.run()
+
+            # Run the game
+            game_class().run()
         except ImportError as e:
-            print_colored(f"Import error: {str(e)}", Colors.RED)
+            print_colored(f"Import error: {str(e)}", Colors.RED, file=self.out)
         except Exception as e:
-            print_colored(f"Error loading Matrix effect: {str(e)}", Colors.RED)
+            print_colored(f"Error loading {title}: {str(e)}", Colors.RED, file=self.out)
             import traceback
-            print_colored(traceback.format_exc(), Colors.RED)
+            print_colored(traceback.format_exc(), Colors.RED, file=self.out)
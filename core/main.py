@@ -6,48 +6,113 @@ Main entry point for WHOIS JULIUS
 
 import sys
 import os
-import io
 from commands import CommandDispatcher
-from utils import clear_screen, print_colored, Colors
+from utils import clear_screen, print_colored, Colors, install_terminal_writer
 
-# Set UTF-8 encoding for stdout
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+# UTF-8 stdout that sends each command's output in one write
+install_terminal_writer()
 
 class WhoisJulius:
-    def __init__(self):
-        self.dispatcher = CommandDispatcher()
+    def __init__(self, out=None, interactive=True):
+        # out is None for the local terminal, network sessions pass their own stream
+        self.out = out
+        self.interactive = interactive
+        self.dispatcher = CommandDispatcher(out=out, interactive=interactive)
         self.running = True
         
     def display_prompt(self):
         """Display the command prompt"""
-        print_colored("julius@whois-julius", Colors.GREEN, end="")
-        print_colored(":", Colors.WHITE, end="")
-        print_colored("~", Colors.BLUE, end="")
-        print_colored("$ ", Colors.WHITE, end="")
+        print_colored("julius@whois-julius", Colors.GREEN, end="", file=self.out)
+        print_colored(":", Colors.WHITE, end="", file=self.out)
+        print_colored("~", Colors.BLUE, end="", file=self.out)
+        print_colored("$ ", Colors.WHITE, end="", file=self.out)
+
+    def clear(self):
+        """Clear the screen of this session"""
+        if self.interactive:
+            clear_screen()
+        else:
+            print("\033[2J\033[H", end="", file=self.out)
+
+    def greet(self):
+        """Show the start screen"""
+        self.clear()
+        print_colored("Type 'help' for available commands\n", Colors.CYAN, file=self.out)
+
+    def handle(self, command):
+        """Run one command line, returns False once the session should end"""
+        # Arguments keep their case, they may be file names
+        name, space, arg = command.strip().partition(" ")
+        command = name.lower() + space + arg
+        if command == "exit":
+            print_colored("\nGoodbye! Thanks for visiting.\n", Colors.GREEN, file=self.out)
+            self.running = False
+        elif command == "clear":
+            self.clear()
+        else:
+            self.dispatcher.execute(command)
+        return self.running
         
     def run(self):
         """Main application loop"""
-        clear_screen()
-        print_colored("Type 'help' for available commands\n", Colors.CYAN)
+        self.greet()
         
         while self.running:
             try:
                 self.display_prompt()
-                command = input().strip().lower()
-                
-                if command == "exit":
-                    print_colored("\nGoodbye! Thanks for visiting.\n", Colors.GREEN)
-                    self.running = False
-                elif command == "clear":
-                    clear_screen()
-                else:
-                    self.dispatcher.execute(command)
+                line = input()
+                if hasattr(sys.stdout, 'echo'):
+                    sys.stdout.echo(line + "\n")  # the terminal echoed it, recordings need it too
+                self.handle(line)
                     
+            except EOFError:
+                # The terminal went away, e.g. a dropped SSH connection
+                break
             except KeyboardInterrupt:
                 print_colored("\n\nUse 'exit' to quit properly.\n", Colors.YELLOW)
             except Exception as e:
                 print_colored(f"\nError: {str(e)}\n", Colors.RED)
 
+        if getattr(sys.stdout, 'recorder', None) is not None:
+            from cast import stop_recording
+            stop_recording()
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    import argparse
+    parser = argparse.ArgumentParser(description="WHOIS JULIUS terminal portfolio")
+    parser.add_argument("--serve", metavar="[HOST]:PORT",
+                        help="serve sessions over a telnet-compatible TCP socket")
+    parser.add_argument("--metrics", action="store_true",
+                        help="record performance metrics from the start (see 'stats')")
+    parser.add_argument("--arena", metavar="[HOST]:PORT",
+                        help="host multiplayer Snake on a telnet-compatible TCP socket")
+    parser.add_argument("--record", metavar="FILE",
+                        help="record the session to an asciicast file (see 'replay')")
+    parser.add_argument("--zygote", metavar="SOCKET",
+                        help="preload and fork a session per client of core/zygote.py on SOCKET")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    app = WhoisJulius()
-    app.run()
+    # argparse is only imported when there are options to parse
+    args = parse_args() if len(sys.argv) > 1 else None
+    if args and args.metrics:
+        from metrics import METRICS
+        METRICS.enabled = True
+    if args and args.zygote:
+        from zygote import serve_zygote
+        serve_zygote(args.zygote, WhoisJulius)
+    elif args and args.arena:
+        from commands import load_game
+        from server import parse_address
+        load_game("_arena").serve_arena(*parse_address(args.arena))
+    elif args and args.serve:
+        from server import serve, parse_address
+        host, port = parse_address(args.serve)
+        serve(host, port, lambda out: WhoisJulius(out=out, interactive=False))
+    else:
+        app = WhoisJulius()
+        if args and args.record:
+            from cast import start_recording
+            start_recording(args.record, title="whois-julius")
+        app.run()
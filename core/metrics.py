@@ -0,0 +1,130 @@
+"""In-process performance metrics
+
+Counters and latency histograms keyed by name and labels, kept in one
+process-wide registry. Recording is switched off by default; call sites
+check ``METRICS.enabled`` before reading the clock, so disabled
+instrumentation costs one attribute lookup. Turn it on with
+``WHOIS_METRICS=1``, ``--metrics`` or the ``stats on`` command.
+"""
+
+import os
+from bisect import bisect_left
+
+# Histogram bucket upper bounds in seconds, from 50us to 1s
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+           0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+class Histogram:
+    """Fixed-bucket latency histogram"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], self.counts)),
+        }
+
+class Metrics:
+    """Registry of counters and histograms"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.counters = {}    # (name, labels) -> number
+        self.histograms = {}  # (name, labels) -> Histogram
+
+    @staticmethod
+    def key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def count(self, name, n=1, **labels):
+        """Add n to a counter"""
+        key = self.key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + n
+
+    def observe(self, name, seconds, **labels):
+        """Record one duration in a histogram"""
+        key = self.key(name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+    def reset(self):
+        """Drop everything recorded so far"""
+        self.counters.clear()
+        self.histograms.clear()
+
+    def snapshot(self):
+        """Everything recorded, as plain data"""
+        return {
+            "enabled": self.enabled,
+            "counters": [{"name": name, "labels": dict(labels), "value": value}
+                         for (name, labels), value in sorted(self.counters.items())],
+            "histograms": [{"name": name, "labels": dict(labels), **histogram.to_dict()}
+                           for (name, labels), histogram in sorted(self.histograms.items())],
+        }
+
+    def to_json(self):
+        """Snapshot as a JSON document"""
+        import json
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix="whois_"):
+        """Snapshot in the Prometheus text exposition format"""
+        lines = []
+        typed = set()
+
+        def labelset(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+        for (name, labels), value in sorted(self.counters.items()):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {prefix}{name} counter")
+            lines.append(f"{prefix}{name}{labelset(labels)} {value}")
+
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {prefix}{name} histogram")
+            cumulative = 0
+            for bound, n in zip([str(b) for b in BUCKETS] + ["+Inf"], histogram.counts):
+                cumulative += n
+                lines.append(f"{prefix}{name}_bucket{labelset(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{prefix}{name}_sum{labelset(labels)} {histogram.sum:.9f}")
+            lines.append(f"{prefix}{name}_count{labelset(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+# The registry every module records into
+METRICS = Metrics(enabled=os.environ.get("WHOIS_METRICS", "") not in ("", "0"))
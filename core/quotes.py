@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""Offset-indexed quote store with keyword and author search
+
+quotes.txt holds one quote per line, ending in "– Author". QuoteStore
+keeps an index beside it (quotes.txt.idx) with the byte offset and
+length of every quote plus two inverted indexes, one for the words of
+the quotes and one for the words of the author names. The index records
+the mtime and size of the file it was built from and is rebuilt when
+they no longer match.
+
+The index is mapped with mmap and nothing of it is parsed up front: a
+random quote is one positioned read from quotes.txt, and a search is a
+binary search through the sorted terms followed by an intersection of
+their posting lists. So neither depends on how many quotes there are.
+
+    python3 core/quotes.py [FILE] [--search WORDS] [--author NAME] [--quiet]
+
+With --quiet it only brings the index up to date, e.g. after a deploy.
+"""
+
+import mmap
+import os
+import random
+import re
+import struct
+import sys
+import time
+from array import array
+from collections import defaultdict
+
+MAGIC = b"WJQUOTES"
+VERSION = 1
+# magic, version, source mtime_ns, source size, quotes, keywords, author terms,
+# file offsets of the quote table and the two term tables
+HEADER = struct.Struct("<8sIqQIIIQQQ")
+QUOTE = struct.Struct("<QI")    # offset and length in quotes.txt
+TERM = struct.Struct("<QHQI")   # term offset, term length, postings offset, posting count
+# Posting lists are little-endian uint32 quote numbers like the rest of the file
+SWAP = sys.byteorder == 'big'
+
+WORD = re.compile(r"\w+")
+AUTHOR_SEPARATORS = (" – ", " — ", " - ")
+
+def words(text):
+    """Lowercase search terms of a text"""
+    return WORD.findall(text.lower())
+
+def split_author(quote):
+    """(text, author) of a quote line, author '' if it names none"""
+    for separator in AUTHOR_SEPARATORS:
+        text, found, author = quote.rpartition(separator)
+        if found:
+            return text, author.strip()
+    return quote, ""
+
+def index_path(path):
+    """Where the index of a quotes file lives"""
+    return path + ".idx"
+
+def build_index(path):
+    """Index of a quotes file as bytes"""
+    st = os.stat(path)
+    quotes = array('Q')
+    lengths = array('I')
+    keywords = defaultdict(list)  # term -> quote numbers, ascending
+    authors = defaultdict(list)
+    with open(path, 'rb') as f:
+        offset = 0
+        for line in f:
+            start = offset
+            offset += len(line)
+            stripped = line.strip()
+            if not stripped:
+                continue
+            number = len(lengths)
+            quotes.append(start + line.index(stripped))
+            lengths.append(len(stripped))
+            text = stripped.decode('utf-8', 'replace')
+            for term in set(words(text)):
+                keywords[term].append(number)
+            for term in set(words(split_author(text)[1])):
+                authors[term].append(number)
+
+    # Layout: header, quote table, keyword table, author table, term text, postings
+    quotes_at = HEADER.size
+    keywords_at = quotes_at + QUOTE.size * len(lengths)
+    authors_at = keywords_at + TERM.size * len(keywords)
+    terms_at = authors_at + TERM.size * len(authors)
+    out = bytearray(HEADER.pack(MAGIC, VERSION, st.st_mtime_ns, st.st_size, len(lengths),
+                                len(keywords), len(authors), quotes_at, keywords_at, authors_at))
+    for start, length in zip(quotes, lengths):
+        out += QUOTE.pack(start, length)
+
+    names = bytearray()
+    postings = bytearray()
+    postings_at = terms_at + sum(len(t.encode('utf-8')) for t in keywords) \
+        + sum(len(t.encode('utf-8')) for t in authors)
+    for table in (keywords, authors):
+        for term in sorted(table, key=lambda t: t.encode('utf-8')):
+            name = term.encode('utf-8')
+            out += TERM.pack(terms_at + len(names), len(name),
+                             postings_at + len(postings), len(table[term]))
+            names += name
+            numbers = array('I', table[term])
+            if SWAP:
+                numbers.byteswap()
+            postings += numbers.tobytes()
+    return bytes(out + names + postings)
+
+def write_index(path, data):
+    """Replace the index file atomically, False if the directory isn't writable"""
+    target = index_path(path)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, target)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        return False
+    return True
+
+class QuoteStore:
+    """Random pick and search over a quotes file through its index"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb', buffering=0)
+        self.rebuilt = False
+        self.index = self.load_index()
+        (_magic, _version, _mtime, _size, self.count, self.keywords, self.authors,
+         self.quotes_at, self.keywords_at, self.authors_at) = HEADER.unpack_from(self.index, 0)
+
+    def load_index(self):
+        """Mapped index for the current file version, rebuilt if it is stale"""
+        st = os.fstat(self.file.fileno())
+        try:
+            with open(index_path(self.path), 'rb') as f:
+                index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(index) >= HEADER.size:
+                magic, version, mtime_ns, size = HEADER.unpack_from(index, 0)[:4]
+                if (magic, version, mtime_ns, size) == (MAGIC, VERSION, st.st_mtime_ns, st.st_size):
+                    return index
+            index.close()
+        except (OSError, ValueError):
+            pass  # missing or empty
+        self.rebuilt = True
+        data = build_index(self.path)
+        # Without a writable data directory the index lives in memory only
+        return data if not write_index(self.path, data) else self.load_written(data)
+
+    def load_written(self, data):
+        """Map the index just written, falling back to the bytes built"""
+        try:
+            with open(index_path(self.path), 'rb') as f:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return data
+
+    def __len__(self):
+        return self.count
+
+    def read(self, number):
+        """Text of quote number, one positioned read"""
+        offset, length = QUOTE.unpack_from(self.index, self.quotes_at + number * QUOTE.size)
+        if hasattr(os, 'pread'):
+            # No shared file position, sessions forked from one process can read at once
+            data = os.pread(self.file.fileno(), length, offset)
+        else:
+            self.file.seek(offset)
+            data = self.file.read(length)
+        return data.decode('utf-8', 'replace')
+
+    def random(self, rng=random):
+        """A random quote, None if there are none"""
+        if not self.count:
+            return None
+        return self.read(rng.randrange(self.count))
+
+    def postings(self, term, table_at, size):
+        """Numbers of the quotes containing term, from the term table at table_at"""
+        key = term.encode('utf-8')
+        index = self.index
+        lo, hi = 0, size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            name_at, name_len, postings_at, count = TERM.unpack_from(index, table_at + mid * TERM.size)
+            name = index[name_at:name_at + name_len]
+            if name < key:
+                lo = mid + 1
+            elif name > key:
+                hi = mid
+            else:
+                result = array('I')
+                result.frombytes(index[postings_at:postings_at + 4 * count])
+                if SWAP:
+                    result.byteswap()
+                return result
+        return array('I')
+
+    def matches(self, terms, table_at, size):
+        """Sorted numbers of the quotes containing every term"""
+        lists = sorted((self.postings(term, table_at, size) for term in set(terms)), key=len)
+        if not lists:
+            return []
+        found = set(lists[0])
+        for postings in lists[1:]:
+            if not found:
+                break
+            found.intersection_update(postings)
+        return sorted(found)
+
+    def search(self, text):
+        """Numbers of the quotes containing every word of text"""
+        return self.matches(words(text), self.keywords_at, self.keywords)
+
+    def by_author(self, name):
+        """Numbers of the quotes whose author has every word of name"""
+        return self.matches(words(name), self.authors_at, self.authors)
+
+    def close(self):
+        if isinstance(self.index, mmap.mmap):
+            self.index.close()
+        self.file.close()
+
+def main():
+    args = sys.argv[1:]
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "quotes.txt")
+    if args and not args[0].startswith("--"):
+        path = args.pop(0)
+
+    start = time.perf_counter()
+    store = QuoteStore(path)
+    opened = time.perf_counter() - start
+    if "--quiet" in args:
+        return
+    print(f"{len(store)} quotes, index {'rebuilt' if store.rebuilt else 'loaded'} in {opened * 1e3:.1f}ms")
+
+    start = time.perf_counter()
+    quote = store.random()
+    print(f"random pick in {(time.perf_counter() - start) * 1e3:.3f}ms: {quote}")
+    for flag, find in (("--search", store.search), ("--author", store.by_author)):
+        if flag in args:
+            query = args[args.index(flag) + 1]
+            start = time.perf_counter()
+            found = find(query)
+            print(f"{len(found)} matches for {flag} {query!r} in {(time.perf_counter() - start) * 1e3:.3f}ms")
+            for number in found[:5]:
+                print(f"  {store.read(number)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Network server mode for WHOIS JULIUS
+
+Serves the portfolio shell over a telnet-compatible line protocol so one
+process can host many visitors. Every connection gets its own session
+object and output stream; the parsed data/ files are shared process-wide.
+"""
+
+import asyncio
+import io
+from utils import print_colored, Colors
+
+IAC = 255  # telnet "interpret as command"
+SB = 250   # subnegotiation begin
+SE = 240   # subnegotiation end
+WILL, WONT, DO, DONT = 251, 252, 253, 254
+
+MAX_LINE = 1024        # longest accepted command line in bytes
+MAX_SESSIONS = 500     # further connections are turned away
+IDLE_TIMEOUT = 600     # seconds without input before a session is closed
+
+def parse_address(address):
+    """Split '[HOST]:PORT' into (host, port), an empty host means all interfaces"""
+    host, _, port = address.rpartition(':')
+    return host or None, int(port)
+
+def strip_telnet(data):
+    """Remove telnet negotiation sequences from received bytes"""
+    if IAC not in data:
+        return data
+    out = bytearray()
+    i = 0
+    while i < len(data):
+        byte = data[i]
+        if byte != IAC:
+            out.append(byte)
+            i += 1
+            continue
+        command = data[i + 1] if i + 1 < len(data) else None
+        if command == IAC:
+            out.append(IAC)  # escaped 0xFF data byte
+            i += 2
+        elif command in (WILL, WONT, DO, DONT):
+            i += 3
+        elif command == SB:
+            end = data.find(bytes((IAC, SE)), i)
+            i = len(data) if end < 0 else end + 2
+        else:
+            i += 2
+    return bytes(out)
+
+def to_wire(text):
+    """Encode session output with the CRLF line endings telnet expects"""
+    text = text.replace('\r\n', '\n').replace('\n', '\r\n')
+    return text.encode('utf-8').replace(b'\xff', b'\xff\xff')
+
+class SessionServer:
+    """Accepts connections and runs one shell session per client"""
+
+    def __init__(self, session_factory, max_sessions=MAX_SESSIONS,
+                 idle_timeout=IDLE_TIMEOUT):
+        self.session_factory = session_factory
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.sessions = 0
+        self.server = None
+
+    async def start(self, host, port):
+        """Start listening, returns the bound (host, port)"""
+        self.server = await asyncio.start_server(
+            self.handle_client, host, port, limit=MAX_LINE)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        """Serve until cancelled"""
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def handle_client(self, reader, writer):
+        """Run one visitor's session"""
+        if self.sessions >= self.max_sessions:
+            writer.write(b"Server busy, please try again later.\r\n")
+            await self.close(writer)
+            return
+
+        self.sessions += 1
+        out = io.StringIO()
+        session = self.session_factory(out)
+        try:
+            session.greet()
+            while session.running:
+                session.display_prompt()
+                if not await self.flush(out, writer):
+                    break
+                line = await self.read_line(reader)
+                if line is None:
+                    break
+                try:
+                    session.handle(line)
+                except Exception as e:
+                    print_colored(f"\nError: {str(e)}\n", Colors.RED, file=out)
+            await self.flush(out, writer)
+        finally:
+            self.sessions -= 1
+            await self.close(writer)
+
+    async def read_line(self, reader):
+        """Next command line from the client, None once it is gone or idle"""
+        try:
+            data = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+        except (asyncio.TimeoutError, asyncio.LimitOverrunError, ValueError,
+                ConnectionError):
+            return None
+        if not data:
+            return None
+        data = strip_telnet(data).replace(b'\x00', b'')
+        if b'\x04' in data:  # Ctrl-D
+            return None
+        return data.decode('utf-8', errors='replace')
+
+    async def flush(self, out, writer):
+        """Send buffered session output, returns False if the client is gone"""
+        text = out.getvalue()
+        out.seek(0)
+        out.truncate()
+        if not text:
+            return True
+        try:
+            writer.write(to_wire(text))
+            await writer.drain()
+        except ConnectionError:
+            return False
+        return True
+
+    async def close(self, writer):
+        """Close a client connection, ignoring clients that already left"""
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+def serve(host, port, session_factory):
+    """Run the network server until interrupted"""
+    async def main():
+        server = SessionServer(session_factory)
+        bound_host, bound_port = await server.start(host, port)
+        print_colored(f"Serving WHOIS JULIUS on {bound_host}:{bound_port}", Colors.GREEN)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print_colored("\nServer stopped.", Colors.YELLOW)
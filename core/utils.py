@@ -3,7 +3,13 @@
 import os
 import sys
 import time
+from contextlib import contextmanager
 from enum import Enum
+from ansi import SgrCompactor
+
+# Platform-specific imports
+if sys.platform != 'win32':
+    import termios
 
 class Colors(Enum):
     """ANSI color codes"""
@@ -18,23 +24,173 @@ class Colors(Enum):
     RESET = '\033[0m'
     BOLD = '\033[1m'
     
+class TerminalWriter:
+    """Buffered stdout shared by the shell and the games
+
+    Outside a batch it behaves like a line-buffered terminal. Inside
+    batch() nothing is sent until the batch ends, so a whole command goes
+    out in one write; games get the same by calling flush() once per
+    frame. Text passes through an SgrCompactor, so colored fragments only
+    change the terminal's attributes where the visible result changes.
+    Writes and bytes are counted to make the effect visible. While a
+    recorder is set (see core/cast.py) it gets a copy of every write.
+    """
+
+    def __init__(self, stream, encoding='utf-8'):
+        self.stream = stream
+        self.binary = getattr(stream, 'buffer', stream)
+        self.encoding = encoding
+        self.errors = 'replace'
+        self.pending = bytearray()
+        self.sgr = SgrCompactor()
+        self.depth = 0
+        self.writes = 0
+        self.bytes = 0
+        self.recorder = None
+
+    def write(self, text):
+        self.pending += self.sgr.feed(text).encode(self.encoding, self.errors)
+        if not self.depth and '\n' in text:
+            self.flush()
+        return len(text)
+
+    def write_bytes(self, data):
+        """Queue already encoded output that ends with default attributes"""
+        self.pending += self.sgr.sync().encode()
+        self.pending += data
+        self.sgr.reset()
+
+    def flush(self):
+        """Send everything queued with a single write"""
+        self.pending += self.sgr.sync().encode()
+        if not self.pending:
+            return
+        data = bytes(self.pending)
+        self.pending.clear()
+        self.binary.write(data)
+        self.binary.flush()
+        self.writes += 1
+        self.bytes += len(data)
+        if self.recorder is not None:
+            self.recorder.output(data)
+
+    def echo(self, text):
+        """Record text the terminal showed without us writing it, like typed input"""
+        if self.recorder is not None:
+            self.recorder.output(text)
+
+    @contextmanager
+    def batch(self):
+        """Hold back output until the outermost batch ends"""
+        self.depth += 1
+        try:
+            yield self
+        finally:
+            self.depth -= 1
+            if not self.depth:
+                self.flush()
+
+    def isatty(self):
+        return self.stream.isatty()
+
+    def fileno(self):
+        return self.stream.fileno()
+
+    def stats(self):
+        """Write and byte counters"""
+        return {"writes": self.writes, "bytes": self.bytes}
+
+def install_terminal_writer():
+    """Route sys.stdout through a TerminalWriter, returns the writer"""
+    if not isinstance(sys.stdout, TerminalWriter):
+        sys.stdout.flush()
+        sys.stdout = TerminalWriter(sys.stdout)
+    return sys.stdout
+
+@contextmanager
+def batched(stream=None):
+    """Batch the output of a block if the stream supports it"""
+    stream = stream or sys.stdout
+    if isinstance(stream, TerminalWriter):
+        with stream.batch():
+            yield
+    else:
+        yield
+
 def clear_screen():
     """Clear the terminal screen"""
+    sys.stdout.flush()  # the clear command writes straight to the terminal
     os.system('cls' if os.name == 'nt' else 'clear')
+    if hasattr(sys.stdout, 'echo'):
+        sys.stdout.echo("\033[H\033[2J")
     
-def print_colored(text, color=Colors.WHITE, end='\n'):
-    """Print colored text to terminal"""
+def print_colored(text, color=Colors.WHITE, end='\n', file=None):
+    """Print colored text to terminal (or to file if given)"""
     if isinstance(color, Colors):
         color = color.value
-    print(f"{color}{text}{Colors.RESET.value}", end=end)
+    print(f"{color}{text}{Colors.RESET.value}", end=end, file=file)
     
-def typewriter_effect(text, delay=0.03):
-    """Print text with typewriter effect"""
-    for char in text:
-        sys.stdout.write(char)
-        sys.stdout.flush()
-        time.sleep(delay)
-    print()
+@contextmanager
+def key_watcher():
+    """Yield wait(timeout) -> True if a key was pressed within timeout seconds
+
+    Waits through the games' KeyReader in cbreak mode so single key
+    presses arrive without Enter, and discards them afterwards so they
+    don't end up in the next prompt.
+    """
+    if sys.platform != 'win32' and not sys.stdin.isatty():
+        def wait(timeout):
+            if timeout > 0:
+                time.sleep(timeout)
+            return False
+        yield wait
+        return
+
+    from commands import load_game
+    keys = load_game("_input").KeyReader()
+
+    def wait(timeout):
+        try:
+            return bool(keys.wait(timeout))
+        except EOFError:
+            return True  # nobody left to wait for, finish at once
+
+    with keys.raw(cbreak=True):
+        try:
+            yield wait
+        finally:
+            if sys.platform != 'win32':
+                termios.tcflush(keys.fd, termios.TCIFLUSH)
+
+def typewriter_effect(text, delay=0.03, file=None, max_duration=2.0, frame=1 / 30):
+    """Print text with typewriter effect
+
+    The text goes out in chunks, one write per frame, paced to take
+    len(text) * delay seconds but never longer than max_duration. Any key
+    press prints the rest at once.
+    """
+    out = file or sys.stdout
+    if not out.isatty():
+        # Nobody watches the animation, e.g. a pipe or a network session buffer
+        out.write(text + '\n')
+        return
+
+    duration = min(len(text) * delay, max_duration)
+    frames = max(1, int(duration / frame))
+    size = max(1, -(-len(text) // frames))
+
+    with key_watcher() as key_pressed:
+        start = time.monotonic()
+        for n, i in enumerate(range(0, len(text), size), 1):
+            out.write(text[i:i + size])
+            out.flush()
+            if i + size >= len(text):
+                break
+            if key_pressed(start + n * frame - time.monotonic()):
+                out.write(text[i + size:])
+                break
+    out.write('\n')
+    out.flush()
     
 def center_text(text, width=80):
     """Center text in terminal"""
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""Pre-fork launcher for hosting WHOIS JULIUS over SSH
+
+A warm parent process (the zygote) imports the app, loads the content
+and the games once and then waits on a Unix socket:
+
+    python3 core/main.py --zygote /run/whois/zygote.sock
+
+Each SSH session runs the small client in this file instead of run.sh,
+e.g. as ``ForceCommand python3 -S /path/to/core/zygote.py /run/whois/zygote.sock``.
+The client passes its terminal file descriptors and environment over
+the socket, the zygote forks a child that adopts them and runs a fresh
+session, and the client forwards signals to that child and exits with
+its status. Children share the parent's memory copy-on-write. When no
+zygote is listening the client starts core/main.py itself.
+
+POSIX only. The client sticks to the C modules behind socket, signal
+and struct, whose Python wrappers pull in enum and collections and
+would cost more than the rest of the client's startup.
+"""
+
+import os
+import sys
+import _signal
+import _socket
+import _struct
+
+HEADER = _struct.Struct("<I")  # length of the environment block that follows
+FORWARDED = ("SIGINT", "SIGQUIT", "SIGTERM", "SIGHUP", "SIGWINCH")
+RECEIVE_TIMEOUT = 5.0  # seconds a client gets to send its terminal and environment
+
+def recv_exact(conn, size):
+    """Exactly size bytes from conn, fewer only at end of stream"""
+    data = bytearray()
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return bytes(data)
+
+# Client side
+
+def connect(socket_path):
+    """Run one session in the zygote, returns its exit status or None if no zygote answers"""
+    # The terminal still belongs to this process, its signals go to the session
+    child = []
+    def forward(signum, frame):
+        try:
+            if child:
+                os.kill(child[0], signum)
+        except ProcessLookupError:
+            pass
+    for name in FORWARDED:
+        _signal.signal(getattr(_signal, name), forward)
+
+    conn = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    try:
+        conn.connect(socket_path)
+    except OSError:
+        conn.close()
+        return None
+
+    env = "\0".join(f"{k}={v}" for k, v in os.environ.items()).encode("utf-8", "surrogateescape")
+    fds = _struct.pack("3i", 0, 1, 2)
+    conn.sendmsg([HEADER.pack(len(env))], [(_socket.SOL_SOCKET, _socket.SCM_RIGHTS, fds)])
+    conn.sendall(env)
+
+    reply = recv_exact(conn, HEADER.size)
+    if len(reply) < HEADER.size:
+        return 1
+    child.append(HEADER.unpack(reply)[0])
+
+    status = recv_exact(conn, 1)
+    conn.close()
+    return status[0] if status else 1
+
+def main():
+    if len(sys.argv) != 2:
+        print(f"usage: {sys.argv[0]} SOCKET", file=sys.stderr)
+        sys.exit(2)
+    status = connect(sys.argv[1])
+    if status is None:
+        # No zygote running, start a session the slow way
+        main_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+        os.execv(sys.executable, [sys.executable, main_path])
+    sys.exit(status)
+
+# Zygote side
+
+def preload():
+    """Import and load everything a session would otherwise load on first use"""
+    import json
+    import random
+    from commands import CommandDispatcher, discover_games, load_game
+    from bundle import is_stale, build
+    import ascii
+
+    # Bring the content bundle up to date once here rather than in every launch
+    try:
+        if is_stale():
+            build()
+    except OSError as e:
+        print(f"content bundle not rebuilt: {e}", file=sys.stderr)
+
+    dispatcher = CommandDispatcher(interactive=False)
+    for name, variant, path, loader in dispatcher.bundled():
+        dispatcher.cache.get(name, loader, variant, path=path)
+    dispatcher.quote_store()
+    for name in discover_games(dispatcher.games_path):
+        try:
+            load_game(name, dispatcher.games_path)
+        except Exception:
+            pass  # the session reports it when the game is started
+
+def reap(signum, frame):
+    """Collect finished sessions"""
+    try:
+        while os.waitpid(-1, os.WNOHANG)[0]:
+            pass
+    except ChildProcessError:
+        pass
+
+def serve_zygote(socket_path, make_app):
+    """Fork a session from make_app() for every client on socket_path"""
+    import gc
+    import signal
+    import socket
+    preload()
+    # Keep the collector from touching, and so copying, the preloaded objects in every child
+    gc.freeze()
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # Created private, nobody else may connect even before the chmod
+    umask = os.umask(0o177)
+    try:
+        listener.bind(socket_path)
+    finally:
+        os.umask(umask)
+    os.chmod(socket_path, 0o600)
+    listener.listen(64)
+    signal.signal(signal.SIGCHLD, reap)
+    print(f"WHOIS JULIUS zygote listening on {socket_path}", file=sys.stderr)
+
+    try:
+        while True:
+            conn, _ = listener.accept()
+            try:
+                # A client that stalls mid-handshake must not hold up the next launch
+                conn.settimeout(RECEIVE_TIMEOUT)
+                spawn(conn, listener, make_app)
+            except OSError as e:
+                print(f"session failed: {e}", file=sys.stderr)
+            finally:
+                conn.close()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        os.unlink(socket_path)
+
+def spawn(conn, listener, make_app):
+    """Receive a client's terminal and fork a session onto it"""
+    import socket
+    message, fds, _flags, _addr = socket.recv_fds(conn, HEADER.size, 3)
+    try:
+        if len(message) < HEADER.size or len(fds) != 3:
+            return
+        env = recv_exact(conn, HEADER.unpack(message)[0])
+        if os.fork() == 0:
+            listener.close()
+            conn.settimeout(None)
+            run_child(conn, fds, env, make_app)
+    finally:
+        for fd in fds:
+            os.close(fd)
+
+def run_child(conn, fds, env, make_app):
+    """Become the client's session, never returns"""
+    import signal
+    status = 1
+    try:
+        # Only the child writes to conn, so its pid always arrives before its status
+        conn.sendall(HEADER.pack(os.getpid()))
+        os.setsid()
+        for name in ("SIGCHLD",) + FORWARDED[1:]:
+            signal.signal(getattr(signal, name), signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+        os.environ.clear()
+        for item in env.decode("utf-8", "surrogateescape").split("\0"):
+            key, sep, value = item.partition("=")
+            if sep:
+                os.environ[key] = value
+        make_app().run()
+        status = 0
+    except SystemExit as e:
+        status = e.code if isinstance(e.code, int) else 1
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            conn.sendall(bytes([status & 0xFF]))
+        except OSError:
+            pass
+        os._exit(status)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""Multiplayer Snake on one shared board
+
+SnakeArena runs every player's snake with the rules of SnakeEngine.
+Snakes move one cell per tick, leaving the board or entering an occupied
+cell is fatal, reversing is ignored and food is worth 10 points. Two
+heads entering the same cell both crash. One SnakeBoard works as the
+occupancy grid for all players and ``owner`` says whose cell it is, so
+collisions cost one lookup no matter how many snakes there are. Every
+tick records the cells it changed.
+
+ArenaServer drives the arena from a single tick loop and serves it over a
+telnet-compatible socket:
+
+    python3 core/main.py --arena :2424
+    telnet localhost 2424        # WASD or arrows, R to respawn, Q to quit
+
+A tick's changed cells are encoded once and the same bytes go to every
+client, which only adds its own status line. A client whose socket
+backs up gets no diffs until it drains, then one full frame.
+
+Load test with local socket clients, all in one process:
+
+    python3 games/_arena.py --bots 100 [--seconds 10] [--size 78x19]
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+from array import array
+from collections import deque
+
+CORE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "core")
+if CORE_PATH not in sys.path:
+    sys.path.append(CORE_PATH)
+
+from _snake_engine import SnakeBoard, OPPOSITE, next_cell
+from ansi import compact_sgr
+from metrics import METRICS
+from server import strip_telnet, IAC, WILL
+
+EMPTY = 0
+FOOD = -1  # owner of a food cell, snakes own cells with their positive id
+
+ECHO, SGA = 1, 3  # telnet options that switch clients to character mode
+# Arrows come as ESC [ x, or as ESC O x from terminals in application cursor mode
+KEYS = {'w': 'UP', 's': 'DOWN', 'a': 'LEFT', 'd': 'RIGHT',
+        '\x1b[A': 'UP', '\x1b[B': 'DOWN', '\x1b[D': 'LEFT', '\x1b[C': 'RIGHT',
+        '\x1bOA': 'UP', '\x1bOB': 'DOWN', '\x1bOD': 'LEFT', '\x1bOC': 'RIGHT',
+        'r': 'RESPAWN', 'q': 'QUIT', '\x03': 'QUIT', '\x04': 'QUIT'}
+
+class ArenaSnake:
+    """One player's snake"""
+
+    def __init__(self, snake_id, name):
+        self.id = snake_id
+        self.name = name
+        self.body = deque()  # packed cells, head first
+        self.direction = 'RIGHT'
+        self.next_direction = 'RIGHT'
+        self.alive = False
+        self.score = 0
+
+    def turn(self, direction):
+        """Queue a direction for the next tick, reversing is ignored"""
+        if self.direction != OPPOSITE[direction]:
+            self.next_direction = direction
+
+class SnakeArena:
+    """Shared board state for many snakes, advanced by step()"""
+
+    def __init__(self, width=78, height=19, seed=None, food_ratio=0.5):
+        self.width = width
+        self.height = height
+        self.rng = random.Random(seed)
+        self.food_ratio = food_ratio  # food items kept on the board per player
+        self.board = SnakeBoard(width, height)
+        self.owner = array('i', bytes(4 * width * height))
+        self.snakes = {}
+        self.next_id = 1
+        self.food = 0
+        self.tick = 0
+        self.changed = set()  # cells changed since the last take_changes()
+
+    def set_cell(self, cell, owner):
+        """Give a cell to a snake, to food or back to the free space"""
+        old = self.owner[cell]
+        if old == owner:
+            return
+        if old == EMPTY:
+            self.board.occupy(cell)
+        elif owner == EMPTY:
+            self.board.release(cell)
+        self.owner[cell] = owner
+        self.changed.add(cell)
+
+    def join(self, name=""):
+        """Add a player, returns their snake"""
+        snake = ArenaSnake(self.next_id, name or f"P{self.next_id}")
+        self.next_id += 1
+        self.snakes[snake.id] = snake
+        self.spawn(snake)
+        return snake
+
+    def spawn(self, snake):
+        """Put a snake on a free cell with room ahead, False if there is none"""
+        for _ in range(20):
+            cell = self.board.random_free(self.rng)
+            if cell is None:
+                return False
+            for direction in self.rng.sample(list(OPPOSITE), 4):
+                ahead = cell
+                for _ in range(3):
+                    ahead = next_cell(ahead, direction, self.width, self.height)
+                    if ahead is None or self.owner[ahead] > EMPTY:
+                        break
+                else:
+                    snake.body = deque((cell,))
+                    snake.direction = snake.next_direction = direction
+                    snake.alive = True
+                    snake.score = 0
+                    if self.owner[cell] == FOOD:
+                        self.food -= 1
+                    self.set_cell(cell, snake.id)
+                    return True
+        return False
+
+    def leave(self, snake):
+        """Remove a player and their snake"""
+        self.kill(snake)
+        self.snakes.pop(snake.id, None)
+
+    def kill(self, snake):
+        """Take a crashed snake off the board"""
+        snake.alive = False
+        for cell in snake.body:
+            self.set_cell(cell, EMPTY)
+        snake.body.clear()
+
+    def refill_food(self):
+        """Keep food_ratio food items per player on the board"""
+        wanted = max(1, int(len(self.snakes) * self.food_ratio))
+        while self.food < wanted:
+            cell = self.board.random_free(self.rng)
+            if cell is None:
+                return
+            self.set_cell(cell, FOOD)
+            self.food += 1
+
+    def step(self):
+        """Advance every snake one tick, returns the snakes that crashed"""
+        self.tick += 1
+        width, height, owner = self.width, self.height, self.owner
+        crashed = []
+        targets = {}  # new head cell -> snakes moving there
+        for snake in self.snakes.values():
+            if not snake.alive:
+                continue
+            snake.direction = snake.next_direction
+            cell = next_cell(snake.body[0], snake.direction, width, height)
+            if cell is None or owner[cell] > EMPTY:
+                crashed.append(snake)
+            elif cell in targets:
+                targets[cell].append(snake)
+            else:
+                targets[cell] = [snake]
+
+        for cell, movers in targets.items():
+            if len(movers) > 1:
+                crashed.extend(movers)  # head-on collision
+                continue
+            snake = movers[0]
+            self.changed.add(snake.body[0])  # the old head is drawn as body now
+            ate = owner[cell] == FOOD
+            snake.body.appendleft(cell)
+            self.set_cell(cell, snake.id)
+            if ate:
+                snake.score += 10
+                self.food -= 1
+            else:
+                self.set_cell(snake.body.pop(), EMPTY)
+
+        for snake in crashed:
+            self.kill(snake)
+        self.refill_food()
+        return crashed
+
+    def take_changes(self):
+        """Cells changed since the last call, sorted"""
+        changed = sorted(self.changed)
+        self.changed.clear()
+        return changed
+
+class ArenaServer:
+    """Runs the arena's tick loop and fans the changes out to the clients"""
+
+    COLORS = ('\033[32m', '\033[33m', '\033[34m', '\033[35m', '\033[36m', '\033[37m')
+    BOARD_TOP = 4       # screen row of the first board line
+    MAX_BACKLOG = 65536  # unsent bytes after which a client's diffs are skipped
+
+    def __init__(self, arena, tick_rate=10, max_players=200):
+        self.arena = arena
+        self.tick_rate = tick_rate
+        self.max_players = max_players
+        self.clients = {}  # ArenaSnake -> ArenaClient
+        self.server = None
+        self.header = None  # title line as last sent
+        self.tick_times = []
+
+    async def start(self, host, port):
+        """Start listening, returns the bound (host, port)"""
+        self.server = await asyncio.start_server(self.handle_client, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def run(self):
+        """Tick until cancelled, on a fixed cadence"""
+        loop = asyncio.get_running_loop()
+        interval = 1 / self.tick_rate
+        next_tick = loop.time() + interval
+        while True:
+            await asyncio.sleep(max(0, next_tick - loop.time()))
+            start = time.perf_counter()
+            self.tick()
+            elapsed = time.perf_counter() - start
+            self.tick_times.append(elapsed)
+            if METRICS.enabled:
+                METRICS.observe("arena_tick_seconds", elapsed)
+            next_tick += interval
+            if next_tick < loop.time():
+                next_tick = loop.time() + interval  # fell behind, don't burst
+
+    def tick(self):
+        """Advance the arena and send every client this tick's diff"""
+        self.arena.step()
+        diff = self.render_cells(self.arena.take_changes())
+        header = self.render_header()
+        if header != self.header:
+            diff = header + diff
+            self.header = header
+        full = None
+        for snake, client in self.clients.items():
+            transport = client.writer.transport
+            if transport.is_closing():
+                continue
+            if transport.get_write_buffer_size() > self.MAX_BACKLOG:
+                client.stale = True  # catch up with a full frame once drained
+                continue
+            if client.stale:
+                if full is None:
+                    full = self.render_full() + header
+                frame = full
+                client.stale = False
+                client.status = None
+            else:
+                frame = diff
+            status = self.render_status(snake)
+            if status != client.status:
+                frame = frame + status
+                client.status = status
+            if frame:
+                client.writer.write(frame)
+
+    def render_cells(self, cells):
+        """Escape sequences that draw the given cells as they are now, as bytes"""
+        if not cells:
+            return b""
+        arena = self.arena
+        width, owner, snakes = arena.width, arena.owner, arena.snakes
+        parts = []
+        last = None
+        for cell in cells:
+            y, x = divmod(cell, width)
+            if last != cell - 1 or x == 0:
+                parts.append(f"\033[{self.BOARD_TOP + y};{x + 2}H")
+            last = cell
+            who = owner[cell]
+            if who == EMPTY:
+                parts.append(' ')
+            elif who == FOOD:
+                parts.append('\033[1;31m*\033[0m')
+            else:
+                head = snakes[who].body[0] == cell
+                bold = '\033[1m' if head else ''
+                parts.append(f"{bold}{self.COLORS[who % len(self.COLORS)]}{'O' if head else 'o'}\033[0m")
+        return compact_sgr(''.join(parts)).encode()
+
+    def render_header(self):
+        """Title line, as bytes"""
+        alive = sum(1 for s in self.arena.snakes.values() if s.alive)
+        return (f"\033[1;1H\033[1;32mSNAKE ARENA\033[0m - {len(self.arena.snakes)} players,"
+                f" {alive} alive\033[K").encode()
+
+    def render_full(self):
+        """Whole screen: clear, border and every occupied cell, as bytes"""
+        arena = self.arena
+        border = '\033[34m' + '#' * (arena.width + 2) + '\033[0m'
+        parts = ["\033[2J", f"\033[{self.BOARD_TOP - 1};1H{border}"]
+        for y in range(arena.height):
+            parts.append(f"\033[{self.BOARD_TOP + y};1H\033[34m#\033[{arena.width}C#\033[0m")
+        parts.append(f"\033[{self.BOARD_TOP + arena.height};1H{border}")
+        occupied = [cell for cell, who in enumerate(arena.owner) if who != EMPTY]
+        return compact_sgr(''.join(parts)).encode() + self.render_cells(occupied)
+
+    def render_status(self, snake):
+        """The client's own status line, as bytes"""
+        color = self.COLORS[snake.id % len(self.COLORS)]
+        state = (f"score {snake.score}" if snake.alive
+                 else "crashed, R to respawn")
+        return (f"\033[2;1H{color}{snake.name}\033[0m: {state}"
+                f" | WASD to move, Q to quit\033[K\033[{self.BOARD_TOP + self.arena.height + 1};1H").encode()
+
+    async def handle_client(self, reader, writer):
+        """Add a player for the connection and apply their keys"""
+        if len(self.clients) >= self.max_players:
+            writer.write(b"Arena full, please try again later.\r\n")
+            writer.close()
+            return
+        # Character mode: the server echoes (nothing) and no line buffering
+        writer.write(bytes((IAC, WILL, ECHO, IAC, WILL, SGA)) + b"\033[?25l")
+        snake = self.arena.join()
+        self.clients[snake] = ArenaClient(writer)
+        try:
+            while True:
+                data = await reader.read(256)
+                if not data:
+                    break
+                text = strip_telnet(data).decode('utf-8', errors='replace')
+                leaving = False
+                for key in self.parse_keys(text):
+                    if key == 'QUIT':
+                        leaving = True
+                        break
+                    if key == 'RESPAWN':
+                        if not snake.alive:
+                            self.arena.spawn(snake)
+                    else:
+                        snake.turn(key)
+                if leaving:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.pop(snake, None)
+            self.arena.leave(snake)
+            try:
+                writer.write(b"\033[?25h\033[2J\033[H")
+                writer.close()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    def parse_keys(text):
+        """Keys in a chunk of client input, in order: directions, 'RESPAWN' and 'QUIT'"""
+        keys = []
+        i = 0
+        while i < len(text):
+            if text[i:i + 3] in KEYS:
+                keys.append(KEYS[text[i:i + 3]])
+                i += 3
+                continue
+            if text[i].lower() in KEYS:
+                keys.append(KEYS[text[i].lower()])
+            i += 1
+        return keys
+
+class ArenaClient:
+    """Per-connection send state"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.stale = True  # the first frame is a full one
+        self.status = None
+
+def serve_arena(host, port, size=(78, 19), tick_rate=10):
+    """Run an arena server until interrupted"""
+    async def main():
+        server = ArenaServer(SnakeArena(*size), tick_rate)
+        bound_host, bound_port = await server.start(host, port)
+        print(f"Snake arena on {bound_host}:{bound_port}, {tick_rate} ticks/s")
+        async with server.server:
+            await server.run()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\nArena stopped.")
+
+async def bot(host, port, stop, rng):
+    """Local socket client that steers at random and respawns, returns bytes received"""
+    reader, writer = await asyncio.open_connection(host, port)
+    received = 0
+    keys = [b'w', b'a', b's', b'd']
+    while not stop.is_set():
+        try:
+            data = await asyncio.wait_for(reader.read(65536), 0.1)
+        except asyncio.TimeoutError:
+            data = b""
+        received += len(data)
+        if b"respawn" in data:
+            writer.write(b'r')
+        elif rng.random() < 0.2:
+            writer.write(rng.choice(keys))
+    writer.write(b'q')
+    writer.close()
+    return received
+
+def main():
+    bots = int(sys.argv[sys.argv.index("--bots") + 1]) if "--bots" in sys.argv else 100
+    seconds = float(sys.argv[sys.argv.index("--seconds") + 1]) if "--seconds" in sys.argv else 10
+    size = sys.argv[sys.argv.index("--size") + 1] if "--size" in sys.argv else "78x19"
+    width, height = (int(v) for v in size.lower().split("x"))
+
+    async def run():
+        server = ArenaServer(SnakeArena(width, height, seed=1), max_players=bots)
+        host, port = await server.start("127.0.0.1", 0)
+        ticker = asyncio.create_task(server.run())
+        stop = asyncio.Event()
+        rng = random.Random(1)
+        clients = [asyncio.create_task(bot(host, port, stop, rng)) for _ in range(bots)]
+        await asyncio.sleep(seconds)
+        stop.set()
+        received = sum(await asyncio.gather(*clients))
+        ticker.cancel()
+        server.server.close()
+        return server, received
+
+    server, received = asyncio.run(run())
+    times = sorted(server.tick_times)
+    if not times:
+        print(f"{bots} bots on {width}x{height}: no ticks in {seconds:.0f}s")
+        return
+    print(f"{bots} bots on {width}x{height}: {len(times)} ticks in {seconds:.0f}s "
+          f"({len(times) / seconds:.1f}/s), {received / len(times) / bots:.0f} bytes per client tick")
+    print(f"tick time p50 {times[len(times) // 2] * 1e3:.2f}ms, "
+          f"p99 {times[int(len(times) * 0.99)] * 1e3:.2f}ms, max {times[-1] * 1e3:.2f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Snake autopilot for the attract-mode demo and as a synthetic player
+
+Autopilot.choose() picks the direction for the next tick of a
+SnakeEngine. The work per tick is bounded, so decisions stay cheap on
+huge boards with long snakes:
+
+* A breadth-first distance field grows outward from the food by a fixed
+  number of cells per tick, and is only restarted when new food appears.
+  Once the field reaches the head, the snake walks down it and takes the
+  shortest path around its body. Until then it heads straight for the
+  food.
+* Before entering a cell next to an obstacle, a bounded flood fill checks
+  that the snake can still reach its tail, or at least has room for its
+  whole length. Moves that pass are preferred, so the snake doesn't wall
+  itself in. Cells in open space skip the check, because they cannot
+  split the free area.
+
+Run it headless to measure decision times on a large board:
+
+    python3 games/_autopilot.py [--size 500x500] [--ticks 20000] [--seed N]
+"""
+
+import sys
+import time
+from array import array
+from collections import deque
+
+from _snake_engine import SnakeEngine, OPPOSITE
+
+class Autopilot:
+    """Steers a SnakeEngine toward its food without trapping itself"""
+
+    FIELD_BUDGET = 500   # distance field cells expanded per tick
+    SPACE_LIMIT = 400    # flood fill cells after which a region counts as roomy
+
+    def __init__(self, engine):
+        self.engine = engine
+        width, height = engine.width, engine.height
+        self.width = width
+        cells = width * height
+        # Distance to the food, valid where stamp equals the current generation
+        self.dist = array('i', bytes(4 * cells))
+        self.stamp = array('I', bytes(4 * cells))
+        self.generation = 0
+        self.frontier = deque()
+        self.target = None
+        # Visited marks of the safety flood fill, same scheme
+        self.seen = array('I', bytes(4 * cells))
+        self.seen_generation = 0
+
+    def neighbours(self, cell):
+        """(direction, cell) pairs of the in-bounds cells next to cell"""
+        width = self.width
+        x = cell % width
+        out = []
+        if cell >= width:
+            out.append(('UP', cell - width))
+        if cell + width < len(self.dist):
+            out.append(('DOWN', cell + width))
+        if x:
+            out.append(('LEFT', cell - 1))
+        if x + 1 < width:
+            out.append(('RIGHT', cell + 1))
+        return out
+
+    def restart_field(self):
+        """Start a new distance field from the current food"""
+        self.generation += 1
+        self.target = self.engine.food
+        self.frontier.clear()
+        if self.target is not None:
+            self.stamp[self.target] = self.generation
+            self.dist[self.target] = 0
+            self.frontier.append(self.target)
+
+    def grow_field(self, budget):
+        """Expand the distance field by up to budget cells"""
+        frontier = self.frontier
+        pop, push = frontier.popleft, frontier.append
+        dist, stamp, generation = self.dist, self.stamp, self.generation
+        occupied = self.engine.board.occupied
+        width = self.width
+        cells = len(dist)
+        for _ in range(budget):
+            if not frontier:
+                break
+            cell = pop()
+            d = dist[cell] + 1
+            x = cell % width
+            for n in (cell - width, cell + width, cell - 1 if x else -1,
+                      cell + 1 if x + 1 < width else -1):
+                if 0 <= n < cells and stamp[n] != generation and not occupied[n]:
+                    stamp[n] = generation
+                    dist[n] = d
+                    push(n)
+
+    def choose(self):
+        """Direction for the next tick"""
+        engine = self.engine
+        if engine.food != self.target:
+            self.restart_field()
+        self.grow_field(self.FIELD_BUDGET)
+
+        board = engine.board
+        head = board.body[0]
+        occupied = board.occupied
+        width = self.width
+        food_x, food_y = engine.food % width, engine.food // width
+        candidates = []
+        for direction, cell in self.neighbours(head):
+            if occupied[cell] or direction == OPPOSITE[engine.direction]:
+                continue
+            if self.stamp[cell] == self.generation:
+                rank = self.dist[cell]
+            elif self.frontier:
+                rank = len(self.dist) + abs(cell % width - food_x) + abs(cell // width - food_y)
+            else:
+                rank = 2 * len(self.dist)  # the field is complete, food is unreachable from here
+            candidates.append((rank, direction != engine.direction, direction, cell))
+        if not candidates:
+            return engine.direction  # boxed in, nothing left to decide
+        candidates.sort()
+        if candidates[0][0] >= 2 * len(self.dist):
+            # The body cut the food off when the field was built, look again
+            self.restart_field()
+
+        # Best ranked move that keeps the tail in reach, else the one with the most room
+        best = None
+        for _rank, _turn, direction, cell in candidates:
+            room = self.room(cell, head)
+            if room is None:
+                return direction
+            if best is None or room > best[0]:
+                best = (room, direction)
+        return best[1]
+
+    def room(self, cell, head):
+        """None if moving the head to cell is safe, else the free space it leaves"""
+        board = self.engine.board
+        occupied = board.occupied
+        width = self.width
+        cells = len(self.dist)
+        x = cell % width
+        # A cell with nothing but free space around it can't cut off a region
+        neck = board.body[1] if len(board.body) > 1 else head
+        if 0 < x < width - 1 and width <= cell < cells - width:
+            for n in (cell - width - 1, cell - width, cell - width + 1, cell - 1,
+                      cell + 1, cell + width - 1, cell + width, cell + width + 1):
+                if occupied[n] and n != head and n != neck:
+                    break
+            else:
+                return None
+
+        # Bounded flood fill from cell, with the head's new position blocked
+        self.seen_generation += 1
+        seen, generation = self.seen, self.seen_generation
+        tail = board.body[-1]
+        need = min(len(board.body) + 1, self.SPACE_LIMIT)
+        seen[cell] = generation
+        queue = deque((cell,))
+        count = 0
+        while queue:
+            current = queue.popleft()
+            count += 1
+            if count >= need:
+                return None
+            x = current % width
+            for n in (current - width, current + width, current - 1 if x else -1,
+                      current + 1 if x + 1 < width else -1):
+                if not 0 <= n < cells or seen[n] == generation:
+                    continue
+                if n == tail:
+                    return None  # following the tail always frees the way back
+                seen[n] = generation
+                if not occupied[n]:
+                    queue.append(n)
+        return count
+
+def main():
+    size = sys.argv[sys.argv.index("--size") + 1] if "--size" in sys.argv else "500x500"
+    ticks = int(sys.argv[sys.argv.index("--ticks") + 1]) if "--ticks" in sys.argv else 20000
+    seed = int(sys.argv[sys.argv.index("--seed") + 1]) if "--seed" in sys.argv else 1
+    width, height = (int(v) for v in size.lower().split("x"))
+
+    engine = SnakeEngine(width, height, seed)
+    pilot = Autopilot(engine)
+    times = []
+    while engine.alive and engine.tick < ticks:
+        start = time.perf_counter()
+        engine.turn(pilot.choose())
+        times.append(time.perf_counter() - start)
+        engine.step()
+
+    times.sort()
+    print(f"{width}x{height}: {engine.tick} ticks, score {engine.score}, "
+          f"length {len(engine.snake)}, {'alive' if engine.alive else 'crashed'}")
+    print(f"decision time p50 {times[len(times) // 2] * 1e3:.3f}ms, "
+          f"p99 {times[int(len(times) * 0.99)] * 1e3:.3f}ms, max {times[-1] * 1e3:.3f}ms")
+
+if __name__ == "__main__":
+    main()
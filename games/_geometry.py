@@ -0,0 +1,128 @@
+"""Terminal size shared by the games
+
+The size is read once and then only again when the terminal reports a
+change: on POSIX the SIGWINCH handler re-reads it (one ioctl, no child
+process), on Windows poll() looks at most once per check_interval.
+Renderers subscribe a callback and call poll() once per frame; the
+callback then runs at that safe point with the new (cols, rows), never
+in the middle of building a frame.
+"""
+
+import os
+import signal
+import sys
+import threading
+import time
+
+DEFAULT_SIZE = (80, 24)
+
+class TerminalGeometry:
+    """Cached terminal size with resize notifications"""
+
+    def __init__(self, fd=None, default=DEFAULT_SIZE, check_interval=1.0):
+        self.fd = fd
+        self.default = default
+        self.check_interval = check_interval
+        self.listeners = []
+        self.size = self.read_size()
+        self.changed = False
+        self.checked_at = time.monotonic()
+        self.previous_handler = None
+        self.watching = False
+
+    @property
+    def cols(self):
+        return self.size[0]
+
+    @property
+    def rows(self):
+        return self.size[1]
+
+    def read_size(self):
+        """Ask the terminal for its size, default if there is no terminal"""
+        fd = self.fd
+        if fd is None:
+            stream = sys.__stdout__
+            try:
+                fd = stream.fileno() if stream else None
+            except (AttributeError, OSError, ValueError):
+                fd = None
+        if fd is None:
+            return self.default
+        try:
+            cols, rows = os.get_terminal_size(fd)
+        except (AttributeError, OSError, ValueError):
+            return self.default
+        if cols <= 0 or rows <= 0:
+            return self.default
+        return cols, rows
+
+    def watch(self):
+        """Install the SIGWINCH handler, returns False where there is none"""
+        if self.watching:
+            return True
+        if not hasattr(signal, 'SIGWINCH'):
+            return False
+        if threading.current_thread() is not threading.main_thread():
+            return False  # signal handlers can only be set from the main thread
+        self.previous_handler = signal.signal(signal.SIGWINCH, self.on_signal)
+        self.watching = True
+        return True
+
+    def unwatch(self):
+        """Put back the handler that was there before watch()"""
+        if self.watching:
+            signal.signal(signal.SIGWINCH, self.previous_handler or signal.SIG_DFL)
+            self.watching = False
+
+    def on_signal(self, signum, frame):
+        """SIGWINCH: remember the new size, listeners hear about it in poll()"""
+        size = self.read_size()
+        if size != self.size:
+            self.size = size
+            self.changed = True
+        if callable(self.previous_handler):
+            self.previous_handler(signum, frame)
+
+    def subscribe(self, callback):
+        """Call callback(cols, rows) from poll() whenever the size changes"""
+        if callback not in self.listeners:
+            self.listeners.append(callback)
+        self.watch()
+
+    def unsubscribe(self, callback):
+        """Stop notifying callback"""
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def poll(self):
+        """Notify listeners of a pending resize, returns True if there was one
+
+        Cheap enough to call every frame: without a resize it only checks
+        a flag (and on Windows the clock).
+        """
+        if not self.watching:
+            now = time.monotonic()
+            if now - self.checked_at >= self.check_interval:
+                self.checked_at = now
+                size = self.read_size()
+                if size != self.size:
+                    self.size = size
+                    self.changed = True
+        if not self.changed:
+            return False
+        self.changed = False
+        cols, rows = self.size
+        for callback in list(self.listeners):
+            callback(cols, rows)
+        return True
+
+_shared = None
+
+def terminal_geometry():
+    """The process-wide geometry of the controlling terminal"""
+    global _shared
+    if _shared is None:
+        _shared = TerminalGeometry()
+        _shared.watch()
+    return _shared
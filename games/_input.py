@@ -0,0 +1,184 @@
+"""Non-blocking keyboard input shared by the games
+
+KeyReader drains everything the terminal has sent with one read and
+decodes it into key events: single characters (UTF-8 aware), 'UP',
+'DOWN', 'LEFT', 'RIGHT', 'ENTER' and 'ESC'. An Escape byte that isn't
+followed by the rest of a sequence within esc_timeout counts as the
+Escape key, so a lone Escape never blocks a game. wait() sleeps in
+select() until a key arrives or the caller's deadline passes, which is
+what bounds input latency, not a polling interval. Once the terminal
+hangs up and the keys already read are handed out, wait() raises
+EOFError, the same as input() does.
+"""
+
+import codecs
+import os
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Platform-specific imports
+if sys.platform == 'win32':
+    import msvcrt
+else:
+    import select
+    import termios
+    import tty
+
+ARROWS = {'A': 'UP', 'B': 'DOWN', 'C': 'RIGHT', 'D': 'LEFT'}
+# Windows console scan codes -> final byte of the matching ANSI sequence
+WINDOWS_ARROWS = {'H': 'A', 'P': 'B', 'M': 'C', 'K': 'D'}
+
+class KeyReader:
+    """Decodes terminal input into a queue of key events"""
+
+    def __init__(self, fd=None, esc_timeout=0.05):
+        self.is_windows = sys.platform == 'win32'
+        self.fd = sys.stdin.fileno() if fd is None and not self.is_windows else fd
+        self.esc_timeout = esc_timeout
+        self.queue = deque()
+        self.partial = ''  # start of an escape sequence still being received
+        self.partial_since = 0.0
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.eof = False
+
+    @contextmanager
+    def raw(self, cbreak=False):
+        """Put a POSIX terminal into raw mode for the duration of the block
+
+        cbreak only turns off line buffering and echo, so output keeps its
+        newline translation and Ctrl+C still interrupts.
+        """
+        if self.is_windows or not os.isatty(self.fd):
+            yield self
+            return
+        old_settings = termios.tcgetattr(self.fd)
+        try:
+            if cbreak:
+                tty.setcbreak(self.fd)
+            else:
+                tty.setraw(self.fd)
+            yield self
+        finally:
+            termios.tcsetattr(self.fd, termios.TCSADRAIN, old_settings)
+
+    def wait(self, timeout):
+        """Keys pressed so far, waiting up to timeout seconds for the first one"""
+        if not self.queue:
+            self.fill(timeout)
+        if not self.queue and self.eof:
+            raise EOFError("terminal input closed")
+        keys = list(self.queue)
+        self.queue.clear()
+        return keys
+
+    def keys(self):
+        """Keys pressed so far, without waiting"""
+        return self.wait(0)
+
+    def fill(self, timeout):
+        """Read and decode whatever arrives within timeout"""
+        deadline = time.monotonic() + max(timeout, 0)
+        while True:
+            now = time.monotonic()
+            wait = deadline - now
+            if self.partial:
+                # Don't wait past the point where a pending ESC becomes a key
+                wait = min(wait, self.partial_since + self.esc_timeout - now)
+            data = self.read(max(wait, 0))
+            if data:
+                self.feed(data)
+            self.expire_partial()
+            if self.queue or self.eof or time.monotonic() >= deadline:
+                return
+
+    def read(self, timeout):
+        """Text available within timeout, '' if none"""
+        if self.is_windows:
+            return self.read_console(timeout)
+        if self.eof or not select.select([self.fd], [], [], timeout)[0]:
+            return ''
+        try:
+            data = os.read(self.fd, 4096)
+        except (BlockingIOError, InterruptedError):
+            return ''
+        if not data:
+            # Hung up: select() keeps reporting the fd readable from now on
+            self.eof = True
+            if self.partial:
+                self.partial_since = 0.0  # a trailing ESC won't be completed
+            return self.decoder.decode(b'', final=True)
+        return self.decoder.decode(data)
+
+    def read_console(self, timeout):
+        """Windows console keys within timeout, arrows translated to ANSI sequences"""
+        deadline = time.monotonic() + timeout
+        while not msvcrt.kbhit():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return ''
+            time.sleep(min(remaining, 0.01))
+        chars = []
+        while msvcrt.kbhit():
+            char = msvcrt.getwch()
+            if char in ('\x00', '\xe0'):  # special key, the code follows
+                code = msvcrt.getwch()
+                if code in WINDOWS_ARROWS:
+                    chars.append('\x1b[' + WINDOWS_ARROWS[code])
+                continue
+            chars.append(char)
+        return ''.join(chars)
+
+    def feed(self, text):
+        """Decode text into key events"""
+        resumed = self.partial  # its clock keeps running
+        text = resumed + text
+        self.partial = ''
+        i = 0
+        length = len(text)
+        while i < length:
+            char = text[i]
+            if char != '\x1b':
+                self.queue.append('ENTER' if char in '\r\n' else char)
+                i += 1
+                continue
+            # ESC [ ... final, or ESC O x for application cursor keys
+            if i + 1 >= length:
+                self.hold(text[i:], resumed)
+                return
+            kind = text[i + 1]
+            if kind == '[':
+                end = i + 2
+                while end < length and not ('@' <= text[end] <= '~'):
+                    end += 1
+                if end >= length:
+                    self.hold(text[i:], resumed)
+                    return
+                self.queue.append(ARROWS.get(text[end], 'UNKNOWN') if end == i + 2
+                                  or text[i + 2:end] == '1' else 'UNKNOWN')
+                i = end + 1
+            elif kind == 'O':
+                if i + 2 >= length:
+                    self.hold(text[i:], resumed)
+                    return
+                self.queue.append(ARROWS.get(text[i + 2], 'UNKNOWN'))
+                i += 3
+            else:
+                self.queue.append('ESC')  # Escape followed by an ordinary key
+                i += 1
+
+    def hold(self, sequence, resumed=''):
+        """Keep an incomplete escape sequence for the next read"""
+        if not (resumed and sequence.startswith(resumed)):
+            self.partial_since = time.monotonic()
+        self.partial = sequence
+
+    def expire_partial(self):
+        """Turn a stale incomplete sequence into ESC plus ordinary keys"""
+        if self.partial and time.monotonic() - self.partial_since >= self.esc_timeout:
+            rest = self.partial[1:]
+            self.partial = ''
+            self.queue.append('ESC')
+            if rest:
+                self.feed(rest.replace('\x1b', ''))
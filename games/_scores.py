@@ -0,0 +1,203 @@
+"""High score storage shared by concurrent game sessions
+
+Scores live in two files next to each other:
+
+* the snapshot (``snake_scores.json``), a JSON list with the top entries,
+  only ever replaced atomically through a temp file and ``os.replace``;
+* the log (``snake_scores.log``), one JSON object per line, only ever
+  appended to.
+
+Finishing a game appends one line under an exclusive lock. Readers merge
+snapshot and log into a cached top-N and afterwards only read log lines
+that were appended since. Once the log grows past a limit it is folded
+into a new snapshot and truncated. Every entry carries a unique id, so a
+crash between writing the snapshot and truncating the log cannot count a
+score twice, and a torn last log line is simply skipped. Entries that fall
+out of the top-N at that point are passed to on_drop, so whatever was
+kept alongside them can go too.
+"""
+
+import json
+import os
+import sys
+import uuid
+
+if sys.platform == 'win32':
+    import msvcrt
+else:
+    import fcntl
+
+def lock(fd, exclusive=True):
+    """Block until fd is locked"""
+    if sys.platform == 'win32':
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+def unlock(fd):
+    """Release a lock taken with lock()"""
+    if sys.platform == 'win32':
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+class ScoreStore:
+    """Append-only high score log with an atomically compacted snapshot"""
+
+    def __init__(self, path, limit=10, compact_bytes=16384, on_drop=None):
+        self.path = path
+        self.log_path = os.path.splitext(path)[0] + ".log"
+        self.limit = limit
+        self.compact_bytes = compact_bytes
+        self.on_drop = on_drop   # called with each entry compaction drops
+        self.entries = None      # cached top-N, best first
+        self.snapshot_id = None  # (inode, mtime, size) of the snapshot we loaded
+        self.log_offset = 0      # log bytes already merged into entries
+
+    def open_log(self):
+        """Open the log for appending, creating it if needed"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        return os.open(self.log_path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def top(self, refresh=True):
+        """Best entries as a list of {"name", "score"} dicts"""
+        if self.entries is None or refresh:
+            self.refresh()
+        return self.entries
+
+    def best(self):
+        """Highest score seen so far, without touching the disk once loaded"""
+        entries = self.top(refresh=self.entries is None)
+        return entries[0]["score"] if entries else 0
+
+    def add(self, name, score):
+        """Record a finished game with a single append, returns the entry id"""
+        entry = {"name": name, "score": score, "id": uuid.uuid4().hex}
+        line = (json.dumps(entry) + "\n").encode('utf-8')
+        fd = self.open_log()
+        try:
+            lock(fd)
+            try:
+                size = os.fstat(fd).st_size
+                if size > 0:
+                    os.lseek(fd, size - 1, os.SEEK_SET)
+                    if os.read(fd, 1) != b"\n":
+                        line = b"\n" + line  # seal a line torn by a crashed writer
+                os.write(fd, line)
+                size = os.fstat(fd).st_size
+                if size >= self.compact_bytes:
+                    self.compact(fd)
+            finally:
+                unlock(fd)
+        finally:
+            os.close(fd)
+        self.refresh()
+        return entry["id"]
+
+    def refresh(self):
+        """Pick up scores written by other sessions since the last call"""
+        try:
+            fd = os.open(self.log_path, os.O_RDONLY)
+        except FileNotFoundError:
+            fd = None
+        try:
+            if fd is not None:
+                lock(fd, exclusive=False)
+            snapshot_id = self.stat_snapshot()
+            if self.entries is None or snapshot_id != self.snapshot_id:
+                # First load or someone compacted: start over from the snapshot
+                self.entries = self.read_snapshot()
+                self.snapshot_id = snapshot_id
+                self.log_offset = 0
+            if fd is not None:
+                if os.fstat(fd).st_size < self.log_offset:
+                    self.entries = self.read_snapshot()
+                    self.log_offset = 0
+                self.log_offset = self.merge_log(fd, self.log_offset)
+        finally:
+            if fd is not None:
+                unlock(fd)
+                os.close(fd)
+
+    def stat_snapshot(self):
+        """Identity of the current snapshot file, None if there is none"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def read_snapshot(self):
+        """Entries of the snapshot file, tolerating a missing or damaged file"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return []
+        entries = []
+        for i, item in enumerate(data if isinstance(data, list) else []):
+            if isinstance(item, dict) and "score" in item:
+                # Snapshots written before the log existed have no ids
+                item.setdefault("id", f"legacy-{i}")
+                entries.append(item)
+        return self.rank(entries)
+
+    def merge_log(self, fd, offset):
+        """Merge complete log lines after offset, returns the new offset"""
+        new, offset = self.read_log(fd, offset)
+        if new:
+            self.entries = self.rank(self.entries + new)
+        return offset
+
+    def read_log(self, fd, offset):
+        """Entries in complete log lines after offset and the offset past them"""
+        os.lseek(fd, offset, os.SEEK_SET)
+        data = b""
+        while True:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                break
+            data += chunk
+        end = data.rfind(b"\n") + 1  # leave a half-written last line for later
+        new = []
+        for line in data[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn line from a crashed writer
+            if isinstance(entry, dict) and "score" in entry:
+                new.append(entry)
+        return new, offset + end
+
+    def rank(self, entries):
+        """Best `limit` entries, one per id, ties keep their order"""
+        seen = set()
+        unique = []
+        for entry in entries:
+            if entry.get("id") not in seen:
+                seen.add(entry.get("id"))
+                unique.append(entry)
+        unique.sort(key=lambda x: x["score"], reverse=True)
+        return unique[:self.limit]
+
+    def compact(self, fd):
+        """Fold the log into a new snapshot, caller holds the exclusive lock"""
+        candidates = self.read_snapshot() + self.read_log(fd, 0)[0]
+        self.entries = self.rank(candidates)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        os.ftruncate(fd, 0)
+        self.snapshot_id = self.stat_snapshot()
+        self.log_offset = 0
+        if self.on_drop is not None:
+            kept = {entry.get("id") for entry in self.entries}
+            for entry in candidates:
+                if entry.get("id") not in kept:
+                    kept.add(entry.get("id"))  # once per id
+                    self.on_drop(entry)
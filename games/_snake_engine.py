@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""Deterministic Snake engine, input recorder and replayer
+
+The engine holds the whole game state and advances it one tick per
+step() call. It does no I/O, reads no clock and draws food positions from
+its own seeded random.Random, so a seed plus the list of turns made
+before each tick reproduces a game exactly. That lets recorded games be
+replayed headless at full speed:
+
+    python3 games/_snake_engine.py REPLAY.json [--until TICK]
+"""
+
+import json
+import random
+import sys
+import time
+from array import array
+from collections import deque
+
+# step() results
+MOVE = "move"
+EAT = "eat"
+CRASH = "crash"
+FULL = "full"
+
+OPPOSITE = {'UP': 'DOWN', 'DOWN': 'UP', 'LEFT': 'RIGHT', 'RIGHT': 'LEFT'}
+DELTAS = {'UP': (0, -1), 'DOWN': (0, 1), 'LEFT': (-1, 0), 'RIGHT': (1, 0)}
+
+def next_cell(cell, direction, width, height):
+    """Packed cell one step from cell in direction, None past the edge of the board"""
+    y, x = divmod(cell, width)
+    dx, dy = DELTAS[direction]
+    x += dx
+    y += dy
+    if not (0 <= x < width and 0 <= y < height):
+        return None
+    return y * width + x
+
+class SnakeBoard:
+    """Snake body plus board occupancy, all updates O(1)
+
+    Cells are packed as ``y * width + x``. Besides the occupancy bitmap the
+    board keeps every free cell in ``free[:free_count]`` together with the
+    reverse index ``slot``, so occupying, releasing and picking a random
+    free cell never depend on how long the snake is.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.body = deque()  # packed cells, head first
+        self.occupied = bytearray(width * height)
+        self.free = array('i', range(width * height))
+        self.slot = array('i', range(width * height))
+        self.free_count = width * height
+
+    def pack(self, x, y):
+        """Packed cell for board coordinates"""
+        return y * self.width + x
+
+    def unpack(self, cell):
+        """Board coordinates (x, y) for a packed cell"""
+        y, x = divmod(cell, self.width)
+        return x, y
+
+    def swap_free(self, cell, index):
+        """Move cell to position index of the free list"""
+        other = self.free[index]
+        old = self.slot[cell]
+        self.free[index], self.free[old] = cell, other
+        self.slot[cell], self.slot[other] = index, old
+
+    def occupy(self, cell):
+        """Mark a cell as taken by the snake"""
+        self.occupied[cell] = 1
+        self.free_count -= 1
+        self.swap_free(cell, self.free_count)
+
+    def release(self, cell):
+        """Mark a cell as free again"""
+        self.occupied[cell] = 0
+        self.swap_free(cell, self.free_count)
+        self.free_count += 1
+
+    def push_head(self, cell):
+        """Grow the snake at the front"""
+        self.body.appendleft(cell)
+        self.occupy(cell)
+
+    def pop_tail(self):
+        """Drop the last segment and return its cell"""
+        cell = self.body.pop()
+        self.release(cell)
+        return cell
+
+    def random_free(self, rng=random):
+        """Random unoccupied cell, or None when the board is full"""
+        if not self.free_count:
+            return None
+        return self.free[rng.randrange(self.free_count)]
+
+class SnakeEngine:
+    """Complete Snake game state with a deterministic tick function"""
+
+    def __init__(self, width=30, height=15, seed=None):
+        self.width = width
+        self.height = height
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """Start a new game, a None seed picks a fresh random one"""
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.tick = 0
+        self.score = 0
+        self.speed = 0.25  # seconds per tick, shrinks as the snake eats
+        self.alive = True
+
+        self.board = SnakeBoard(self.width, self.height)
+        self.board.push_head(self.board.pack(self.width // 2, self.height // 2))
+        self.direction = 'RIGHT'
+        self.next_direction = 'RIGHT'
+        self.food = None
+        self.place_food()
+
+    @property
+    def snake(self):
+        """Packed body cells, head first"""
+        return self.board.body
+
+    def place_food(self):
+        """Place food on a random free cell, returns False when the board is full"""
+        cell = self.board.random_free(self.rng)
+        if cell is None:
+            return False
+        self.food = cell
+        return True
+
+    def turn(self, direction):
+        """Queue a direction for the next tick, reversing is ignored"""
+        if self.direction != OPPOSITE[direction]:
+            self.next_direction = direction
+
+    def step(self):
+        """Advance one tick, returns MOVE, EAT, CRASH or FULL"""
+        self.tick += 1
+        self.direction = self.next_direction
+        board = self.board
+
+        # Calculate new head position, check collisions
+        new_head = next_cell(board.body[0], self.direction, self.width, self.height)
+        if new_head is None or board.occupied[new_head]:
+            self.alive = False
+            return CRASH
+
+        # Add new head
+        board.push_head(new_head)
+
+        # Check if food eaten
+        if new_head == self.food:
+            self.score += 10
+            self.speed = max(0.1, self.speed - 0.003)  # Gradually increase speed
+            if not self.place_food():
+                self.alive = False  # Board is full, nothing left to eat
+                return FULL
+            return EAT
+        board.pop_tail()  # Remove tail
+        return MOVE
+
+class InputRecorder:
+    """Records the turns fed into an engine so the game can be replayed"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.seed = engine.seed
+        self.inputs = []  # [tick, direction], applied before step number tick + 1
+
+    def turn(self, direction):
+        """Forward a turn to the engine and log it"""
+        self.inputs.append([self.engine.tick, direction])
+        self.engine.turn(direction)
+
+    def to_dict(self, name=""):
+        """Replay log as plain data"""
+        return {
+            "version": 1,
+            "width": self.engine.width,
+            "height": self.engine.height,
+            "seed": self.seed,
+            "inputs": self.inputs,
+            "ticks": self.engine.tick,
+            "score": self.engine.score,
+            "name": name,
+        }
+
+    def save(self, path, name=""):
+        """Write the replay log as JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(name), f, separators=(',', ':'))
+
+def load_replay(path):
+    """Read a replay log written by InputRecorder.save()"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def replay(log, until=None):
+    """Run a recorded game headless, returns the engine at the end
+
+    until stops early after that many ticks, for fast-forwarding to a
+    point of interest.
+    """
+    engine = SnakeEngine(log["width"], log["height"], log["seed"])
+    inputs = log["inputs"]
+    last = log["ticks"] if until is None else min(until, log["ticks"])
+    pending = 0
+    step = engine.step
+    turn = engine.turn
+    while engine.tick < last and engine.alive:
+        while pending < len(inputs) and inputs[pending][0] <= engine.tick:
+            turn(inputs[pending][1])
+            pending += 1
+        step()
+    return engine
+
+def verify(log):
+    """True if replaying the log reproduces its recorded score and length"""
+    engine = replay(log)
+    return engine.score == log["score"] and engine.tick == log["ticks"]
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__.strip().splitlines()[-1].strip())
+        sys.exit(2)
+    log = load_replay(sys.argv[1])
+    until = int(sys.argv[sys.argv.index("--until") + 1]) if "--until" in sys.argv else None
+
+    start = time.perf_counter()
+    engine = replay(log, until)
+    elapsed = time.perf_counter() - start
+
+    print(f"player {log.get('name') or '?'}: {engine.tick} ticks, score {engine.score}")
+    if elapsed:
+        print(f"replayed at {engine.tick / elapsed:,.0f} ticks/s")
+    if until is None:
+        ok = engine.score == log["score"] and engine.tick == log["ticks"]
+        print("recorded score verified" if ok else
+              f"MISMATCH: log claims score {log['score']} after {log['ticks']} ticks")
+        sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Spectators for a running game
+
+With WHOIS_SPECTATE=[HOST]:PORT set, Snake and Matrix Rain accept
+viewers on that TCP port (telnet or nc) and mirror their frames to
+them. The game publishes each frame once, as the bytes it already sent
+to its own terminal, and the hub writes the same bytes to every viewer
+socket without blocking.
+
+A viewer whose socket can't take the whole frame keeps only the
+unsent rest of it. Frames published while that rest is still pending
+are skipped for that viewer. Once the rest drains, the viewer gets one
+keyframe, a full repaint of the current screen, and then continues with
+the diffs. So a slow viewer costs neither memory nor the player's frame
+rate, and the keyframe is built at most once per frame however many
+viewers need it.
+"""
+
+import os
+import socket
+
+from metrics import METRICS
+
+ECHO, SGA, IAC, WILL = 1, 3, 255, 251
+GREETING = bytes((IAC, WILL, ECHO, IAC, WILL, SGA)) + b"\033[?25l\033[2J"
+
+class Viewer:
+    """One spectator connection"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.pending = memoryview(GREETING)  # unsent rest of the last frame
+        self.stale = True  # needs a keyframe before the next diff
+
+class SpectatorHub:
+    """Listens for viewers and fans published frames out to them"""
+
+    MAX_VIEWERS = 64
+
+    def __init__(self, host, port):
+        self.listener = socket.create_server((host or "", port))
+        self.listener.setblocking(False)
+        self.viewers = []
+        self.frames = 0
+        self.skipped = 0
+        self.keyframes = 0
+
+    def accept(self):
+        """Take every viewer waiting to connect"""
+        while True:
+            try:
+                sock, _ = self.listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            if len(self.viewers) >= self.MAX_VIEWERS:
+                sock.close()
+                continue
+            sock.setblocking(False)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.viewers.append(Viewer(sock))
+
+    def publish(self, frame, keyframe):
+        """Mirror a frame to every viewer, keyframe() builds a full repaint if one is needed"""
+        self.accept()
+        if not self.viewers:
+            return
+        if isinstance(frame, str):
+            frame = frame.encode()
+        self.frames += 1
+        full = None
+        for viewer in list(self.viewers):
+            if not self.send(viewer):
+                self.drop(viewer)
+                continue
+            if viewer.pending:
+                viewer.stale = True  # missed this frame, repaint once caught up
+                self.skipped += 1
+                if METRICS.enabled:
+                    METRICS.count("spectator_frames_skipped_total")
+                continue
+            if viewer.stale:
+                if full is None:
+                    full = keyframe()
+                    if isinstance(full, str):
+                        full = full.encode()
+                    self.keyframes += 1
+                    if METRICS.enabled:
+                        METRICS.count("spectator_keyframes_total")
+                viewer.pending = memoryview(full)
+                viewer.stale = False
+            elif frame:
+                viewer.pending = memoryview(frame)
+            if not self.send(viewer):
+                self.drop(viewer)
+
+    def send(self, viewer):
+        """Write as much pending output as the socket takes, False once the viewer is gone"""
+        try:
+            # Whatever viewers type is ignored, reading it shows when they leave
+            if viewer.sock.recv(4096) == b"":
+                return False
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:
+            return False
+        if not viewer.pending:
+            return True
+        try:
+            sent = viewer.sock.send(viewer.pending)
+        except (BlockingIOError, InterruptedError):
+            return True
+        except OSError:
+            return False
+        viewer.pending = viewer.pending[sent:]
+        return True
+
+    def drop(self, viewer):
+        """Forget a viewer that left"""
+        self.viewers.remove(viewer)
+        viewer.sock.close()
+
+    def invalidate(self):
+        """The screen was cleared outside of published frames, repaint every viewer"""
+        for viewer in self.viewers:
+            viewer.stale = True
+
+    def stats(self):
+        """Viewer and frame counters"""
+        return {"viewers": len(self.viewers), "frames": self.frames,
+                "skipped": self.skipped, "keyframes": self.keyframes}
+
+_shared = None
+
+def spectator_hub():
+    """The process-wide hub for WHOIS_SPECTATE, None if spectating is off"""
+    global _shared
+    if _shared is None:
+        address = os.environ.get("WHOIS_SPECTATE", "")
+        if not address:
+            return None
+        host, _, port = address.rpartition(':')
+        try:
+            _shared = SpectatorHub(host, int(port))
+        except (OSError, ValueError):
+            return None
+    return _shared
@@ -1,10 +1,332 @@
 """Matrix Rain Effect"""
 
 import random
+import struct
 import time
 import os
 import sys
-import threading
+from array import array
+from _geometry import terminal_geometry
+from _input import KeyReader
+from _spectate import spectator_hub
+from ansi import ScreenEncoder, style
+from metrics import METRICS
+
+# Platform-specific imports
+if sys.platform != 'win32':
+    import fcntl
+    import termios
+
+class MatrixFramebuffer:
+    """Cell framebuffer for the ANSI modes
+
+    Every screen cell holds a shared (style, glyph) cell and each column
+    only rewrites the few cells its drop changes per step. Those cells are
+    remembered, so a frame is encoded from them alone: the ScreenEncoder
+    sends just the cells that differ from the screen, with color changes
+    only where the color actually changes.
+    """
+
+    TRAIL = 10  # lit cells per drop at full quality, including the bright head
+    MIN_TRAIL = 4
+    POOL_SIZE = 4093  # prime, so pool walks do not line up with columns
+
+    def __init__(self, cols, rows, chars, head_color, trail_color):
+        self.cols = cols
+        self.rows = rows
+        self.height = rows - 1  # keep the last line free to avoid scrolling
+        self.drops = array('i', [-1]) * cols
+        self.trail = self.TRAIL
+        self.density = 1.0  # chance that a finished column starts a new drop
+
+        # Precomputed glyph pools, one cell per random glyph
+        glyphs = [random.choice(chars) for _ in range(self.POOL_SIZE)]
+        head, trail = style(head_color), style(trail_color)
+        self.head_pool = [(head, glyph) for glyph in glyphs]
+        self.trail_pool = [(trail, glyph) for glyph in glyphs]
+        self.pick = 0
+
+        self.blank = ScreenEncoder.BLANK
+        self.cells = [[self.blank] * cols for _ in range(self.height)]
+        self.dirty = []  # packed cells changed since the last render
+        self.encoder = ScreenEncoder(cols, self.height)
+
+    def resize(self, cols, rows):
+        """Adapt to a new terminal size, keeping the drops that still fit"""
+        blank = self.blank
+        height = max(1, rows - 1)
+        if cols < self.cols:
+            del self.drops[cols:]
+            for row in self.cells:
+                del row[cols:]
+        elif cols > self.cols:
+            self.drops.extend([-1] * (cols - self.cols))
+            for row in self.cells:
+                row.extend([blank] * (cols - self.cols))
+        if height < self.height:
+            del self.cells[height:]
+        else:
+            self.cells.extend([blank] * cols for _ in range(height - self.height))
+        self.cols = cols
+        self.rows = rows
+        self.height = height
+        # The old frame is reflowed garbage now, clear and repaint
+        self.encoder.invalidate(cols, height)
+        del self.dirty[:]
+
+    def set_trail(self, trail):
+        """Change the trail length, blanking cells a shorter trail no longer covers"""
+        trail = max(self.MIN_TRAIL, min(self.TRAIL, trail))
+        if trail < self.trail:
+            cells = self.cells
+            blank = self.blank
+            cols = self.cols
+            dirty = self.dirty
+            for j, drop in enumerate(self.drops):
+                for i in range(max(0, drop - self.trail + 1), min(self.height, drop - trail + 1)):
+                    cells[i][j] = blank
+                    dirty.append(i * cols + j)
+        self.trail = trail
+
+    def next_index(self):
+        """Advance through the glyph pools"""
+        self.pick = (self.pick + 7) % self.POOL_SIZE
+        return self.pick
+
+    def step(self):
+        """Advance every drop by one row and patch the cells it touches"""
+        drops = self.drops
+        cells = self.cells
+        height = self.height
+        trail = self.trail
+        density = self.density
+        parked = self.rows + trail  # below the screen with nothing left to erase
+        head_pool = self.head_pool
+        trail_pool = self.trail_pool
+        blank = self.blank
+        cols = self.cols
+        mark = self.dirty.append
+        rand = random.random
+
+        for j in range(cols):
+            old = drops[j]
+            # Random chance to reset drop or continue
+            if old >= self.rows or rand() > 0.98:
+                if density < 1.0 and rand() > density:
+                    new = parked  # column stays dark for now
+                else:
+                    new = 1 - random.randint(1, 5)  # Random negative start position
+                drops[j] = new
+                for i in range(max(0, old - trail + 1), min(old, height)):
+                    cells[i][j] = blank
+                    mark(i * cols + j)
+                continue
+
+            new = old + 1
+            drops[j] = new
+            pick = self.next_index()
+            # New head, previous head fades into the trail, last cell goes dark
+            if 0 <= old < height:
+                cells[old][j] = head_pool[pick]
+                mark(old * cols + j)
+            if 0 <= old - 1 < height:
+                cells[old - 1][j] = trail_pool[pick]
+                mark((old - 1) * cols + j)
+            if 0 <= new - trail < height:
+                cells[new - trail][j] = blank
+                mark((new - trail) * cols + j)
+            # Let one trail glyph flicker per column
+            flicker = old - 2 - pick % (trail - 2)
+            if 0 <= flicker < height and flicker > new - trail:
+                cells[flicker][j] = trail_pool[(pick * 31) % self.POOL_SIZE]
+                mark(flicker * cols + j)
+
+    def render(self):
+        """Encode the changes since the last render as bytes"""
+        frame = self.encoder.encode(self.cells, self.dirty)
+        del self.dirty[:]
+        return frame.encode()
+
+    def keyframe(self):
+        """The whole screen as bytes, for a spectator starting from nothing"""
+        return ScreenEncoder(self.cols, self.height).encode(self.cells).encode()
+
+class CursesRain:
+    """Incremental curses renderer
+
+    The screen keeps what was drawn last frame, so each step only touches
+    four cells per column: the new head is drawn, the previous head and
+    the cell leaving the bright zone are recolored in place with chgat(),
+    and the cell leaving the tail is blanked. Per-frame work therefore
+    grows with the number of columns, not with the number of lit cells.
+    """
+
+    TRAIL_MIN = 8
+    TRAIL_MAX = 25
+    BRIGHT = 3  # cells behind the head that stay bold
+
+    def __init__(self, window, chars, head_attr, bright_attr, trail_attr):
+        self.window = window
+        self.head_attr = head_attr
+        self.bright_attr = bright_attr
+        self.trail_attr = trail_attr
+
+        self.width = 0
+        self.heads = array('i')  # row of each column's head
+        self.trails = array('i')
+        self.densities = []
+        self.glyphs = [random.choice(chars) for _ in range(MatrixFramebuffer.POOL_SIZE)]
+        self.pick = 0
+        self.density = 1.0      # chance that a finished column starts a new drop
+        self.trail_scale = 1.0  # shortens the trails of new drops
+        self.resize()
+
+    def resize(self):
+        """Follow the window size, keeping the drops of the columns that remain"""
+        max_y, max_x = self.window.getmaxyx()
+        # Avoid the last row and column, writing the bottom-right corner fails
+        self.height = max(0, max_y - 1)
+        width = max(0, max_x - 1)
+        if width < self.width:
+            del self.heads[width:]
+            del self.trails[width:]
+            del self.densities[width:]
+        for _ in range(width - self.width):
+            self.heads.append(-1)
+            self.trails.append(random.randint(self.TRAIL_MIN, self.TRAIL_MAX))
+            self.densities.append(random.uniform(0.95, 0.99))
+        self.width = width
+
+    def reset_column(self, x):
+        """Erase what is left of a column's drop and start a new one above the screen"""
+        head = self.heads[x]
+        for y in range(max(0, head - self.trails[x] + 1), min(head + 1, self.height)):
+            self.window.addch(y, x, ' ')
+        trail = random.randint(self.TRAIL_MIN, self.TRAIL_MAX)
+        self.trails[x] = max(MatrixFramebuffer.MIN_TRAIL, int(trail * self.trail_scale))
+        self.densities[x] = random.uniform(0.95, 0.99)
+        if self.density < 1.0 and random.random() > self.density:
+            self.heads[x] = self.height + self.trails[x]  # column stays dark for now
+        else:
+            self.heads[x] = random.randint(-5, 0) - 1
+
+    def step(self):
+        """Move every drop down one row, drawing only the cells that change"""
+        window = self.window
+        height = self.height
+        heads = self.heads
+        glyphs = self.glyphs
+        pool = len(glyphs)
+        rand = random.random
+
+        for x in range(self.width):
+            head = heads[x]
+            if head >= height or rand() > self.densities[x]:
+                self.reset_column(x)
+                continue
+
+            new = head + 1
+            heads[x] = new
+            if 0 <= new < height:
+                self.pick = (self.pick + 7) % pool
+                window.addch(new, x, glyphs[self.pick], self.head_attr)
+            if 0 <= head < height:
+                window.chgat(head, x, 1, self.bright_attr)
+            fade = new - self.BRIGHT - 1
+            if 0 <= fade < height:
+                window.chgat(fade, x, 1, self.trail_attr)
+            tail = new - self.trails[x]
+            if 0 <= tail < height:
+                window.addch(tail, x, ' ')
+
+def output_backlog(fd):
+    """Bytes written to a terminal but not yet sent on, None if unknown"""
+    if sys.platform == 'win32' or fd is None:
+        return None
+    try:
+        return struct.unpack('i', fcntl.ioctl(fd, termios.TIOCOUTQ, b'\0' * 4))[0]
+    except (AttributeError, OSError):
+        return None
+
+class FrameGovernor:
+    """Keeps the rain within what the terminal link can drain
+
+    After every frame it looks at the frame size, how long the write
+    blocked and how much output is still queued in the tty. A quality
+    level between MIN_QUALITY and 1 backs off multiplicatively when the
+    link is congested or the byte rate goes over budget, and creeps back
+    up while there is headroom. Frame rate, share of active columns and
+    trail length all follow the quality level. While output is still
+    queued, new frames are skipped instead of piling up, so Q is answered
+    within a frame on any link.
+    """
+
+    MIN_QUALITY = 0.1
+    MIN_FPS = 2
+    DEFAULT_BUDGET = 256 * 1024  # bytes per second
+
+    def __init__(self, max_fps=10, budget=None, fd=None):
+        self.max_fps = max_fps
+        if budget is None:
+            try:
+                budget = int(os.environ.get("WHOIS_MATRIX_BPS", 0))
+            except ValueError:
+                budget = 0  # a typo in the variable shouldn't stop the rain
+            if budget <= 0:
+                budget = self.DEFAULT_BUDGET
+        self.budget = budget
+        self.fd = fd
+        self.quality = 1.0
+        self.frame_bytes = 0.0  # moving average
+        self.skipped = 0
+
+    @property
+    def fps(self):
+        return max(self.MIN_FPS, self.max_fps * self.quality)
+
+    @property
+    def density(self):
+        return max(0.2, self.quality)
+
+    @property
+    def trail_scale(self):
+        return max(0.4, self.quality)
+
+    def backlog(self):
+        """Bytes still queued for the terminal"""
+        return output_backlog(self.fd)
+
+    def ready(self):
+        """False while the previous frames haven't drained yet, the frame should be skipped"""
+        backlog = self.backlog()
+        if backlog is not None and backlog > max(self.frame_bytes, 1024):
+            self.skipped += 1
+            self.back_off(0.7)
+            return False
+        return True
+
+    def update(self, nbytes, write_seconds):
+        """Adjust the quality after a frame of nbytes took write_seconds to write"""
+        if nbytes:
+            self.frame_bytes += (nbytes - self.frame_bytes) * 0.25
+        rate = self.frame_bytes * self.fps
+        if write_seconds > 0.5 / self.fps:
+            self.back_off(0.7)  # the write blocked, the link is full
+        elif rate > self.budget:
+            self.back_off(max(0.5, self.budget / rate))
+        elif rate < 0.8 * self.budget:
+            self.quality = min(1.0, self.quality + 0.02)
+
+    def back_off(self, factor):
+        self.quality = max(self.MIN_QUALITY, self.quality * factor)
+
+    def apply(self, rain):
+        """Push density and trail settings into a framebuffer or CursesRain"""
+        rain.density = self.density
+        if isinstance(rain, MatrixFramebuffer):
+            rain.set_trail(round(MatrixFramebuffer.TRAIL * self.trail_scale))
+        else:
+            rain.trail_scale = self.trail_scale
 
 class MatrixRain:
     def __init__(self):
@@ -14,25 +336,21 @@ class MatrixRain:
         self.reset = '\033[0m'
         self.running = False
         self.is_windows = sys.platform == 'win32'
-        # Detect terminal size on initialization
+        self.fps = 10
+        self.budget = None  # bytes per second, None uses WHOIS_MATRIX_BPS or the default
+        self.keys = None  # KeyReader while the ANSI rain runs
+        self.governor = None
+        self.frames = 0
+        self.render_time = 0.0
+        self.elapsed = 0.0
+        self.geometry = terminal_geometry()
+        self.spectators = spectator_hub()  # None unless WHOIS_SPECTATE is set
         self.detect_terminal_size()
         
     def detect_terminal_size(self):
-        """Get the current terminal dimensions"""
-        try:
-            # Try to get terminal size using os.get_terminal_size
-            self.cols, self.rows = os.get_terminal_size()
-        except (AttributeError, OSError):
-            # Fallback for environments where get_terminal_size isn't available
-            try:
-                import subprocess
-                self.rows, self.cols = map(int, subprocess.check_output(['stty', 'size']).split())
-            except (ImportError, subprocess.SubprocessError, FileNotFoundError):
-                # Default fallback values
-                self.cols, self.rows = 80, 24
-                
-        # Print detected size for user information
-        print(f"Terminal size detected: {self.cols}x{self.rows}")
+        """Get the current terminal dimensions from the shared geometry"""
+        self.geometry.poll()
+        self.cols, self.rows = self.geometry.size
         
     def run(self):
         """Run the matrix effect"""
@@ -44,9 +362,11 @@ class MatrixRain:
         # Re-detect terminal size to account for any changes
         self.detect_terminal_size()
         
-        # Use the appropriate version based on platform
-        if self.is_windows:
-            self.run_windows_ansi()
+        # Use the appropriate version based on platform, spectators and
+        # session recordings need our own frames
+        recording = getattr(sys.stdout, 'recorder', None) is not None
+        if self.is_windows or self.spectators is not None or recording:
+            self.run_ansi()
         else:
             # Try curses first, fall back to ANSI
             try:
@@ -55,79 +375,129 @@ class MatrixRain:
             except (ImportError, Exception):
                 self.run_ansi()
     
-    def run_windows_ansi(self):
-        """Run matrix rain with ANSI escape codes on Windows"""
+    def terminal_fd(self):
+        """File descriptor of the terminal the frames go to, None if it isn't one"""
         try:
-            # Get terminal size - use the already detected size
-            cols, rows = self.cols, self.rows
-                
-            # Create drops
-            drops = [-1] * cols
-            
-            # Input handling thread
-            def check_input():
-                import msvcrt
-                while self.running:
-                    if msvcrt.kbhit():
-                        key = msvcrt.getch()
-                        try:
-                            key_char = key.decode('utf-8').lower()
-                            if key_char == 'q':
-                                self.running = False
-                        except UnicodeDecodeError:
-                            # Handle special keys that can't be decoded
-                            if key in (b'q', b'Q'):
-                                self.running = False
-                    time.sleep(0.1)
-            
-            # Start input thread
-            input_thread = threading.Thread(target=check_input)
-            input_thread.daemon = True
-            
-            print("\033[2J\033[H")  # Clear screen
-            self.running = True
-            input_thread.start()
-            
-            # Main matrix loop
-            while self.running:
-                # Build output
-                output = "\033[H"  # Move cursor to home position
-                
-                # Use full terminal height (with some margin)
-                for i in range(min(rows - 1, rows)):  # Use all available rows
-                    line = ""
-                    for j in range(min(cols, cols)):  # Use all available columns
-                        if drops[j] > i and drops[j] - i < 10:
-                            # Matrix head (bright green)
-                            if drops[j] - i < 2:
-                                line += f"{self.bright_green}{random.choice(self.chars)}{self.reset}"
-                            # Matrix trail (green)
-                            else:
-                                line += f"{self.green}{random.choice(self.chars)}{self.reset}"
-                        else:
-                            line += " "
-                    output += line + "\n"
-                
-                # Update drops
-                for j in range(min(cols, cols)):
-                    # Random chance to reset drop or continue
-                    if drops[j] >= rows or random.random() > 0.98:
-                        drops[j] = -1 * random.randint(1, 5)  # Random negative start position
-                    drops[j] += 1
-                
-                print(output, end="")
-                time.sleep(0.1)
-                
-        except KeyboardInterrupt:
-            pass
+            fd = sys.__stdout__.fileno()
+        except (AttributeError, OSError, ValueError):
+            return None
+        return fd if os.isatty(fd) else None
+
+    def make_governor(self, max_fps=None):
+        """Frame governor for the current output, capped at max_fps or self.fps"""
+        return FrameGovernor(max_fps=max_fps or self.fps, budget=self.budget,
+                             fd=self.terminal_fd())
+
+    def render_loop(self, cols, rows):
+        """Drive the framebuffer until stopped, paced by the frame governor"""
+        framebuffer = MatrixFramebuffer(cols, rows, self.chars, self.bright_green, self.green)
+        sys.stdout.flush()
+
+        self.governor = self.make_governor()
+        self.frames = 0
+        self.render_time = 0.0
+        started = time.perf_counter()
+        deadline = time.monotonic()
+        self.geometry.subscribe(framebuffer.resize)
+        try:
+            self.run_frames(framebuffer, self.governor, deadline)
         finally:
-            self.running = False
-            print("\033[2J\033[H")  # Clear screen
-            print("\n\nExiting the Matrix...")
-            time.sleep(0.5)
+            self.geometry.unsubscribe(framebuffer.resize)
+            self.elapsed = time.perf_counter() - started
+            self.discard_backlog()
+
+    def discard_backlog(self):
+        """Drop frames still queued for a slow terminal so leaving is immediate"""
+        fd = self.terminal_fd()
+        if fd is not None and not self.is_windows:
+            try:
+                termios.tcflush(fd, termios.TCOFLUSH)
+            except termios.error:
+                pass
+
+    def write_frame(self, frame):
+        """Send one frame with a single write"""
+        out = sys.stdout
+        if hasattr(out, 'write_bytes'):
+            out.write_bytes(frame)  # shared TerminalWriter from core/utils.py
+        elif hasattr(out, 'buffer'):
+            out = out.buffer
+            out.write(frame)
+        else:
+            out.write(frame.decode())
+        out.flush()
+
+    def run_frames(self, framebuffer, governor, deadline):
+        """Render, write and pace frames while running"""
+        while self.running:
+            self.geometry.poll()  # resizes the framebuffer between frames
+            if governor.ready():
+                governor.apply(framebuffer)
+                start = time.perf_counter()
+                frame = framebuffer.render()
+                if self.spectators is not None:
+                    # Before step(), so a keyframe shows the screen this frame leads to
+                    self.spectators.publish(frame, framebuffer.keyframe)
+                framebuffer.step()
+                built = time.perf_counter()
+                self.render_time += built - start
+
+                self.write_frame(frame)
+                self.frames += 1
+                governor.update(len(frame), time.perf_counter() - built)
+                if METRICS.enabled:
+                    self.record_frame(start, built, len(frame))
+            elif METRICS.enabled:
+                METRICS.count("frames_skipped_total", game="matrix")
+
+            deadline += 1.0 / governor.fps
+            if deadline > time.monotonic():
+                self.wait_keys(deadline)
+            else:
+                self.record_late()
+                self.wait_keys(deadline)  # still look at the keys, without waiting
+                deadline = time.monotonic()  # running late, don't try to catch up
+
+    def wait_keys(self, deadline):
+        """Handle key presses until the monotonic deadline, returns early on quit"""
+        if self.keys is None:
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            return
+        while self.running:
+            remaining = deadline - time.monotonic()
+            for key in self.keys.wait(max(remaining, 0)):
+                if key in ('q', 'Q', 'ESC', '\x03'):
+                    self.running = False
+            if remaining <= 0:
+                return
+
+    def record_frame(self, start, built, size):
+        """Metrics for a frame built at start..built and flushed just now"""
+        METRICS.observe("frame_build_seconds", built - start, game="matrix")
+        METRICS.observe("frame_flush_seconds", time.perf_counter() - built, game="matrix")
+        METRICS.count("frames_total", game="matrix")
+        if size:
+            METRICS.count("frame_bytes_total", size, game="matrix")
+
+    def record_late(self):
+        """Count a frame that missed its deadline"""
+        if METRICS.enabled:
+            METRICS.count("frames_late_total", game="matrix")
+
+    def report_fps(self):
+        """Print achieved frame rate and how fast frames could be built"""
+        if not self.frames or not self.elapsed:
+            return
+        fps = self.frames / self.elapsed
+        capacity = self.frames / self.render_time if self.render_time else float('inf')
+        print(f"{self.frames} frames at {fps:.1f} fps (render capacity {capacity:.0f} fps)")
 
     def run_curses(self, stdscr):
         """Run matrix rain with curses"""
+        import curses
+
         # Setup
         curses.curs_set(0)  # Hide cursor
         curses.start_color()
@@ -135,142 +505,86 @@ class MatrixRain:
         curses.init_pair(1, curses.COLOR_GREEN, -1)
         curses.init_pair(2, curses.COLOR_WHITE, -1)
         stdscr.nodelay(True)
-        
-        # Get dimensions
-        max_y, max_x = stdscr.getmaxyx()
-        max_x -= 1  # Avoid bottom-right corner which can cause issues
-        
-        # Create drops
-        drops = []
-        densities = []
-        for i in range(max_x):
-            drops.append(-1)
-            densities.append(random.uniform(0.95, 0.99))
-        
-        # Main loop
+        stdscr.erase()
+
+        # Color attributes are looked up once, not per character
+        rain = CursesRain(stdscr, self.chars,
+                          head_attr=curses.color_pair(2) | curses.A_BOLD,
+                          bright_attr=curses.color_pair(1) | curses.A_BOLD,
+                          trail_attr=curses.color_pair(1))
+
+        # Our SIGWINCH handler replaces the one curses would install
+        def resize(cols, rows):
+            curses.resizeterm(rows, cols)
+            rain.resize()
+
+        # Main loop, curses only sends changed cells so it can afford twice the rate
+        self.governor = self.make_governor(max_fps=self.fps * 2)
+        deadline = time.monotonic()
         self.running = True
+        self.geometry.subscribe(resize)
+        try:
+            self.curses_frames(stdscr, rain, self.governor, deadline)
+        finally:
+            self.geometry.unsubscribe(resize)
+            self.discard_backlog()
+
+    def curses_frames(self, stdscr, rain, governor, deadline):
+        """Step, refresh and pace the curses rain while running"""
+        import curses
+
         while self.running:
-            stdscr.clear()
-            
-            # Draw characters
-            for x in range(max_x):
-                if drops[x] > 0:
-                    # Draw the trail
-                    for y in range(drops[x]):
-                        if y == drops[x] - 1:
-                            # Head of the stream
-                            stdscr.attron(curses.color_pair(2) | curses.A_BOLD)
-                            stdscr.addch(y, x, random.choice(self.chars))
-                            stdscr.attroff(curses.color_pair(2) | curses.A_BOLD)
-                        elif 0 <= y < max_y - 1:
-                            # Body of the stream
-                            intensity = min(255, int(255 * (drops[x] - y) / 25))
-                            if intensity > 200:
-                                stdscr.attron(curses.color_pair(1) | curses.A_BOLD)
-                            else:
-                                stdscr.attron(curses.color_pair(1))
-                            stdscr.addch(y, x, random.choice(self.chars))
-                            stdscr.attroff(curses.color_pair(1))
-                
-                # Update the drop
-                if drops[x] < 0 or drops[x] >= max_y or random.random() > densities[x]:
-                    # Reset the drop
-                    drops[x] = random.randint(-5, 0)
-                    densities[x] = random.uniform(0.95, 0.99)
-                else:
-                    drops[x] += 1
-            
+            self.geometry.poll()
+            if governor.ready():
+                governor.apply(rain)
+                start = time.perf_counter()
+                rain.step()
+                stdscr.noutrefresh()
+                built = time.perf_counter()
+                curses.doupdate()
+                # curses doesn't say how much it sent, the queue and write time still tell
+                governor.update(0, time.perf_counter() - built)
+                if METRICS.enabled:
+                    self.record_frame(start, built, 0)
+
             # Check for exit key
             try:
                 key = stdscr.getch()
                 if key == ord('q') or key == ord('Q'):
                     break
-            except:
+            except curses.error:
                 pass
-                
-            stdscr.refresh()
-            time.sleep(0.05)
+
+            deadline += 1.0 / governor.fps
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                self.record_late()
+                deadline = time.monotonic()
 
     def run_ansi(self):
         """Run matrix rain with ANSI escape codes"""
         try:
-            # Get terminal size
-            try:
-                cols, rows = os.get_terminal_size()
-            except AttributeError:
-                rows, cols = map(int, os.popen('stty size', 'r').read().split())
-                
-            # Create drops
-            drops = [-1] * cols
-            
-            # Input handling thread
-            def check_input():
-                if sys.platform == 'win32':
-                    import msvcrt
-                    while self.running:
-                        if msvcrt.kbhit():
-                            key = msvcrt.getch()
-                            if key in (b'q', b'Q'):
-                                self.running = False
-                        time.sleep(0.1)
-                else:
-                    # Unix-like
-                    import tty
-                    import termios
-                    import select
-                    fd = sys.stdin.fileno()
-                    old_settings = termios.tcgetattr(fd)
-                    try:
-                        tty.setraw(fd)
-                        while self.running:
-                            if sys.stdin in select.select([sys.stdin], [], [], 0)[0]:
-                                key = sys.stdin.read(1)
-                                if key in ('q', 'Q'):
-                                    self.running = False
-                            time.sleep(0.1)
-                    finally:
-                        termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
-            
-            # Start input thread
-            input_thread = threading.Thread(target=check_input)
-            input_thread.daemon = True
-            
-            print("\033[2J\033[H")  # Clear screen
-            self.running = True
-            input_thread.start()
-            
-            while self.running:
-                # Build output
-                output = "\033[H"  # Move cursor to home position
-                
-                for i in range(min(rows - 1, 40)):  # Limit to avoid excessive output
-                    line = ""
-                    for j in range(min(cols, 80)):  # Limit to avoid excessive output
-                        if drops[j] > i and drops[j] - i < 10:
-                            # Matrix head (bright green)
-                            if drops[j] - i < 2:
-                                line += f"{self.bright_green}{random.choice(self.chars)}{self.reset}"
-                            # Matrix trail (green)
-                            else:
-                                line += f"{self.green}{random.choice(self.chars)}{self.reset}"
-                        else:
-                            line += " "
-                    output += line + "\n"
-                
-                # Update drops
-                for j in range(cols):
-                    # Random chance to reset drop or continue
-                    if drops[j] >= rows or random.random() > 0.98:
-                        drops[j] = -1 * random.randint(1, 5)  # Random negative start position
-                    drops[j] += 1
-                
-                print(output, end="")
-                time.sleep(0.1)
-                
-        except KeyboardInterrupt:
+            # Later resizes reach the framebuffer through the geometry service
+            cols, rows = self.cols, self.rows
+
+            # Keys are read between frames, see wait_keys()
+            self.keys = KeyReader()
+            with self.keys.raw():
+                print("\033[2J\033[H")  # Clear screen
+                self.running = True
+                self.render_loop(cols, rows)
+
+        except (KeyboardInterrupt, EOFError):
             pass
         finally:
             self.running = False
+            self.keys = None
             print("\033[2J\033[H")  # Clear screen
             print("\n\nExiting the Matrix...")
+            self.report_fps()
             time.sleep(0.5)
+
+# Entry point used by the command dispatcher
+GAME = MatrixRain
@@ -1,28 +1,37 @@
 """Snake Game for Terminal - Complete Rewrite"""
 
-import random
 import time
 import os
 import sys
-import json
+from _geometry import terminal_geometry
+from _input import KeyReader
+from _scores import ScoreStore
+from _snake_engine import SnakeBoard, SnakeEngine, InputRecorder
+from _autopilot import Autopilot
+from _spectate import spectator_hub
+from ansi import compact_sgr
+from metrics import METRICS
 
 # Platform-specific imports
 if sys.platform == 'win32':
     import msvcrt
-else:
-    import select
-    import tty
-    import termios
 
 class SnakeGame:
-    def __init__(self):
+    def __init__(self, autopilot=False):
         self.is_windows = sys.platform == 'win32'
-        self.width = 30
-        self.height = 15
-        self.score = 0
+        # With autopilot the game starts as a self-playing demo
+        self.autopilot = autopilot
+        self.pilot = None  # Autopilot steering the current game
+        self.max_width = 30
+        self.max_height = 15
+        self.width = self.max_width
+        self.height = self.max_height
         self.running = False
+        self.keys = None  # KeyReader while a game runs
         self.player_name = ""
-        self.scores_file = "data/snake_scores.json"
+        self.scores_file = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            "data", "snake_scores.json")
         
         # Colors
         self.GREEN = '\033[32m'
@@ -38,44 +47,105 @@ class SnakeGame:
         self.SNAKE_BODY = 'o'
         self.FOOD = '*'
         self.WALL = '#'
+
+        self.CELL_CODES = {
+            self.SNAKE_HEAD: self.BOLD + self.GREEN + self.SNAKE_HEAD + self.RESET,
+            self.SNAKE_BODY: self.GREEN + self.SNAKE_BODY + self.RESET,
+            self.FOOD: self.BOLD + self.RED + self.FOOD + self.RESET,
+            ' ': ' ',
+        }
+
+        # Screen row of the first board line (title, score, help, blank, border)
+        self.BOARD_TOP = 6
+        self.geometry = terminal_geometry()
+        self.spectators = spectator_hub()  # None unless WHOIS_SPECTATE is set
+        self.reset_frame()
+
+        # High scores are read on first use
+        self.scores = ScoreStore(self.scores_file, on_drop=self.delete_replay)
+        self.replays_path = os.path.join(os.path.dirname(self.scores_file), "replays")
+
+        # All game state lives in the engine, see reset_game()
+        self.engine = SnakeEngine(self.width, self.height)
+        self.recorder = InputRecorder(self.engine)
+
+    # Game state is owned by the engine, these keep the familiar names
+    board = property(lambda self: self.engine.board)
+    snake = property(lambda self: self.engine.snake)
+    food = property(lambda self: self.engine.food)
+
+    @property
+    def score(self):
+        return self.engine.score
+
+    @score.setter
+    def score(self, value):
+        self.engine.score = value
+
+    @property
+    def speed(self):
+        return self.engine.speed
+
+    @speed.setter
+    def speed(self, value):
+        self.engine.speed = value
+
+    @property
+    def direction(self):
+        return self.engine.direction
+
+    @direction.setter
+    def direction(self, value):
+        self.engine.direction = value
+
+    @property
+    def next_direction(self):
+        return self.engine.next_direction
+
+    @next_direction.setter
+    def next_direction(self, value):
+        self.engine.next_direction = value
         
-        # Load scores
-        self.load_scores()
-        
-    def load_scores(self):
-        """Load high scores from file"""
+    def add_score(self, name, score):
+        """Add new score to high scores, returns its id or None if it couldn't be saved"""
         try:
-            if os.path.exists(self.scores_file):
-                with open(self.scores_file, 'r') as f:
-                    self.high_scores = json.load(f)
-            else:
-                self.high_scores = []
-        except:
-            self.high_scores = []
-            
-    def save_scores(self):
-        """Save high scores to file"""
+            return self.scores.add(name, score)
+        except OSError:
+            return None
+
+    def save_replay(self, entry_id):
+        """Store the input log of the finished game next to its score entry"""
         try:
-            os.makedirs(os.path.dirname(self.scores_file), exist_ok=True)
-            with open(self.scores_file, 'w') as f:
-                json.dump(self.high_scores, f, indent=2)
-        except:
+            os.makedirs(self.replays_path, exist_ok=True)
+            self.recorder.save(os.path.join(self.replays_path, f"{entry_id}.json"),
+                               self.player_name)
+        except OSError:
             pass
-            
-    def add_score(self, name, score):
-        """Add new score to high scores"""
-        self.high_scores.append({"name": name, "score": score})
-        self.high_scores.sort(key=lambda x: x["score"], reverse=True)
-        self.high_scores = self.high_scores[:10]
-        self.save_scores()
+
+    def delete_replay(self, entry):
+        """Remove the replay of a score that fell off the scoreboard"""
+        entry_id = entry.get("id")
+        if not (isinstance(entry_id, str) and entry_id.isalnum()):
+            return  # legacy entries have no replay, never build paths from odd ids
+        try:
+            os.remove(os.path.join(self.replays_path, f"{entry_id}.json"))
+        except OSError:
+            pass
+
+    def is_ranked(self, entry_id):
+        """Whether the entry made it onto the scoreboard"""
+        return any(entry.get("id") == entry_id for entry in self.scores.top(refresh=False))
         
     def get_high_score(self):
         """Get current high score"""
-        return self.high_scores[0]["score"] if self.high_scores else 0
+        return self.scores.best()
         
     def clear_screen(self):
         """Clear the screen"""
+        sys.stdout.flush()  # the clear command writes straight to the terminal
         os.system('cls' if self.is_windows else 'clear')
+        if hasattr(sys.stdout, 'echo'):
+            sys.stdout.echo("\033[H\033[2J")  # keep session recordings in step
         
     def hide_cursor(self):
         """Hide the cursor"""
@@ -89,38 +159,6 @@ class SnakeGame:
         """Move cursor to home position"""
         print("\033[H", end='', flush=True)
         
-    def get_key(self):
-        """Get a single key press"""
-        if self.is_windows:
-            if msvcrt.kbhit():
-                key = msvcrt.getch()
-                if key == b'\xe0':  # Special key
-                    key = msvcrt.getch()
-                    if key == b'H': return 'UP'
-                    elif key == b'P': return 'DOWN'
-                    elif key == b'K': return 'LEFT'
-                    elif key == b'M': return 'RIGHT'
-                else:
-                    try:
-                        return key.decode('utf-8').lower()
-                    except:
-                        return ''
-        else:
-            if sys.stdin in select.select([sys.stdin], [], [], 0)[0]:
-                key = sys.stdin.read(1)
-                if key == '\x1b':  # ESC sequence
-                    try:
-                        sys.stdin.read(1)  # [
-                        arrow = sys.stdin.read(1)
-                        if arrow == 'A': return 'UP'
-                        elif arrow == 'B': return 'DOWN'
-                        elif arrow == 'C': return 'RIGHT'
-                        elif arrow == 'D': return 'LEFT'
-                    except:
-                        pass
-                return key.lower()
-        return None
-        
     def get_input(self):
         """Get input with prompt"""
         if self.is_windows:
@@ -158,9 +196,10 @@ class SnakeGame:
             print()
             print(f"{self.CYAN}1. Play Game{self.RESET}")
             print(f"{self.CYAN}2. View Scoreboard{self.RESET}")
-            print(f"{self.CYAN}3. Quit{self.RESET}")
+            print(f"{self.CYAN}3. Watch Autopilot{self.RESET}")
+            print(f"{self.CYAN}4. Quit{self.RESET}")
             print()
-            print(f"Choose option (1-3): ", end='', flush=True)
+            print(f"Choose option (1-4): ", end='', flush=True)
             
             if self.is_windows:
                 # Wait for key press
@@ -182,10 +221,12 @@ class SnakeGame:
             elif choice == '2':
                 self.show_scoreboard()
             elif choice == '3':
+                self.start_demo()
+            elif choice == '4':
                 return  # Exit the menu loop
             else:
                 print()
-                print(f"{self.RED}Invalid choice! Please press 1, 2, or 3.{self.RESET}")
+                print(f"{self.RED}Invalid choice! Please press 1, 2, 3 or 4.{self.RESET}")
                 print("Press any key to continue...")
                 if self.is_windows:
                     msvcrt.getch()
@@ -234,12 +275,13 @@ class SnakeGame:
         print("=" * 30)
         print()
         
-        if not self.high_scores:
+        high_scores = self.scores.top()
+        if not high_scores:
             print(f"{self.CYAN}No scores yet!{self.RESET}")
         else:
             print(f"{'Rank':<5} {'Name':<15} {'Score':<6}")
             print("-" * 30)
-            for i, entry in enumerate(self.high_scores, 1):
+            for i, entry in enumerate(high_scores, 1):
                 color = self.YELLOW if i <= 3 else self.CYAN
                 print(f"{color}{i:<5} {entry['name']:<15} {entry['score']:<6}{self.RESET}")
                 
@@ -254,163 +296,260 @@ class SnakeGame:
     def start_game(self):
         """Start the game"""
         self.player_name = self.get_player_name()
-        self.score = 0
+        self.reset_game()
         self.running = True
         
-        # Initialize snake and food
-        self.snake = [(self.width // 2, self.height // 2)]
-        self.direction = 'RIGHT'
-        self.next_direction = 'RIGHT'
-        self.place_food()
-        
         # Clear screen and hide cursor for smooth gameplay
         self.clear_screen()
+        self.reset_frame()
         self.hide_cursor()
         
         try:
-            # Start the game loop
-            if not self.is_windows:
-                try:
-                    fd = sys.stdin.fileno()
-                    old_settings = termios.tcgetattr(fd)
-                    tty.setraw(fd)
-                    self.game_loop()
-                    termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
-                except:
-                    self.game_loop()
-            else:
+            # Start the game loop with single key presses arriving unbuffered
+            self.keys = KeyReader()
+            with self.keys.raw():
                 self.game_loop()
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, EOFError):
             self.running = False
         finally:
             # Always show cursor after game ends
             self.show_cursor()
             
+    def start_demo(self):
+        """Let the autopilot play, game after game, until a key is pressed"""
+        self.player_name = "Autopilot"
+        self.autopilot = True
+        self.running = True
+        self.clear_screen()
+        self.hide_cursor()
+
+        try:
+            self.keys = KeyReader()
+            with self.keys.raw():
+                while self.running:
+                    self.reset_game()
+                    self.reset_frame()
+                    self._clear_next = True
+                    self.game_loop()
+                    # Show the final board for a moment before the next round
+                    if self.running and self.keys.wait(1.0):
+                        self.running = False
+        except (KeyboardInterrupt, EOFError):
+            self.running = False
+        finally:
+            self.autopilot = False
+            self.pilot = None
+            self.show_cursor()
+
+    def fit_board(self):
+        """Shrink the board for small terminals, never beyond the classic 30x15"""
+        cols, rows = self.geometry.size
+        self.width = max(10, min(self.max_width, cols - 2))
+        self.height = max(5, min(self.max_height, rows - self.BOARD_TOP - 1))
+
+    def reset_game(self, seed=None):
+        """Set up a fresh board, snake, food and score"""
+        self.fit_board()
+        self.engine = SnakeEngine(self.width, self.height, seed)
+        self.recorder = InputRecorder(self.engine)
+        self.pilot = Autopilot(self.engine) if self.autopilot else None
+
     def place_food(self):
-        """Place food randomly"""
-        while True:
-            x = random.randint(0, self.width - 1)
-            y = random.randint(0, self.height - 1)
-            if (x, y) not in self.snake:
-                self.food = (x, y)
-                break
+        """Place food on a random free cell, returns False when the board is full"""
+        return self.engine.place_food()
             
+    def handle_key(self, key):
+        """Apply a key press to the game state"""
+        if self.pilot is not None:
+            self.running = False  # any key ends the demo
+            return
+        if len(key) == 1:
+            key = key.lower()
+        if key == 'q':
+            self.running = False
+        elif key == 'w' or key == 'UP':
+            self.recorder.turn('UP')
+        elif key == 's' or key == 'DOWN':
+            self.recorder.turn('DOWN')
+        elif key == 'a' or key == 'LEFT':
+            self.recorder.turn('LEFT')
+        elif key == 'd' or key == 'RIGHT':
+            self.recorder.turn('RIGHT')
+
+    def move_snake(self):
+        """Advance the snake one cell, returns False when the game is over"""
+        if self.pilot is not None:
+            self.recorder.turn(self.pilot.choose())
+        self.engine.step()
+        return self.engine.alive
+
     def game_loop(self):
-        """Main game loop"""
-        last_move = time.time()
-        speed = 0.25  # Balanced speed
-        
+        """Main game loop
+
+        Sleeps in the key reader until either keys arrive or the next tick
+        is due, then handles every key that came in at once. Tick deadlines
+        advance by a fixed step on the monotonic clock, so cadence doesn't
+        drift with input handling or render time.
+        """
         # Draw initial game state
         self.draw_game()
-        
+        next_tick = time.monotonic() + self.speed
+        self.geometry.subscribe(self.on_resize)
+        try:
+            self.run_ticks(next_tick)
+        finally:
+            self.geometry.unsubscribe(self.on_resize)
+
+    def run_ticks(self, next_tick):
+        """Handle keys and advance the snake until the game ends"""
         while self.running:
-            # Handle input more frequently
-            for _ in range(5):  # Check input multiple times per frame
-                key = self.get_key()
-                if key == 'q':
-                    self.running = False
-                    break
-                elif key == 'w' or key == 'UP':
-                    if self.direction != 'DOWN':
-                        self.next_direction = 'UP'
-                elif key == 's' or key == 'DOWN':
-                    if self.direction != 'UP':
-                        self.next_direction = 'DOWN'
-                elif key == 'a' or key == 'LEFT':
-                    if self.direction != 'RIGHT':
-                        self.next_direction = 'LEFT'
-                elif key == 'd' or key == 'RIGHT':
-                    if self.direction != 'LEFT':
-                        self.next_direction = 'RIGHT'
-                        
-                time.sleep(0.002)  # Small delay between input checks
-                
-            # Move snake
-            current_time = time.time()
-            if current_time - last_move >= speed:
-                self.direction = self.next_direction
-                
-                # Calculate new head position
-                head_x, head_y = self.snake[0]
-                if self.direction == 'UP':
-                    new_head = (head_x, head_y - 1)
-                elif self.direction == 'DOWN':
-                    new_head = (head_x, head_y + 1)
-                elif self.direction == 'LEFT':
-                    new_head = (head_x - 1, head_y)
-                elif self.direction == 'RIGHT':
-                    new_head = (head_x + 1, head_y)
-                    
-                # Check collisions
-                if (new_head[0] < 0 or new_head[0] >= self.width or
-                    new_head[1] < 0 or new_head[1] >= self.height or
-                    new_head in self.snake):
-                    self.game_over()
-                    break
-                    
-                # Add new head
-                self.snake.insert(0, new_head)
-                
-                # Check if food eaten
-                if new_head == self.food:
-                    self.score += 10
-                    self.place_food()
-                    speed = max(0.1, speed - 0.003)  # Gradually increase speed
-                else:
-                    self.snake.pop()  # Remove tail
-                    
+            if self.geometry.poll():
                 self.draw_game()
-                last_move = current_time
-                
-            time.sleep(0.01)  # Small delay
-            
+            timeout = next_tick - time.monotonic()
+            if timeout > 0:
+                for key in self.keys.wait(timeout):
+                    self.handle_key(key)
+                continue
+
+            if not self.move_snake():
+                if self.pilot is None:
+                    self.game_over()
+                break
+            self.draw_game()
+
+            next_tick += self.speed
+            now = time.monotonic()
+            if next_tick < now:
+                # Fell more than a tick behind, skip ahead instead of bursting
+                if METRICS.enabled:
+                    METRICS.count("ticks_dropped_total", int((now - next_tick) / self.speed) + 1,
+                                  game="snake")
+                next_tick = now + self.speed
+
+    def on_resize(self, cols, rows):
+        """Terminal size changed: wipe the reflowed screen and repaint"""
+        self.reset_frame()
+        self._clear_next = True
+
+    def reset_frame(self):
+        """Forget the previous frame so the next draw repaints everything"""
+        self._clear_next = False
+        self._front = None
+        self._drawn_header = None
+        self._drawn_head = None
+        self._drawn_tail = None
+        self._drawn_food = None
+        if self.spectators is not None:
+            self.spectators.invalidate()
+
+    def header_lines(self):
+        """Text lines shown above the board"""
+        return [
+            f"{self.BOLD}{self.GREEN}SNAKE GAME - {self.player_name}{self.RESET}",
+            f"Score: {self.score} | High Score: {self.get_high_score()}",
+            "Autopilot demo, any key to stop" if self.pilot else "WASD to move, Q to quit",
+        ]
+
+    def cell_glyph(self, cell):
+        """Symbol that belongs in a packed board cell in the current state"""
+        if cell == self.snake[0]:
+            return self.SNAKE_HEAD
+        if cell == self.food:
+            return self.FOOD
+        if self.board.occupied[cell]:
+            return self.SNAKE_BODY
+        return ' '
+
     def draw_game(self):
-        """Draw the game without flickering"""
-        # Use cursor positioning instead of clearing screen
-        self.move_cursor_home()
-        
-        # Header
-        print(f"{self.BOLD}{self.GREEN}SNAKE GAME - {self.player_name}{self.RESET}")
-        print(f"Score: {self.score} | High Score: {self.get_high_score()}")
-        print("WASD to move, Q to quit")
-        print()
-        
-        # Create grid
-        grid = [[' ' for _ in range(self.width)] for _ in range(self.height)]
-        
-        # Place snake
-        for i, (x, y) in enumerate(self.snake):
-            if 0 <= x < self.width and 0 <= y < self.height:
-                grid[y][x] = self.SNAKE_HEAD if i == 0 else self.SNAKE_BODY
-                
-        # Place food
-        fx, fy = self.food
-        if 0 <= fx < self.width and 0 <= fy < self.height:
-            grid[fy][fx] = self.FOOD
-            
-        # Draw borders and grid
+        """Draw the game, sending only the cells that changed since the last frame"""
+        timed = METRICS.enabled  # no clock reads per frame unless someone collects them
+        start = time.perf_counter() if timed else 0.0
+        if self._front is None:
+            frame = self.build_full_frame()
+        else:
+            frame = self.build_diff_frame()
+        built = time.perf_counter() if timed else 0.0
+
+        # One write per frame keeps slow links from showing half-drawn boards
+        if frame:
+            sys.stdout.write(frame)
+            sys.stdout.flush()
+        if timed:
+            self.record_frame(start, built, len(frame.encode()))
+        if self.spectators is not None:
+            self.spectators.publish(frame, self.keyframe)
+
+        self._drawn_head = self.snake[0]
+        self._drawn_tail = self.snake[-1]
+        self._drawn_food = self.food
+
+    def record_frame(self, start, built, size):
+        """Metrics for a frame built at start..built and flushed just now"""
+        METRICS.observe("frame_build_seconds", built - start, game="snake")
+        METRICS.observe("frame_flush_seconds", time.perf_counter() - built, game="snake")
+        METRICS.count("frames_total", game="snake")
+        METRICS.count("frame_bytes_total", size, game="snake")
+
+    def build_full_frame(self):
+        """Render the whole screen and remember it as the front buffer"""
+        # The front buffer is indexed by packed board cell
+        self._front = [' '] * (self.width * self.height)
+        for cell in self.snake:
+            self._front[cell] = self.SNAKE_BODY
+        for cell in (self.food, self.snake[0]):
+            self._front[cell] = self.cell_glyph(cell)
+
+        self._drawn_header = self.header_lines()
+        parts = ["\033[2J\033[H" if self._clear_next else "\033[H"]
+        self._clear_next = False
+        for row, line in enumerate(self._drawn_header, 1):
+            parts.append(f"\033[{row};1H{line}\033[K")
+        parts.append(f"\033[{len(self._drawn_header) + 1};1H\033[K")
+
         border = self.BLUE + self.WALL * (self.width + 2) + self.RESET
-        print(border)
-        
-        for row in grid:
-            line = self.BLUE + self.WALL + self.RESET
-            for cell in row:
-                if cell == self.SNAKE_HEAD:
-                    line += self.BOLD + self.GREEN + cell + self.RESET
-                elif cell == self.SNAKE_BODY:
-                    line += self.GREEN + cell + self.RESET
-                elif cell == self.FOOD:
-                    line += self.BOLD + self.RED + cell + self.RESET
-                else:
-                    line += cell
-            line += self.BLUE + self.WALL + self.RESET
-            print(line)
-            
-        print(border)
-        
-        # Clear any remaining lines from previous frame
-        print("\033[J", end='', flush=True)
-        
+        wall = self.BLUE + self.WALL + self.RESET
+        parts.append(f"\033[{self.BOARD_TOP - 1};1H{border}")
+        codes = self.CELL_CODES
+        for y in range(self.height):
+            cells = self._front[y * self.width:(y + 1) * self.width]
+            line = ''.join(codes[cell] for cell in cells)
+            parts.append(f"\033[{self.BOARD_TOP + y};1H{wall}{line}{wall}")
+        parts.append(f"\033[{self.BOARD_TOP + self.height};1H{border}")
+
+        # Clear any remaining lines from previous screens
+        parts.append("\033[J")
+        return compact_sgr(''.join(parts))
+
+    def keyframe(self):
+        """Whole screen for a spectator, the player's front buffer stays as it is"""
+        saved = self._front, self._drawn_header, self._clear_next
+        self._clear_next = True
+        try:
+            return self.build_full_frame()
+        finally:
+            self._front, self._drawn_header, self._clear_next = saved
+
+    def build_diff_frame(self):
+        """Render only the cells and header lines that differ from the front buffer"""
+        parts = []
+        header = self.header_lines()
+        for row, (old, new) in enumerate(zip(self._drawn_header, header), 1):
+            if old != new:
+                parts.append(f"\033[{row};1H{new}\033[K")
+        self._drawn_header = header
+
+        # Only the head, the cell behind it, the tail and the food can change per move
+        dirty = {self.snake[0], self.snake[-1], self.food,
+                 self._drawn_head, self._drawn_tail, self._drawn_food}
+        codes = self.CELL_CODES
+        for cell in dirty:
+            glyph = self.cell_glyph(cell)
+            if self._front[cell] != glyph:
+                self._front[cell] = glyph
+                x, y = self.board.unpack(cell)
+                parts.append(f"\033[{self.BOARD_TOP + y};{x + 2}H{codes[glyph]}")
+        return compact_sgr(''.join(parts))
+
     def game_over(self):
         """Handle game over"""
         self.running = False
@@ -422,8 +561,12 @@ class SnakeGame:
         # Clear screen properly
         self.clear_screen()
         
-        # Add score to high scores
-        self.add_score(self.player_name, self.score)
+        # Add score to high scores, keep the inputs to settle disputes
+        entry_id = self.add_score(self.player_name, self.score)
+        saved = entry_id is not None
+        if saved and self.is_ranked(entry_id):
+            # Only scoreboard entries keep a replay, compaction drops the rest
+            self.save_replay(entry_id)
         
         print(f"{self.BOLD}{self.RED}GAME OVER!{self.RESET}")
         print()
@@ -432,6 +575,8 @@ class SnakeGame:
         
         if self.score == self.get_high_score() and self.score > 0:
             print(f"{self.BOLD}{self.YELLOW}NEW HIGH SCORE!{self.RESET}")
+        if not saved:
+            print(f"{self.RED}Your score could not be saved.{self.RESET}")
             
         print()
         print("Press any key to continue...")
@@ -442,11 +587,16 @@ class SnakeGame:
             input()
             
     def run(self):
-        """Main entry point"""
+        """Main entry point, opens with the demo when autopilot is set"""
         try:
+            if self.autopilot:
+                self.start_demo()
             self.show_menu()
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, EOFError):
             pass
         finally:
             self.clear_screen()
             print("Thanks for playing!")
+
+# Entry point used by the command dispatcher
+GAME = SnakeGame
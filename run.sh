@@ -3,6 +3,11 @@
 # whois-julius launcher script
 # Author: Julius Duden
 
+# With a zygote running (core/main.py --zygote SOCKET) skip all setup and fork a warm session
+if [ -n "$WHOIS_ZYGOTE" ] && [ -S "$WHOIS_ZYGOTE" ]; then
+    exec python3 -S "$(dirname "$0")/core/zygote.py" "$WHOIS_ZYGOTE"
+fi
+
 # Colors for output
 GREEN='\033[0;32m'
 BLUE='\033[0;34m'
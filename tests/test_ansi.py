@@ -0,0 +1,163 @@
+"""SGR transitions, SgrCompactor and ScreenEncoder against a model terminal"""
+
+import os
+import random
+import re
+import sys
+import unittest
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(BASE_PATH, "core"), os.path.join(BASE_PATH, "games")]
+
+from ansi import (DEFAULT, ScreenEncoder, SgrCompactor, blank_safe, compact_sgr,
+                  parse_sgr, style, transition)
+
+GREEN, RED, BOLD, RESET = "\033[32m", "\033[31m", "\033[1m", "\033[0m"
+TOKEN = re.compile(r"\033\[([0-9;?]*)([@-~])|([^\033])", re.S)
+
+class Screen:
+    """Just enough of a terminal for what the encoders send"""
+
+    def __init__(self, cols, rows):
+        self.cols, self.rows = cols, rows
+        self.x = self.y = 0
+        self.state = DEFAULT
+        self.clear()
+
+    def clear(self):
+        self.cells = [[ScreenEncoder.BLANK] * self.cols for _ in range(self.rows)]
+
+    def feed(self, text):
+        for match in TOKEN.finditer(text):
+            params, final, char = match.groups()
+            if char is not None:
+                self.cells[self.y][self.x] = (self.state, char)
+                self.x += 1
+                continue
+            numbers = [int(n) if n else 0 for n in params.split(';')] if params else []
+            if final == 'm':
+                self.state = parse_sgr(params, self.state)
+            elif final == 'H':
+                self.y = (numbers[0] if numbers else 1) - 1
+                self.x = (numbers[1] if len(numbers) > 1 else 1) - 1
+            elif final == 'C':
+                self.x += numbers[0] if numbers and numbers[0] else 1
+            elif final == 'J' and numbers == [2]:
+                self.clear()
+            elif final in 'KX':
+                end = self.cols if final == 'K' else self.x + numbers[0]
+                for x in range(self.x, end):
+                    self.cells[self.y][x] = (self.state, ' ')
+            else:
+                raise ValueError(f"unexpected sequence {match.group(0)!r}")
+
+    def looks_like(self, grid):
+        """True if every cell shows what grid asks for"""
+        for row, wanted in zip(self.cells, grid):
+            for got, cell in zip(row, wanted):
+                if got[1] == cell[1] == ' ' and blank_safe(got[0]) and blank_safe(cell[0]):
+                    continue
+                if got != cell:
+                    return False
+        return True
+
+class TransitionTest(unittest.TestCase):
+    def test_equal_states_need_nothing(self):
+        self.assertEqual(transition(style(GREEN), style(GREEN)), '')
+
+    def test_result_reaches_the_new_state(self):
+        states = [DEFAULT, style(GREEN), style(RED), style("\033[1;32m"), style("\033[2;4m"),
+                  style("\033[7;41m"), style("\033[38;5;200m"), style("\033[1;3;9;44m")]
+        for old in states:
+            for new in states:
+                sequence = transition(old, new)
+                params = sequence[2:-1] if sequence else None
+                self.assertEqual(parse_sgr(params, old) if sequence else old, new, (old, new))
+
+    def test_picks_the_shorter_of_delta_and_reset(self):
+        self.assertEqual(transition(style(GREEN), style(RED)), RED)
+        self.assertEqual(transition(style("\033[1;4;7;32m"), DEFAULT), "\033[m")
+        self.assertEqual(transition(style("\033[1;32m"), style(GREEN)), "\033[22m")
+
+class SgrCompactorTest(unittest.TestCase):
+    def test_drops_resets_between_same_colors(self):
+        self.assertEqual(compact_sgr(f"{GREEN}a{RESET}{GREEN}b{RESET}"), f"{GREEN}ab\033[m")
+
+    def test_spaces_do_not_force_a_change(self):
+        self.assertEqual(compact_sgr(f"{GREEN}a{RESET} {GREEN}b{RESET}"), f"{GREEN}a b\033[m")
+
+    def test_background_spaces_do(self):
+        self.assertEqual(compact_sgr(f"\033[41m {RESET}"), "\033[41m \033[m")
+
+    def test_state_carries_across_feeds(self):
+        compactor = SgrCompactor()
+        self.assertEqual(compactor.feed(f"{GREEN}a{RESET}"), f"{GREEN}a")
+        self.assertEqual(compactor.feed(f"{GREEN}b"), "b")
+        self.assertEqual(compactor.feed(RESET), "")
+        self.assertEqual(compactor.sync(), "\033[m")
+        self.assertEqual(compactor.sync(), "")
+
+    def test_erase_uses_the_wanted_background(self):
+        compactor = SgrCompactor()
+        self.assertEqual(compactor.feed("\033[44m\033[K"), "\033[44m\033[K")
+
+    def test_output_looks_the_same(self):
+        rng = random.Random(1)
+        codes = [GREEN, RED, BOLD, RESET, "\033[4m", "\033[41m", "\033[22m", "\033[39m"]
+        for _ in range(200):
+            text = "".join(rng.choice(codes) if rng.random() < 0.5 else rng.choice("ab ")
+                           for _ in range(30))
+            plain, compacted = Screen(40, 1), Screen(40, 1)
+            plain.feed(text + RESET)
+            compacted.feed(compact_sgr(text + RESET))
+            self.assertTrue(compacted.looks_like(plain.cells), text)
+            self.assertLessEqual(len(compact_sgr(text)), len(text))
+
+class ScreenEncoderTest(unittest.TestCase):
+    COLS, ROWS = 24, 6
+
+    def grid(self, rng, fill):
+        styles = [DEFAULT, style(GREEN), style("\033[1;32m"), style("\033[41m")]
+        return [[(rng.choice(styles), rng.choice("xy#")) if rng.random() < fill else ScreenEncoder.BLANK
+                 for _ in range(self.COLS)] for _ in range(self.ROWS)]
+
+    def test_frames_reach_the_screen(self):
+        rng = random.Random(2)
+        encoder = ScreenEncoder(self.COLS, self.ROWS)
+        screen = Screen(self.COLS, self.ROWS)
+        for n in range(100):
+            grid = self.grid(rng, rng.choice((0.05, 0.3, 0.9)))
+            screen.feed(encoder.encode(grid))
+            self.assertTrue(screen.looks_like(grid), n)
+            self.assertEqual(screen.state, DEFAULT)
+
+    def test_positions_limit_the_diff(self):
+        rng = random.Random(3)
+        encoder = ScreenEncoder(self.COLS, self.ROWS)
+        screen = Screen(self.COLS, self.ROWS)
+        grid = self.grid(rng, 0.5)
+        screen.feed(encoder.encode(grid))
+        changed = []
+        for _ in range(10):
+            x, y = rng.randrange(self.COLS), rng.randrange(self.ROWS)
+            grid[y][x] = (style(RED), 'z')
+            changed.append(y * self.COLS + x)
+        screen.feed(encoder.encode(grid, changed))
+        self.assertTrue(screen.looks_like(grid))
+
+    def test_unchanged_frame_sends_nothing(self):
+        rng = random.Random(4)
+        encoder = ScreenEncoder(self.COLS, self.ROWS)
+        grid = self.grid(rng, 0.5)
+        encoder.encode(grid)
+        self.assertEqual(encoder.encode(grid), '')
+
+    def test_invalidate_repaints_from_a_clear_screen(self):
+        encoder = ScreenEncoder(self.COLS, self.ROWS)
+        grid = self.grid(random.Random(5), 0.5)
+        encoder.encode(grid)
+        encoder.invalidate()
+        self.assertTrue(encoder.encode(grid).startswith("\033[H\033[2J"))
+
+if __name__ == "__main__":
+    unittest.main()
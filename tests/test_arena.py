@@ -0,0 +1,212 @@
+"""SnakeArena collisions and respawn, ArenaServer input and fan-out"""
+
+import asyncio
+import os
+import socket
+import sys
+import unittest
+from collections import deque
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(BASE_PATH, "core"), os.path.join(BASE_PATH, "games")]
+
+from _arena import EMPTY, FOOD, ArenaClient, ArenaServer, SnakeArena
+
+def place(arena, snake, cells, direction):
+    """Put snake on the given (x, y) cells, head first, heading in direction"""
+    arena.kill(snake)
+    snake.body = deque()
+    for x, y in cells:
+        cell = arena.board.pack(x, y)
+        if arena.owner[cell] == FOOD:
+            arena.food -= 1
+        arena.set_cell(cell, snake.id)
+        snake.body.append(cell)
+    snake.direction = snake.next_direction = direction
+    snake.alive = True
+
+class SnakeArenaTest(unittest.TestCase):
+    def arena(self, players=1, width=12, height=8):
+        arena = SnakeArena(width, height, seed=1)
+        snakes = [arena.join() for _ in range(players)]
+        # Food somewhere the tests never go
+        for cell, who in enumerate(arena.owner):
+            if who == FOOD:
+                arena.set_cell(cell, EMPTY)
+        arena.food = 1
+        arena.set_cell(arena.board.pack(width - 1, height - 1), FOOD)
+        return arena, snakes
+
+    def assert_board_consistent(self, arena):
+        for cell, who in enumerate(arena.owner):
+            self.assertEqual(arena.board.occupied[cell], who != EMPTY)
+        for snake in arena.snakes.values():
+            for cell in snake.body:
+                self.assertEqual(arena.owner[cell], snake.id)
+        self.assertEqual(arena.food, sum(1 for who in arena.owner if who == FOOD))
+
+    def test_move_and_eat(self):
+        arena, (snake,) = self.arena()
+        place(arena, snake, [(2, 2), (1, 2)], 'RIGHT')
+        arena.set_cell(arena.board.pack(4, 2), FOOD)
+        arena.food += 1
+        self.assertEqual(arena.step(), [])
+        self.assertEqual([arena.board.unpack(c) for c in snake.body], [(3, 2), (2, 2)])
+        arena.step()
+        self.assertEqual(len(snake.body), 3)
+        self.assertEqual(snake.score, 10)
+        self.assert_board_consistent(arena)
+
+    def test_wall_crash(self):
+        arena, (snake,) = self.arena()
+        place(arena, snake, [(11, 3)], 'RIGHT')
+        self.assertEqual(arena.step(), [snake])
+        self.assertFalse(snake.alive)
+        self.assertEqual(len(snake.body), 0)
+        self.assert_board_consistent(arena)
+
+    def test_self_crash(self):
+        arena, (snake,) = self.arena()
+        place(arena, snake, [(2, 1), (2, 2), (1, 2), (1, 1), (0, 1)], 'UP')
+        snake.turn('LEFT')
+        self.assertEqual(arena.step(), [snake])
+
+    def test_crash_into_another_body(self):
+        arena, (first, second) = self.arena(2)
+        place(arena, first, [(3, 3), (2, 3)], 'RIGHT')
+        place(arena, second, [(5, 2), (4, 2), (4, 3), (4, 4)], 'RIGHT')
+        self.assertEqual(arena.step(), [first])
+        self.assertTrue(second.alive)
+        self.assert_board_consistent(arena)
+
+    def test_head_on_into_the_same_cell(self):
+        arena, (first, second, bystander) = self.arena(3)
+        place(arena, first, [(2, 3), (1, 3)], 'RIGHT')
+        place(arena, second, [(4, 3), (5, 3)], 'LEFT')
+        place(arena, bystander, [(2, 6), (1, 6)], 'RIGHT')
+        self.assertEqual(sorted(s.id for s in arena.step()), [first.id, second.id])
+        self.assertTrue(bystander.alive)
+        self.assertEqual(arena.owner[arena.board.pack(3, 3)], EMPTY)
+        self.assert_board_consistent(arena)
+
+    def test_heads_swapping_cells(self):
+        arena, (first, second) = self.arena(2)
+        place(arena, first, [(3, 3), (2, 3)], 'RIGHT')
+        place(arena, second, [(4, 3), (5, 3)], 'LEFT')
+        self.assertEqual(sorted(s.id for s in arena.step()), [first.id, second.id])
+        self.assert_board_consistent(arena)
+
+    def test_reversing_is_ignored(self):
+        arena, (snake,) = self.arena()
+        place(arena, snake, [(3, 3), (2, 3)], 'RIGHT')
+        snake.turn('LEFT')
+        arena.step()
+        self.assertEqual(arena.board.unpack(snake.body[0]), (4, 3))
+
+    def test_respawn_after_a_crash(self):
+        arena, (snake,) = self.arena()
+        place(arena, snake, [(11, 3), (10, 3)], 'RIGHT')
+        snake.score = 30
+        arena.step()
+        self.assertTrue(arena.spawn(snake))
+        self.assertTrue(snake.alive)
+        self.assertEqual(len(snake.body), 1)
+        self.assertEqual(snake.score, 0)
+        self.assert_board_consistent(arena)
+
+    def test_leaving_frees_the_cells(self):
+        arena, (snake, other) = self.arena(2)
+        place(arena, snake, [(3, 3), (2, 3)], 'RIGHT')
+        arena.leave(snake)
+        self.assertNotIn(snake.id, arena.snakes)
+        self.assertNotIn(snake.id, list(arena.owner))
+        self.assert_board_consistent(arena)
+
+    def test_many_random_ticks_keep_the_board_consistent(self):
+        arena, snakes = self.arena(8, 30, 15)
+        directions = ['UP', 'DOWN', 'LEFT', 'RIGHT']
+        for tick in range(300):
+            for n, snake in enumerate(snakes):
+                if not snake.alive:
+                    arena.spawn(snake)
+                elif (tick + n) % 4 == 0:
+                    snake.turn(directions[(tick // 4 + n) % 4])
+            arena.step()
+            self.assert_board_consistent(arena)
+
+class ParseKeysTest(unittest.TestCase):
+    def test_arrows_in_both_cursor_modes_and_wasd(self):
+        keys = ArenaServer.parse_keys("\x1b[A\x1bOA\x1b[D\x1bOC\x1bOBwasdW")
+        self.assertEqual(keys, ['UP', 'UP', 'LEFT', 'RIGHT', 'DOWN', 'UP', 'LEFT', 'DOWN', 'RIGHT', 'UP'])
+
+    def test_quit_and_respawn_are_keys_in_order(self):
+        self.assertEqual(ArenaServer.parse_keys("dRq"), ['RIGHT', 'RESPAWN', 'QUIT'])
+        self.assertEqual(ArenaServer.parse_keys("\x03"), ['QUIT'])
+        self.assertEqual(ArenaServer.parse_keys("x\x1bOAy"), ['UP'])
+
+class Transport:
+    def __init__(self):
+        self.backlog = 0
+
+    def is_closing(self):
+        return False
+
+    def get_write_buffer_size(self):
+        return self.backlog
+
+class Writer:
+    def __init__(self):
+        self.transport = Transport()
+        self.frames = []
+
+    def write(self, data):
+        self.frames.append(data)
+
+class ArenaServerTest(unittest.TestCase):
+    def test_backed_up_client_gets_a_full_frame_once_drained(self):
+        server = ArenaServer(SnakeArena(20, 10, seed=2))
+        fast, slow = Writer(), Writer()
+        for writer in (fast, slow):
+            server.clients[server.arena.join()] = ArenaClient(writer)
+        server.tick()
+        self.assertTrue(all(w.frames[-1].startswith(b"\033[2J") for w in (fast, slow)))
+        slow.transport.backlog = ArenaServer.MAX_BACKLOG + 1
+        server.tick()
+        server.tick()
+        self.assertEqual(len(slow.frames), 1)
+        self.assertEqual(len(fast.frames), 3)
+        self.assertFalse(fast.frames[-1].startswith(b"\033[2J"))
+        slow.transport.backlog = 0
+        server.tick()
+        self.assertTrue(slow.frames[-1].startswith(b"\033[2J"))
+
+class ArenaSocketTest(unittest.IsolatedAsyncioTestCase):
+    async def test_keys_over_a_socket(self):
+        server = ArenaServer(SnakeArena(20, 10, seed=3))
+        address = await server.start("127.0.0.1", 0)
+        self.addAsyncCleanup(self.close, server)
+
+        sock = socket.create_connection(address, timeout=5)
+        self.addCleanup(sock.close)
+        await self.until(lambda: server.clients)
+        snake = next(iter(server.clients))
+        snake.direction = snake.next_direction = 'RIGHT'
+        await asyncio.to_thread(sock.sendall, b"\x1bOA")  # application mode arrow
+        await self.until(lambda: snake.next_direction == 'UP')
+        await asyncio.to_thread(sock.sendall, b"xyq")
+        await self.until(lambda: not server.clients)
+        self.assertNotIn(snake.id, server.arena.snakes)
+
+    async def until(self, condition, timeout=5):
+        for _ in range(int(timeout / 0.01)):
+            if condition():
+                return
+            await asyncio.sleep(0.01)
+        self.fail("condition not reached")
+
+    async def close(self, server):
+        server.server.close()
+        await server.server.wait_closed()
+
+if __name__ == "__main__":
+    unittest.main()
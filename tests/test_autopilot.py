@@ -0,0 +1,79 @@
+"""Autopilot moves, dead-end avoidance and bounded work per tick"""
+
+import os
+import sys
+import unittest
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(BASE_PATH, "core"), os.path.join(BASE_PATH, "games")]
+
+from _autopilot import Autopilot
+from _snake_engine import SnakeBoard, SnakeEngine
+
+def place(engine, cells, direction, food):
+    """Put the snake on the given (x, y) cells, head first, and the food at food"""
+    engine.board = SnakeBoard(engine.width, engine.height)
+    for x, y in reversed(cells):
+        engine.board.push_head(engine.board.pack(x, y))
+    engine.direction = engine.next_direction = direction
+    engine.food = engine.board.pack(*food)
+
+class AutopilotTest(unittest.TestCase):
+    def choose(self, engine):
+        direction = Autopilot(engine).choose()
+        engine.turn(direction)
+        return direction
+
+    def test_heads_for_the_food(self):
+        engine = SnakeEngine(10, 10, seed=1)
+        place(engine, [(5, 5), (4, 5)], 'RIGHT', (5, 1))
+        self.assertEqual(self.choose(engine), 'UP')
+        place(engine, [(5, 5), (4, 5)], 'RIGHT', (9, 5))
+        self.assertEqual(self.choose(engine), 'RIGHT')
+
+    def test_shortest_way_past_its_own_body(self):
+        engine = SnakeEngine(10, 10, seed=1)
+        place(engine, [(5, 5), (6, 5), (6, 4), (5, 4)], 'LEFT', (9, 5))
+        self.assertEqual(self.choose(engine), 'DOWN')
+
+    def test_reaches_food_behind_the_body(self):
+        # A U-shaped body, the food on the far side of its right arm
+        engine = SnakeEngine(10, 10, seed=1)
+        body = [(3, y) for y in range(5, 10)] + [(4, y) for y in range(9, 0, -1)]
+        place(engine, body, 'UP', (6, 5))
+        pilot = Autopilot(engine)
+        for _ in range(30):
+            engine.turn(pilot.choose())
+            engine.step()
+            self.assertTrue(engine.alive)
+            if engine.score:
+                break
+        self.assertEqual(engine.score, 10)
+
+    def test_stays_out_of_a_pocket_shorter_than_the_snake(self):
+        # The body walls off x 0-1, y 0-2 and the food lies inside
+        engine = SnakeEngine(8, 6, seed=1)
+        body = [(2, 0), (2, 1), (2, 2), (2, 3), (1, 3), (0, 3), (0, 4), (1, 4), (2, 4), (3, 4)]
+        place(engine, body, 'UP', (0, 0))
+        self.assertEqual(self.choose(engine), 'RIGHT')
+
+    def test_field_grows_a_bounded_amount_per_tick(self):
+        engine = SnakeEngine(300, 300, seed=1)
+        pilot = Autopilot(engine)
+        pilot.choose()
+        reached = sum(1 for stamp in pilot.stamp if stamp == pilot.generation)
+        self.assertGreaterEqual(reached, Autopilot.FIELD_BUDGET)
+        self.assertLessEqual(reached, 4 * Autopilot.FIELD_BUDGET + 1)
+        self.assertTrue(pilot.frontier)
+
+    def test_plays_whole_games(self):
+        for seed in range(1, 6):
+            engine = SnakeEngine(30, 15, seed=seed)
+            pilot = Autopilot(engine)
+            while engine.alive and engine.tick < 3000:
+                engine.turn(pilot.choose())
+                engine.step()
+            self.assertGreaterEqual(engine.score, 200, f"seed {seed}")  # 20 meals at least
+
+if __name__ == "__main__":
+    unittest.main()
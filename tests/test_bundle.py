@@ -0,0 +1,84 @@
+"""Content bundle build, lookups and fallbacks to the loose files"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(BASE_PATH, "core"), os.path.join(BASE_PATH, "games")]
+
+from bundle import ContentBundle, build, is_stale, records, signature_of
+from cache import ContentCache
+
+def unused_loader(path):
+    raise AssertionError(f"{path} should have come from the bundle")
+
+class BundleTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dir = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.dir.name, "content.bundle")
+        cls.count = build(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.dir.cleanup()
+
+    def bundle(self, path=None):
+        bundle = ContentBundle(path or self.path)
+        self.addCleanup(bundle.close)
+        return bundle
+
+    def test_records_match_their_loaders(self):
+        bundle = self.bundle()
+        built = 0
+        for name, variant, source, loader in records():
+            if os.path.exists(source):
+                self.assertEqual(bundle.get(name, variant, signature_of(source)), loader(source))
+                built += 1
+        self.assertEqual(built, self.count)
+        self.assertFalse(is_stale(self.path))
+
+    def test_other_source_versions_are_ignored(self):
+        bundle = self.bundle()
+        name, variant, source, _loader = next(r for r in records() if os.path.exists(r[2]))
+        mtime_ns, size = signature_of(source)
+        self.assertIsNotNone(bundle.view(name, variant))
+        self.assertIsNone(bundle.get(name, variant, (mtime_ns + 1, size)))
+        self.assertIsNone(bundle.get(name, "no-such-variant"))
+
+    def test_missing_damaged_and_truncated_files(self):
+        missing = os.path.join(self.dir.name, "missing.bundle")
+        self.assertFalse(self.bundle(missing).open())
+        self.assertTrue(is_stale(missing))
+
+        damaged = os.path.join(self.dir.name, "damaged.bundle")
+        with open(damaged, 'wb') as f:
+            f.write(b"not a bundle at all")
+        self.assertIsNone(self.bundle(damaged).get("cv.txt"))
+
+        truncated = os.path.join(self.dir.name, "truncated.bundle")
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        with open(truncated, 'wb') as f:
+            f.write(data[:-1])
+        self.assertFalse(self.bundle(truncated).open())
+
+    def test_cache_takes_records_from_the_bundle(self):
+        cache = ContentCache(os.path.join(BASE_PATH, "data"), bundle=self.bundle())
+        name, variant, source, loader = next(r for r in records() if os.path.exists(r[2]))
+        self.assertEqual(cache.get(name, unused_loader, variant, path=source), loader(source))
+        self.assertEqual(cache.stats()["bundled"], 1)
+
+        # A copy has another mtime, so the bundled record doesn't apply to it
+        copy = os.path.join(self.dir.name, os.path.basename(source))
+        shutil.copy(source, copy)
+        os.utime(copy, ns=(0, 0))
+        cache.clear()
+        self.assertEqual(cache.get(name, loader, variant, path=copy), loader(source))
+        self.assertEqual(cache.stats()["misses"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""ContentCache hits, change detection and missing files"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(BASE_PATH, "core"), os.path.join(BASE_PATH, "games")]
+
+from cache import ContentCache
+
+class Loader:
+    """Reads a file and counts how often it was asked to"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, path):
+        self.calls += 1
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+
+class ContentCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.loader = Loader()
+
+    def write(self, text, name="cv.txt", mtime=None):
+        path = os.path.join(self.dir.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def test_repeat_lookups_within_the_interval_skip_the_disk(self):
+        cache = ContentCache(self.dir.name, check_interval=60)
+        path = self.write("one")
+        self.assertEqual(cache.get("cv.txt", self.loader), "one")
+        os.remove(path)
+        self.assertEqual(cache.get("cv.txt", self.loader), "one")
+        self.assertEqual(self.loader.calls, 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_unchanged_file_is_not_reloaded(self):
+        cache = ContentCache(self.dir.name, check_interval=0)
+        self.write("one")
+        for _ in range(3):
+            self.assertEqual(cache.get("cv.txt", self.loader), "one")
+        self.assertEqual(self.loader.calls, 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_changed_file_is_reloaded(self):
+        cache = ContentCache(self.dir.name, check_interval=0)
+        self.write("one", mtime=1000)
+        cache.get("cv.txt", self.loader)
+        self.write("two", mtime=2000)  # same size, only the mtime tells
+        self.assertEqual(cache.get("cv.txt", self.loader), "two")
+        self.assertEqual(self.loader.calls, 2)
+
+    def test_missing_file_is_none_and_forgotten(self):
+        cache = ContentCache(self.dir.name, check_interval=0)
+        self.assertIsNone(cache.get("cv.txt", self.loader))
+        path = self.write("one")
+        cache.get("cv.txt", self.loader)
+        os.remove(path)
+        self.assertIsNone(cache.get("cv.txt", self.loader))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_variants_and_paths_outside_data(self):
+        cache = ContentCache(os.path.join(self.dir.name, "data"), check_interval=60)
+        path = self.write("art", name="ascii.py")
+        self.assertEqual(cache.get("ascii.py", self.loader, path=path), "art")
+        self.assertEqual(cache.get("ascii.py", lambda p: "ART", "rendered", path=path), "ART")
+        self.assertEqual(cache.get("ascii.py", self.loader, path=path), "art")
+        self.assertEqual(self.loader.calls, 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+"""Asciicast recording, lazy reading and seeking"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(BASE_PATH, "core"), os.path.join(BASE_PATH, "games")]
+
+from cast import CLEAR, CastPlayer, CastReader, CastWriter
+
+class Geometry:
+    """Stands in for the games' TerminalGeometry"""
+
+    def __init__(self, size):
+        self.size = size
+
+class CastTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "session.cast")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def record(self, events, header=None):
+        """Write (time, kind, data) events as a cast file"""
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(header or {"version": 2, "width": 80, "height": 24}) + "\n")
+            for event in events:
+                f.write(json.dumps(event) + "\n")
+
+    def reader(self):
+        reader = CastReader(self.path)
+        self.addCleanup(reader.close)
+        return reader
+
+class CastWriterTest(CastTest):
+    def test_round_trip(self):
+        writer = CastWriter(self.path, title="test", buffer_size=64)
+        writer.output("hello ")
+        writer.output("wörld\n".encode('utf-8')[:3])  # a character split across writes
+        writer.output("wörld\n".encode('utf-8')[3:])
+        writer.close()
+        reader = self.reader()
+        self.assertEqual(reader.header["title"], "test")
+        self.assertEqual((reader.header["width"], reader.header["height"]), (80, 24))
+        self.assertEqual("".join(data for _t, kind, data, _o in reader.events() if kind == "o"),
+                         "hello wörld\n")
+
+    def test_buffer_is_bounded(self):
+        writer = CastWriter(self.path, buffer_size=256)
+        for _ in range(100):
+            writer.output("x" * 50)
+            self.assertLess(len(writer.buffer), 256 + 100)
+        writer.close()
+        self.assertEqual(writer.events, 100)
+
+    def test_resize_becomes_an_event(self):
+        geometry = Geometry((80, 24))
+        writer = CastWriter(self.path, geometry=geometry)
+        writer.output("a")
+        geometry.size = (100, 30)
+        writer.output("b")
+        writer.close()
+        events = [(kind, data) for _t, kind, data, _o in self.reader().events()]
+        self.assertEqual(events, [("o", "a"), ("r", "100x30"), ("o", "b")])
+
+class CastReaderTest(CastTest):
+    def test_rejects_other_files(self):
+        with open(self.path, 'w') as f:
+            f.write('{"version": 1}\n')
+        self.assertRaises(ValueError, CastReader, self.path)
+
+    def test_skips_cut_off_lines(self):
+        self.record([[0.5, "o", "a"]])
+        with open(self.path, 'a') as f:
+            f.write('[1.0, "o", "b')
+        self.assertEqual([data for _t, _k, data, _o in self.reader().events()], ["a"])
+
+    def test_clear_before(self):
+        self.record([[0.1, "o", "a"], [1.0, "o", CLEAR + "b"], [2.0, "o", "c"],
+                     [3.0, "o", "x" + CLEAR], [3.0, "o", CLEAR], [4.0, "o", "d"]])
+        reader = self.reader()
+        offsets = {t: offset for t, _k, _d, offset in reader.events()}
+        self.assertEqual(len(reader.clears), 3)
+        self.assertIsNone(reader.clear_before(0.5))
+        self.assertEqual(reader.clear_before(1.0), offsets[1.0])
+        self.assertEqual(reader.clear_before(2.5), offsets[1.0])
+        self.assertEqual(reader.clear_before(3.0), reader.clears[-1][1])
+        self.assertEqual(reader.clear_before(100), reader.clears[-1][1])
+
+    def test_clears_are_indexed_once(self):
+        self.record([[1.0, "o", CLEAR], [2.0, "o", "a"], [3.0, "o", CLEAR]])
+        reader = self.reader()
+        list(reader.events())
+        list(reader.events())
+        offset = reader.clear_before(1.0)
+        list(reader.events(offset))
+        self.assertEqual(len(reader.clears), 2)
+
+class CastPlayerTest(CastTest):
+    def player(self):
+        out = io.StringIO()
+        player = CastPlayer(self.path, out=out, idle_limit=0.01)
+        self.addCleanup(player.close)
+        return player, out
+
+    def test_plays_output_in_order(self):
+        self.record([[0.0, "o", "a"], [0.01, "r", "90x30"], [0.02, "o", "b"]])
+        player, out = self.player()
+        self.assertEqual(player.play(), 0.02)
+        self.assertEqual(out.getvalue(), "ab")
+
+    def test_seek_forward_and_back(self):
+        self.record([[1.0, "o", CLEAR + "one"], [2.0, "o", "+"], [3.0, "o", CLEAR + "two"],
+                     [4.0, "o", "+"], [5.0, "o", "end"]])
+        player, out = self.player()
+        player.seek(4.5)
+        self.assertEqual(out.getvalue(), CLEAR + "two+")
+        self.assertEqual(player.position, 4.5)
+        out.truncate(0)
+        out.seek(0)
+        player.seek(2.5)
+        self.assertEqual(out.getvalue(), CLEAR + "one+")  # starts at a clear, no extra reset
+        self.assertEqual(player.next_event()[2], CLEAR + "two")
+
+    def test_seek_window_limits_replayed_output(self):
+        self.record([[t / 10, "o", "x" * 100] for t in range(50)])
+        player, out = self.player()
+        player.SEEK_WINDOW = 1000
+        player.seek(10)
+        written = out.getvalue()
+        self.assertTrue(written.startswith("\033[0m\033[H\033[2J"))
+        self.assertLessEqual(written.count("x"), 1000)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""TerminalGeometry resize detection and notifications"""
+
+import os
+import signal
+import sys
+import unittest
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(BASE_PATH, "core"), os.path.join(BASE_PATH, "games")]
+
+from _geometry import TerminalGeometry
+
+class FakeTerminal(TerminalGeometry):
+    """A terminal whose size the test sets"""
+
+    def __init__(self, size=(80, 24), **kwargs):
+        self.terminal_size = size
+        super().__init__(**kwargs)
+
+    def read_size(self):
+        return self.terminal_size
+
+class TerminalGeometryTest(unittest.TestCase):
+    def test_no_terminal_gives_the_default(self):
+        read_end, write_end = os.pipe()
+        self.addCleanup(os.close, read_end)
+        self.addCleanup(os.close, write_end)
+        self.assertEqual(TerminalGeometry(fd=write_end, default=(100, 40)).size, (100, 40))
+
+    def test_polling_without_signals(self):
+        geometry = FakeTerminal(check_interval=0)
+        sizes = []
+        geometry.listeners.append(lambda cols, rows: sizes.append((cols, rows)))
+        self.assertFalse(geometry.poll())
+        geometry.terminal_size = (120, 50)
+        self.assertTrue(geometry.poll())
+        self.assertFalse(geometry.poll())
+        self.assertEqual(sizes, [(120, 50)])
+        self.assertEqual((geometry.cols, geometry.rows), (120, 50))
+
+    def test_polling_waits_for_the_check_interval(self):
+        geometry = FakeTerminal(check_interval=60)
+        geometry.terminal_size = (120, 50)
+        self.assertFalse(geometry.poll())
+        self.assertEqual(geometry.size, (80, 24))
+
+    @unittest.skipUnless(hasattr(signal, 'SIGWINCH'), "needs SIGWINCH")
+    def test_resize_signal_reaches_listeners_at_the_next_poll(self):
+        chained = []
+        previous = signal.signal(signal.SIGWINCH, lambda signum, frame: chained.append(signum))
+        self.addCleanup(signal.signal, signal.SIGWINCH, previous)
+        geometry = FakeTerminal(check_interval=60)
+        sizes = []
+        geometry.subscribe(lambda cols, rows: sizes.append((cols, rows)))
+        self.addCleanup(geometry.unwatch)
+        self.assertTrue(geometry.watching)
+
+        geometry.terminal_size = (132, 43)
+        os.kill(os.getpid(), signal.SIGWINCH)
+        self.assertEqual(sizes, [])  # never in the middle of a frame
+        self.assertEqual(chained, [signal.SIGWINCH])
+        self.assertTrue(geometry.poll())
+        self.assertFalse(geometry.poll())
+        self.assertEqual(sizes, [(132, 43)])
+
+        geometry.unwatch()
+        os.kill(os.getpid(), signal.SIGWINCH)
+        self.assertEqual(len(chained), 2)  # the old handler is back
+
+    def test_unsubscribed_callbacks_are_not_called(self):
+        geometry = FakeTerminal(check_interval=0)
+        sizes = []
+        callback = lambda cols, rows: sizes.append((cols, rows))
+        geometry.subscribe(callback)
+        self.addCleanup(geometry.unwatch)
+        geometry.unsubscribe(callback)
+        geometry.terminal_size = (90, 30)
+        geometry.changed = True
+        self.assertTrue(geometry.poll())
+        self.assertEqual(sizes, [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""KeyReader decoding of terminal input"""
+
+import os
+import sys
+import time
+import unittest
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(BASE_PATH, "core"), os.path.join(BASE_PATH, "games")]
+
+from _input import KeyReader
+
+class KeyReaderFeedTest(unittest.TestCase):
+    def reader(self, esc_timeout=60):
+        return KeyReader(fd=-1, esc_timeout=esc_timeout)  # never read, only fed
+
+    def keys(self, text):
+        reader = self.reader()
+        reader.feed(text)
+        return list(reader.queue)
+
+    def test_characters_and_enter(self):
+        self.assertEqual(self.keys("ab\rq\n"), ['a', 'b', 'ENTER', 'q', 'ENTER'])
+
+    def test_unicode_characters(self):
+        self.assertEqual(self.keys("äß€"), ['ä', 'ß', '€'])
+
+    def test_arrows_in_both_cursor_modes(self):
+        text = "\x1b[A\x1b[B\x1b[C\x1b[D\x1bOA\x1bOD\x1b[1A"
+        self.assertEqual(self.keys(text), ['UP', 'DOWN', 'RIGHT', 'LEFT', 'UP', 'LEFT', 'UP'])
+
+    def test_other_sequences_are_unknown(self):
+        self.assertEqual(self.keys("\x1b[1;5A\x1b[3~x"), ['UNKNOWN', 'UNKNOWN', 'x'])
+
+    def test_escape_before_a_key(self):
+        self.assertEqual(self.keys("\x1bq"), ['ESC', 'q'])
+
+    def test_sequence_split_across_reads(self):
+        reader = self.reader()
+        reader.feed("w\x1b")
+        self.assertEqual(reader.partial, "\x1b")
+        reader.feed("[")
+        self.assertEqual(reader.partial, "\x1b[")
+        reader.feed("Cs")
+        self.assertEqual(reader.partial, "")
+        self.assertEqual(list(reader.queue), ['w', 'RIGHT', 's'])
+
+    def test_split_sequence_keeps_its_first_timestamp(self):
+        reader = self.reader()
+        reader.feed("\x1b")
+        since = reader.partial_since
+        reader.feed("[")
+        self.assertEqual(reader.partial_since, since)
+
+    def test_lone_escape_expires(self):
+        reader = self.reader(esc_timeout=0)
+        reader.feed("\x1b")
+        self.assertEqual(list(reader.queue), [])
+        reader.expire_partial()
+        self.assertEqual(list(reader.queue), ['ESC'])
+
+    def test_expired_partial_sequence_becomes_keys(self):
+        reader = self.reader(esc_timeout=0)
+        reader.feed("\x1b[")
+        reader.expire_partial()
+        self.assertEqual(list(reader.queue), ['ESC', '['])
+
+    def test_wait_returns_queued_keys_without_reading(self):
+        reader = self.reader()
+        reader.feed("ab")
+        self.assertEqual(reader.wait(10), ['a', 'b'])
+        self.assertEqual(list(reader.queue), [])
+
+@unittest.skipIf(sys.platform == 'win32', "reads a pipe through select()")
+class KeyReaderEndOfInputTest(unittest.TestCase):
+    def reader(self, data):
+        """A reader on a pipe that sent data and closed"""
+        read_end, write_end = os.pipe()
+        self.addCleanup(os.close, read_end)
+        os.write(write_end, data)
+        os.close(write_end)
+        return KeyReader(fd=read_end, esc_timeout=60)
+
+    def test_keys_before_the_hangup_come_first(self):
+        reader = self.reader(b"ab\x1b")
+        self.assertEqual(reader.wait(5), ['a', 'b'])
+        self.assertEqual(reader.wait(5), ['ESC'])  # nothing can complete it now
+        self.assertTrue(reader.eof)
+        self.assertRaises(EOFError, reader.wait, 5)
+
+    def test_wait_returns_at_once_after_a_hangup(self):
+        reader = self.reader(b"")
+        start = time.monotonic()
+        for _ in range(3):
+            self.assertRaises(EOFError, reader.wait, 5)
+        self.assertRaises(EOFError, reader.keys)
+        self.assertLess(time.monotonic() - start, 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+"""Metrics counters, histograms, exports and command timing"""
+
+import io
+import json
+import os
+import sys
+import unittest
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(BASE_PATH, "core"), os.path.join(BASE_PATH, "games")]
+
+from commands import CommandDispatcher
+from metrics import BUCKETS, METRICS, Histogram, Metrics
+
+class HistogramTest(unittest.TestCase):
+    def test_buckets_and_quantiles(self):
+        histogram = Histogram()
+        for seconds in [0.0002] * 90 + [0.02] * 9 + [0.3]:
+            histogram.observe(seconds)
+        self.assertEqual(histogram.count, 100)
+        self.assertAlmostEqual(histogram.sum, 0.018 + 0.18 + 0.3)
+        self.assertEqual(histogram.quantile(0.5), 0.00025)
+        self.assertEqual(histogram.quantile(0.99), 0.025)
+        self.assertEqual(histogram.quantile(1.0), 0.3)  # capped at the largest value seen
+
+    def test_slower_than_every_bucket(self):
+        histogram = Histogram()
+        histogram.observe(5.0)
+        self.assertEqual(histogram.counts[-1], 1)
+        self.assertEqual(histogram.quantile(0.5), 5.0)
+
+    def test_empty(self):
+        self.assertEqual(Histogram().quantile(0.99), 0.0)
+
+class MetricsTest(unittest.TestCase):
+    def metrics(self):
+        metrics = Metrics(enabled=True)
+        metrics.count("frames_total", game="snake")
+        metrics.count("frames_total", 2, game="snake")
+        metrics.count("frames_total", game="matrix")
+        metrics.observe("command_seconds", 0.003, command="cv")
+        metrics.observe("command_seconds", 0.0004, command="cv")
+        return metrics
+
+    def test_labels_keep_series_apart(self):
+        counters = {(c["name"], c["labels"]["game"]): c["value"]
+                    for c in self.metrics().snapshot()["counters"]}
+        self.assertEqual(counters, {("frames_total", "snake"): 3, ("frames_total", "matrix"): 1})
+
+    def test_json_export(self):
+        data = json.loads(self.metrics().to_json())
+        (histogram,) = data["histograms"]
+        self.assertEqual((histogram["name"], histogram["labels"]), ("command_seconds", {"command": "cv"}))
+        self.assertEqual(histogram["count"], 2)
+        self.assertEqual(sum(histogram["buckets"].values()), 2)
+
+    def test_prometheus_export(self):
+        lines = self.metrics().to_prometheus().splitlines()
+        self.assertEqual(lines.count("# TYPE whois_frames_total counter"), 1)
+        self.assertIn('whois_frames_total{game="snake"} 3', lines)
+        self.assertIn("# TYPE whois_command_seconds histogram", lines)
+        buckets = [line for line in lines if line.startswith("whois_command_seconds_bucket")]
+        self.assertEqual(len(buckets), len(BUCKETS) + 1)
+        counts = [int(line.rsplit(" ", 1)[1]) for line in buckets]
+        self.assertEqual(counts, sorted(counts))  # cumulative
+        self.assertEqual(counts[-1], 2)
+        self.assertIn('whois_command_seconds_count{command="cv"} 2', lines)
+
+    def test_reset(self):
+        metrics = self.metrics()
+        metrics.reset()
+        self.assertEqual(metrics.snapshot()["counters"], [])
+        self.assertEqual(metrics.to_prometheus(), "\n")
+
+class CommandTimingTest(unittest.TestCase):
+    def setUp(self):
+        enabled = METRICS.enabled
+        self.addCleanup(setattr, METRICS, "enabled", enabled)
+        self.addCleanup(METRICS.reset)
+        METRICS.reset()
+        self.dispatcher = CommandDispatcher(out=io.StringIO(), interactive=False)
+
+    def timed(self):
+        return {h["labels"]["command"]: h["count"] for h in METRICS.snapshot()["histograms"]
+                if h["name"] == "command_seconds"}
+
+    def test_nothing_recorded_while_disabled(self):
+        METRICS.enabled = False
+        self.dispatcher.execute("help")
+        self.assertEqual(self.timed(), {})
+
+    def test_commands_are_timed_once_enabled(self):
+        METRICS.enabled = True
+        self.dispatcher.execute("help")
+        self.dispatcher.execute("help")
+        self.dispatcher.execute("no-such-command")
+        self.assertEqual(self.timed(), {"help": 2, "unknown": 1})
+
+    def test_remote_sessions_cannot_switch_recording(self):
+        METRICS.enabled = False
+        self.dispatcher.execute("stats on")
+        self.assertFalse(METRICS.enabled)
+        self.assertIn("Only the local terminal", self.dispatcher.out.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
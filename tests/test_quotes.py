@@ -0,0 +1,106 @@
+"""QuoteStore index, keyword and author search"""
+
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(BASE_PATH, "core"), os.path.join(BASE_PATH, "games")]
+
+from quotes import QuoteStore, index_path, split_author, words
+
+QUOTES = [
+    "Talk is cheap. Show me the code. – Linus Torvalds",
+    "Premature optimization is the root of all evil. – Donald Knuth",
+    "",
+    "  Beware of bugs in the above code; I have only proved it correct. – Donald Knuth  ",
+    "Code never lies, comments sometimes do. — Ron Jeffries",
+    "Simplicity is prerequisite for reliability. - Edsger Dijkstra",
+    "Über allen Gipfeln ist Ruh – Goethe",
+    "No author here",
+]
+
+class QuoteStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "quotes.txt")
+        self.write(QUOTES)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write(self, lines):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+
+    def open(self):
+        store = QuoteStore(self.path)
+        self.addCleanup(store.close)
+        return store
+
+    def texts(self, store, numbers):
+        return [store.read(number) for number in numbers]
+
+    def test_reads_every_quote_stripped(self):
+        store = self.open()
+        expected = [line.strip() for line in QUOTES if line.strip()]
+        self.assertEqual(len(store), len(expected))
+        self.assertEqual(self.texts(store, range(len(store))), expected)
+
+    def test_search_needs_every_word(self):
+        store = self.open()
+        self.assertEqual(len(store.search("code")), 3)
+        self.assertEqual(self.texts(store, store.search("CODE show")), [QUOTES[0]])
+        self.assertEqual(store.search("code evil"), [])
+        self.assertEqual(store.search("nothing-matches-this"), [])
+        self.assertEqual(store.search(""), [])
+
+    def test_search_is_unicode_aware(self):
+        store = self.open()
+        self.assertEqual(self.texts(store, store.search("über")), [QUOTES[6]])
+
+    def test_author_search_only_looks_at_authors(self):
+        store = self.open()
+        self.assertEqual(len(store.by_author("knuth")), 2)
+        self.assertEqual(len(store.by_author("Donald Knuth")), 2)
+        self.assertEqual(self.texts(store, store.by_author("jeffries")), [QUOTES[4]])
+        self.assertEqual(self.texts(store, store.by_author("dijkstra")), [QUOTES[5]])
+        self.assertEqual(store.by_author("code"), [])
+        self.assertEqual(store.by_author("author"), [])
+
+    def test_index_is_reused_until_the_file_changes(self):
+        self.assertTrue(self.open().rebuilt)
+        self.assertTrue(os.path.exists(index_path(self.path)))
+        self.assertFalse(self.open().rebuilt)
+        self.write(QUOTES + ["Fresh words – Someone New"])
+        store = self.open()
+        self.assertTrue(store.rebuilt)
+        self.assertEqual(self.texts(store, store.by_author("someone")), ["Fresh words – Someone New"])
+
+    def test_broken_index_is_rebuilt(self):
+        self.open()
+        with open(index_path(self.path), 'wb') as f:
+            f.write(b"garbage")
+        store = self.open()
+        self.assertTrue(store.rebuilt)
+        self.assertEqual(len(store.search("code")), 3)
+
+    def test_random_and_empty_file(self):
+        store = self.open()
+        self.assertIn(store.random(random.Random(1)), [line.strip() for line in QUOTES])
+        self.write([])
+        self.assertIsNone(self.open().random())
+
+class HelpersTest(unittest.TestCase):
+    def test_split_author(self):
+        self.assertEqual(split_author("a – b – Someone"), ("a – b", "Someone"))
+        self.assertEqual(split_author("Quote - Dash"), ("Quote", "Dash"))
+        self.assertEqual(split_author("Nobody said this"), ("Nobody said this", ""))
+
+    def test_words(self):
+        self.assertEqual(words("Don't PANIC, 42!"), ["don", "t", "panic", "42"])
+
+if __name__ == "__main__":
+    unittest.main()
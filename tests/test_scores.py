@@ -0,0 +1,115 @@
+"""ScoreStore appends, compaction, dedupe and torn log lines"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(BASE_PATH, "core"), os.path.join(BASE_PATH, "games")]
+
+from _scores import ScoreStore
+
+class ScoreStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "scores.json")
+        self.log_path = os.path.join(self.dir.name, "scores.log")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def store(self, **kwargs):
+        return ScoreStore(self.path, **kwargs)
+
+    def scores(self, store):
+        return [entry["score"] for entry in store.top()]
+
+    def log(self):
+        with open(self.log_path, 'rb') as f:
+            return f.read()
+
+    def test_best_first_and_limited(self):
+        store = self.store(limit=3)
+        for score in (30, 10, 50, 20, 40):
+            store.add("p", score)
+        self.assertEqual(self.scores(store), [50, 40, 30])
+        self.assertEqual(store.best(), 50)
+
+    def test_sessions_see_each_others_scores(self):
+        first, second = self.store(), self.store()
+        self.assertEqual(second.best(), 0)
+        first.add("a", 10)
+        second.add("b", 20)
+        self.assertEqual(self.scores(first), [20, 10])
+        self.assertEqual(self.scores(second), [20, 10])
+
+    def test_compaction_folds_the_log_into_the_snapshot(self):
+        store = self.store(limit=5, compact_bytes=300)
+        for score in range(1, 11):
+            store.add("p", score)
+        self.assertLess(len(self.log()), 300)
+        with open(self.path, encoding='utf-8') as f:
+            snapshot = json.load(f)
+        self.assertTrue(snapshot)
+        self.assertEqual(self.scores(store), [10, 9, 8, 7, 6])
+        self.assertEqual(self.scores(self.store(limit=5)), [10, 9, 8, 7, 6])
+
+    def test_other_session_notices_a_compaction(self):
+        reader = self.store(compact_bytes=10 ** 6)
+        writer = self.store(compact_bytes=200)
+        writer.add("a", 1)
+        self.assertEqual(self.scores(reader), [1])
+        for score in (2, 3, 4):
+            writer.add("a", score)
+        self.assertEqual(self.scores(reader), [4, 3, 2, 1])
+
+    def test_entries_in_snapshot_and_log_count_once(self):
+        store = self.store(compact_bytes=10 ** 6)
+        store.add("a", 5)
+        store.add("b", 7)
+        # A crash after writing the snapshot but before truncating the log
+        log = self.log()
+        store.compact_bytes = 1
+        store.add("c", 1)
+        with open(self.log_path, 'ab') as f:
+            f.write(log)
+        self.assertEqual(self.scores(self.store()), [7, 5, 1])
+
+    def test_compaction_reports_each_dropped_entry_once(self):
+        dropped = []
+        store = self.store(limit=3, compact_bytes=250, on_drop=dropped.append)
+        ids = [store.add("p", score) for score in (5, 1, 9, 3, 7, 2, 8, 6, 4)]
+        self.assertTrue(dropped)  # compacted along the way
+        store.compact_bytes = 1
+        ids.append(store.add("p", 0))
+        kept = [entry["id"] for entry in store.top()]
+        self.assertEqual(sorted(entry["score"] for entry in dropped), [0, 1, 2, 3, 4, 5, 6])
+        self.assertEqual(sorted([entry["id"] for entry in dropped] + kept), sorted(ids))
+
+    def test_torn_line_is_sealed_and_skipped(self):
+        store = self.store()
+        store.add("a", 5)
+        with open(self.log_path, 'ab') as f:
+            f.write(b'{"name": "b", "sco')
+        store.add("c", 9)
+        self.assertEqual(self.scores(self.store()), [9, 5])
+
+    def test_one_byte_torn_log_is_sealed(self):
+        with open(self.log_path, 'wb') as f:
+            f.write(b'{')
+        store = self.store()
+        store.add("a", 3)
+        self.assertTrue(self.log().startswith(b'{\n'))
+        self.assertEqual(self.scores(store), [3])
+
+    def test_legacy_snapshot_without_ids(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump([{"name": "old", "score": 8}, {"name": "old", "score": 8}], f)
+        store = self.store()
+        store.add("new", 4)
+        self.assertEqual(self.scores(store), [8, 8, 4])
+
+if __name__ == "__main__":
+    unittest.main()
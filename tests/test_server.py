@@ -0,0 +1,109 @@
+"""Telnet input handling and live sessions of the network server"""
+
+import asyncio
+import os
+import socket
+import sys
+import unittest
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(BASE_PATH, "core"), os.path.join(BASE_PATH, "games")]
+
+from main import WhoisJulius
+from server import DO, IAC, SB, SE, WILL, SessionServer, parse_address, strip_telnet, to_wire
+
+class StripTelnetTest(unittest.TestCase):
+    def test_plain_data_is_untouched(self):
+        data = b"help\r\n"
+        self.assertIs(strip_telnet(data), data)
+
+    def test_negotiation_is_removed(self):
+        data = bytes((IAC, WILL, 1)) + b"cv" + bytes((IAC, DO, 3)) + b"\r\n"
+        self.assertEqual(strip_telnet(data), b"cv\r\n")
+
+    def test_subnegotiation_is_removed(self):
+        data = b"a" + bytes((IAC, SB, 31, 0, 80, 0, 24, IAC, SE)) + b"b"
+        self.assertEqual(strip_telnet(data), b"ab")
+
+    def test_escaped_iac_is_data(self):
+        self.assertEqual(strip_telnet(bytes((65, IAC, IAC, 66))), bytes((65, IAC, 66)))
+
+    def test_cut_off_sequences_are_dropped(self):
+        self.assertEqual(strip_telnet(b"x" + bytes((IAC,))), b"x")
+        self.assertEqual(strip_telnet(b"x" + bytes((IAC, SB, 31, 0))), b"x")
+        self.assertEqual(strip_telnet(b"x" + bytes((IAC, 241)) + b"y"), b"xy")  # NOP
+
+class WireTest(unittest.TestCase):
+    def test_line_endings(self):
+        self.assertEqual(to_wire("a\nb\r\nc"), b"a\r\nb\r\nc")
+
+    def test_parse_address(self):
+        self.assertEqual(parse_address(":2323"), (None, 2323))
+        self.assertEqual(parse_address("127.0.0.1:23"), ("127.0.0.1", 23))
+
+def talk(address, data, hangup=False):
+    """Send data over a plain socket and read until the server closes it"""
+    with socket.create_connection(address, timeout=5) as sock:
+        sock.sendall(data)
+        if hangup:
+            sock.shutdown(socket.SHUT_WR)
+        received = b""
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                return received
+            received += chunk
+
+class SessionServerTest(unittest.IsolatedAsyncioTestCase):
+    async def start(self, **kwargs):
+        server = SessionServer(lambda out: WhoisJulius(out=out, interactive=False), **kwargs)
+        address = await server.start("127.0.0.1", 0)
+        task = asyncio.create_task(server.serve_forever())
+        self.addAsyncCleanup(self.stop, task)
+        return server, address
+
+    async def stop(self, task):
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def test_session_runs_commands_until_exit(self):
+        server, address = await self.start()
+        negotiation = bytes((IAC, WILL, 1))
+        output = await asyncio.to_thread(talk, address, negotiation + b"help\r\nexit\r\n")
+        text = output.decode('utf-8')
+        self.assertIn("AVAILABLE COMMANDS", text)
+        self.assertIn("Goodbye", text)
+        self.assertNotIn("\n", text.replace("\r\n", ""))  # telnet line endings only
+        self.assertEqual(server.sessions, 0)
+
+    async def test_sessions_are_independent(self):
+        _server, address = await self.start()
+        first, second = await asyncio.gather(
+            asyncio.to_thread(talk, address, b"contact\r\nexit\r\n"),
+            asyncio.to_thread(talk, address, b"exit\r\n"))
+        self.assertIn(b"Goodbye", first)
+        self.assertIn(b"Goodbye", second)
+        self.assertGreater(len(first), len(second))
+
+    async def test_hangup_ends_the_session(self):
+        server, address = await self.start()
+        output = await asyncio.to_thread(talk, address, b"help\r\n", hangup=True)
+        self.assertIn(b"AVAILABLE COMMANDS", output)
+        self.assertEqual(server.sessions, 0)
+
+    async def test_ctrl_d_ends_the_session(self):
+        server, address = await self.start()
+        output = await asyncio.to_thread(talk, address, b"\x04\r\n")
+        self.assertNotIn(b"Goodbye", output)
+        self.assertEqual(server.sessions, 0)
+
+    async def test_full_server_turns_clients_away(self):
+        _server, address = await self.start(max_sessions=0)
+        output = await asyncio.to_thread(talk, address, b"")
+        self.assertIn(b"Server busy", output)
+
+if __name__ == "__main__":
+    unittest.main()
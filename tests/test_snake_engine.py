@@ -0,0 +1,151 @@
+"""SnakeBoard bookkeeping, SnakeEngine.step and replay determinism"""
+
+import os
+import random
+import sys
+import unittest
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(BASE_PATH, "core"), os.path.join(BASE_PATH, "games")]
+
+from _snake_engine import (CRASH, EAT, FULL, MOVE, InputRecorder, SnakeBoard,
+                           SnakeEngine, replay, verify)
+
+class SnakeBoardTest(unittest.TestCase):
+    def assert_consistent(self, board):
+        free = set(board.free[:board.free_count])
+        for cell in range(board.width * board.height):
+            self.assertEqual(board.occupied[cell], cell not in free)
+            self.assertEqual(board.free[board.slot[cell]], cell)
+        self.assertEqual(set(board.body), {c for c in range(len(board.occupied)) if board.occupied[c]})
+
+    def test_push_and_pop_keep_free_list_in_sync(self):
+        board = SnakeBoard(5, 4)
+        for cell in (7, 8, 13, 12, 0, 19):
+            board.push_head(cell)
+            self.assert_consistent(board)
+        self.assertEqual(board.free_count, 20 - 6)
+        self.assertEqual(board.pop_tail(), 7)
+        self.assertEqual(board.pop_tail(), 8)
+        self.assert_consistent(board)
+        self.assertEqual(board.free_count, 20 - 4)
+
+    def test_random_free_never_returns_the_snake(self):
+        board = SnakeBoard(4, 3)
+        for cell in (0, 1, 2, 6, 10, 11):
+            board.push_head(cell)
+        rng = random.Random(1)
+        picks = {board.random_free(rng) for _ in range(500)}
+        self.assertEqual(picks, {3, 4, 5, 7, 8, 9})
+
+    def test_full_board_has_no_free_cell(self):
+        board = SnakeBoard(2, 2)
+        for cell in range(4):
+            board.push_head(cell)
+        self.assertIsNone(board.random_free())
+
+    def test_pack_round_trip(self):
+        board = SnakeBoard(7, 5)
+        self.assertEqual(board.unpack(board.pack(3, 4)), (3, 4))
+
+class SnakeEngineTest(unittest.TestCase):
+    def test_starts_in_the_middle_with_food_off_the_snake(self):
+        engine = SnakeEngine(10, 6, seed=3)
+        self.assertEqual(list(engine.snake), [engine.board.pack(5, 3)])
+        self.assertNotIn(engine.food, engine.snake)
+
+    def test_move_keeps_length(self):
+        engine = SnakeEngine(10, 6, seed=3)
+        engine.food = engine.board.pack(0, 0)
+        head = engine.snake[0]
+        self.assertEqual(engine.step(), MOVE)
+        self.assertEqual(list(engine.snake), [head + 1])
+        self.assertEqual(engine.tick, 1)
+
+    def test_eat_grows_scores_and_speeds_up(self):
+        engine = SnakeEngine(10, 6, seed=3)
+        engine.food = engine.snake[0] + 1
+        speed = engine.speed
+        self.assertEqual(engine.step(), EAT)
+        self.assertEqual(len(engine.snake), 2)
+        self.assertEqual(engine.score, 10)
+        self.assertLess(engine.speed, speed)
+        self.assertNotIn(engine.food, engine.snake)
+
+    def test_reversing_is_ignored(self):
+        engine = SnakeEngine(10, 6, seed=3)
+        engine.turn('LEFT')
+        self.assertEqual(engine.next_direction, 'RIGHT')
+        engine.turn('UP')
+        self.assertEqual(engine.next_direction, 'UP')
+
+    def test_wall_crash(self):
+        engine = SnakeEngine(4, 3, seed=3)
+        engine.food = engine.board.pack(0, 0)
+        self.assertEqual(engine.step(), MOVE)
+        self.assertEqual(engine.step(), CRASH)
+        self.assertFalse(engine.alive)
+
+    def test_self_crash(self):
+        engine = SnakeEngine(10, 6, seed=3)
+        x, y = engine.board.unpack(engine.snake[0])
+        for cell in ((x + 1, y), (x + 2, y), (x + 2, y + 1), (x + 1, y + 1)):
+            engine.food = engine.board.pack(*cell)
+            if cell == (x + 2, y + 1):
+                engine.turn('DOWN')
+            elif cell == (x + 1, y + 1):
+                engine.turn('LEFT')
+            self.assertEqual(engine.step(), EAT)
+        engine.food = engine.board.pack(0, 0)
+        engine.turn('UP')
+        self.assertEqual(engine.step(), CRASH)
+
+    def test_filling_the_board_ends_the_game(self):
+        engine = SnakeEngine(2, 1, seed=3)
+        engine.food = engine.board.pack(0, 0)
+        engine.direction = engine.next_direction = 'LEFT'  # a turn can't reverse
+        self.assertEqual(engine.step(), FULL)
+        self.assertFalse(engine.alive)
+
+class ReplayTest(unittest.TestCase):
+    def play(self, seed, ticks=400):
+        """A game with pseudo-random turns, recorded"""
+        engine = SnakeEngine(20, 12, seed=seed)
+        recorder = InputRecorder(engine)
+        moves = random.Random(seed + 1)
+        while engine.alive and engine.tick < ticks:
+            if moves.random() < 0.3:
+                recorder.turn(moves.choice(['UP', 'DOWN', 'LEFT', 'RIGHT']))
+            engine.step()
+        return engine, recorder.to_dict("test")
+
+    def test_same_seed_same_game(self):
+        first = SnakeEngine(20, 12, seed=42)
+        second = SnakeEngine(20, 12, seed=42)
+        for direction in ['UP', 'LEFT', 'DOWN', 'RIGHT'] * 3:
+            first.turn(direction)
+            second.turn(direction)
+            self.assertEqual(first.step(), second.step())
+            self.assertEqual((list(first.snake), first.food), (list(second.snake), second.food))
+
+    def test_replay_reproduces_the_recorded_game(self):
+        for seed in range(20):
+            engine, log = self.play(seed)
+            replayed = replay(log)
+            self.assertEqual(replayed.tick, engine.tick)
+            self.assertEqual(replayed.score, engine.score)
+            self.assertEqual(list(replayed.snake), list(engine.snake))
+            self.assertEqual(replayed.food, engine.food)
+            self.assertTrue(verify(log))
+
+    def test_replay_until_stops_early(self):
+        engine, log = self.play(7)
+        self.assertEqual(replay(log, until=3).tick, min(3, engine.tick))
+
+    def test_tampered_score_fails_verification(self):
+        _engine, log = self.play(5)
+        log["score"] += 10
+        self.assertFalse(verify(log))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+"""SpectatorHub fan-out, slow viewers and keyframe resync"""
+
+import os
+import socket
+import sys
+import unittest
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(BASE_PATH, "core"), os.path.join(BASE_PATH, "games")]
+
+from _spectate import GREETING, SpectatorHub
+from matrix import MatrixFramebuffer
+from test_ansi import Screen
+
+class SpectatorTest(unittest.TestCase):
+    def setUp(self):
+        self.hub = SpectatorHub("127.0.0.1", 0)
+        self.addCleanup(self.close)
+
+    def close(self):
+        for viewer in list(self.hub.viewers):
+            self.hub.drop(viewer)
+        self.hub.listener.close()
+
+    def connect(self, receive_buffer=None):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.addCleanup(sock.close)
+        if receive_buffer:
+            # Before connecting, so the window never grows past it
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer)
+        sock.connect(self.hub.listener.getsockname()[:2])
+        return sock
+
+    def receive(self, sock):
+        """Everything the hub sent so far"""
+        sock.settimeout(0.05)
+        data = b""
+        try:
+            while True:
+                chunk = sock.recv(1 << 20)
+                if not chunk:
+                    break
+                data += chunk
+        except socket.timeout:
+            pass
+        return data
+
+class SpectatorHubTest(SpectatorTest):
+    def test_every_viewer_gets_the_same_bytes(self):
+        viewers = [self.connect() for _ in range(3)]
+        self.hub.publish(b"first", lambda: b"KEY")
+        self.hub.publish(b"second", lambda: b"KEY")
+        self.assertEqual(len(self.hub.viewers), 3)
+        for sock in viewers:
+            self.assertEqual(self.receive(sock), GREETING + b"KEY" + b"second")
+        self.assertEqual(self.hub.keyframes, 1)  # built once for all of them
+
+    def test_slow_viewer_skips_frames_then_resyncs_with_a_keyframe(self):
+        fast, slow = self.connect(), self.connect(receive_buffer=4096)
+        self.hub.publish(b"", lambda: b"K0")
+        lagging = next(v for v in self.hub.viewers if v.sock.getpeername() == slow.getsockname())
+        lagging.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        self.receive(fast)
+        self.receive(slow)
+
+        frames = 0
+        while not lagging.pending:
+            self.hub.publish(b"x" * 65536, lambda: b"K1")
+            self.receive(fast)
+            frames += 1
+            self.assertLess(frames, 50)
+        skipped = self.hub.skipped
+        self.hub.publish(b"diff", lambda: b"K2")
+        self.assertEqual(self.hub.skipped, skipped + 1)
+        self.assertTrue(lagging.stale)
+        self.assertEqual(self.receive(fast), b"diff")
+
+        caught_up = b""
+        while lagging.pending:  # the viewer reads, the rest of the old frame drains
+            caught_up += self.receive(slow)
+            self.hub.publish(b"", lambda: b"K3")
+        caught_up += self.receive(slow)
+        self.assertTrue(caught_up.endswith(b"x" + b"K3"))  # one keyframe once drained
+        self.assertFalse(lagging.stale)
+        self.hub.publish(b"next", lambda: b"K4")
+        self.assertEqual(self.receive(slow), b"next")
+        self.assertEqual(self.receive(fast), b"next")
+
+    def test_viewer_that_leaves_is_dropped(self):
+        sock = self.connect()
+        self.hub.publish(b"a", lambda: b"K")
+        sock.close()
+        self.hub.publish(b"b", lambda: b"K")
+        self.hub.publish(b"c", lambda: b"K")
+        self.assertEqual(self.hub.viewers, [])
+
+    def test_invalidate_repaints_every_viewer(self):
+        sock = self.connect()
+        self.hub.publish(b"a", lambda: b"K1")
+        self.hub.invalidate()
+        self.hub.publish(b"b", lambda: b"K2")
+        self.assertEqual(self.receive(sock), GREETING + b"K1" + b"K2")
+
+class MatrixSpectatorTest(SpectatorTest):
+    COLS, ROWS = 30, 12
+
+    def test_viewer_joining_mid_stream_sees_the_players_screen(self):
+        framebuffer = MatrixFramebuffer(self.COLS, self.ROWS, "abc", "\033[1;32m", "\033[32m")
+        player = Screen(self.COLS, self.ROWS - 1)
+        viewer = Screen(self.COLS, self.ROWS - 1)
+        sock = None
+        for n in range(60):
+            if n == 20:
+                sock = self.connect()
+            # Same order as MatrixRain.run_frames
+            frame = framebuffer.render()
+            self.hub.publish(frame, framebuffer.keyframe)
+            framebuffer.step()
+            player.feed(frame.decode())
+            if n == 20:
+                viewer.feed(self.receive(sock)[len(GREETING):].decode())
+                self.assertTrue(viewer.looks_like(player.cells))  # the keyframe matches this frame
+        viewer.feed(self.receive(sock).decode())
+        self.assertTrue(viewer.looks_like(player.cells))
+
+if __name__ == "__main__":
+    unittest.main()
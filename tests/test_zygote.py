@@ -0,0 +1,105 @@
+"""Zygote handshake, forked sessions and stalled clients"""
+
+import os
+import signal
+import socket
+import struct
+import sys
+import unittest
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(BASE_PATH, "core"), os.path.join(BASE_PATH, "games")]
+
+if sys.platform != 'win32':
+    from zygote import HEADER, connect, recv_exact, spawn
+
+class Echo:
+    """A session that waits for one line, then answers with an environment variable"""
+
+    def run(self):
+        line = b""
+        while not line.endswith(b"\n"):
+            line += os.read(0, 1)
+        os.write(1, os.environ["GREETING"].encode() + b" " + line)
+
+class Failing:
+    def run(self):
+        sys.exit(3)
+
+@unittest.skipIf(sys.platform == 'win32', "the zygote is POSIX only")
+class ZygoteTest(unittest.TestCase):
+    def pair(self):
+        client, server = socket.socketpair()
+        self.addCleanup(client.close)
+        self.addCleanup(server.close)
+        return client, server
+
+    def pipe(self):
+        read_end, write_end = os.pipe()
+        self.addCleanup(os.close, read_end)
+        self.addCleanup(os.close, write_end)
+        return read_end, write_end
+
+    def hand_over(self, client, fds, env):
+        """What connect() sends: the env length with the terminal fds attached, then the env"""
+        client.sendmsg([HEADER.pack(len(env))],
+                       [(socket.SOL_SOCKET, socket.SCM_RIGHTS, struct.pack("3i", *fds))])
+        client.sendall(env)
+
+    def session(self, make_app, env=b"GREETING=hello\0TERM=dumb"):
+        """Fork a session on pipes, returns (pid, stdin, stdout, client socket)"""
+        client, server = self.pair()
+        stdin_read, stdin_write = self.pipe()
+        stdout_read, stdout_write = self.pipe()
+        self.hand_over(client, (stdin_read, stdout_write, stdout_write), env)
+        server.settimeout(5)
+        listener = socket.socket(socket.AF_UNIX)
+        self.addCleanup(listener.close)
+        spawn(server, listener, make_app)
+        pid = HEADER.unpack(recv_exact(client, HEADER.size))[0]
+        return pid, stdin_write, stdout_read, client
+
+    def finish(self, pid, client):
+        """Status byte the session sent back, after reaping it"""
+        client.settimeout(5)
+        status = recv_exact(client, 1)
+        os.waitpid(pid, 0)
+        return status
+
+    def test_recv_exact_joins_chunks_and_stops_at_the_end(self):
+        client, server = self.pair()
+        client.sendall(b"ab")
+        client.sendall(b"cd")
+        self.assertEqual(recv_exact(server, 3), b"abc")
+        client.close()
+        self.assertEqual(recv_exact(server, 3), b"d")
+
+    def test_session_runs_on_the_clients_terminal_and_environment(self):
+        pid, stdin, stdout, client = self.session(Echo)
+        self.assertNotEqual(pid, os.getpid())
+        os.write(stdin, b"world\n")
+        self.assertEqual(os.read(stdout, 100), b"hello world\n")
+        self.assertEqual(self.finish(pid, client), b"\x00")
+
+    def test_exit_status_comes_back(self):
+        pid, _stdin, _stdout, client = self.session(Failing)
+        self.assertEqual(self.finish(pid, client), b"\x03")
+
+    def test_stalled_client_times_out(self):
+        client, server = self.pair()
+        read_end, write_end = self.pipe()
+        client.sendmsg([HEADER.pack(100)],
+                       [(socket.SOL_SOCKET, socket.SCM_RIGHTS, struct.pack("3i", read_end, write_end, write_end))])
+        client.sendall(b"GREETING=")  # and then nothing more
+        server.settimeout(0.1)
+        self.assertRaises(OSError, spawn, server, None, Echo)
+
+    def test_no_zygote_listening(self):
+        handlers = {name: signal.getsignal(getattr(signal, name))
+                    for name in ("SIGINT", "SIGQUIT", "SIGTERM", "SIGHUP", "SIGWINCH")}
+        for name, handler in handlers.items():
+            self.addCleanup(signal.signal, getattr(signal, name), handler)
+        self.assertIsNone(connect(os.path.join(BASE_PATH, "no-such-zygote.sock")))
+
+if __name__ == "__main__":
+    unittest.main()